@@ -0,0 +1,85 @@
+"""
+Notification channel benchmark.
+
+Sends the same campaign through the async channels against the bundled LocalSinkServer in three modes:
+    - per_message: a new connection for every message, what a naive send() implementation does,
+    - pooled: keep-alive connections from the pool, one message per round trip,
+    - pipelined: keep-alive connections, `--pipeline-depth` messages per round trip.
+
+Every mode is written as one JSON line with the throughput and the number of connections opened.
+
+    python -m benchmarks.notification_channels --messages 20000 --handshake-delay 0.002
+"""
+# Import libraries
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import sys
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from src.creational.factory_method.async_notification_example import (
+    AsyncEmailNotificationCreator,
+    ConnectionPool,
+    LocalSinkServer,
+)
+
+
+MODES = {
+    "per_message": {"keep_alive": False, "pipeline_depth": 1, "chunk_size": 1},
+    "pooled": {"keep_alive": True, "pipeline_depth": 1, "chunk_size": None},
+    "pipelined": {"keep_alive": True, "pipeline_depth": None, "chunk_size": None},
+}
+
+
+async def run_mode(mode: str, args: argparse.Namespace) -> Dict[str, Any]:
+    settings = MODES[mode]
+    async with LocalSinkServer(handshake_delay=args.handshake_delay) as server:
+        pool = ConnectionPool(
+            *server.address,
+            max_size=args.pool_size,
+            pipeline_depth=settings["pipeline_depth"] or args.pipeline_depth,
+            keep_alive=settings["keep_alive"],
+        )
+        creator = AsyncEmailNotificationCreator(pool)
+        messages = (f"Campaign message #{number}" for number in range(args.messages))
+
+        started = perf_counter()
+        sent = await creator.notify_many(messages, chunk_size=settings["chunk_size"] or args.chunk_size)
+        elapsed = perf_counter() - started
+        await pool.close()
+
+    return {
+        "mode": mode,
+        "messages": sent,
+        "seconds": elapsed,
+        "messages_per_second": sent / elapsed if elapsed else None,
+        "connections_opened": pool.opened,
+        "handshake_delay": args.handshake_delay,
+        "pool_size": args.pool_size,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=list(MODES))
+    parser.add_argument("--messages", type=int, default=5_000)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--pipeline-depth", type=int, default=64)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--handshake-delay", type=float, default=0.001,
+                        help="Seconds the server waits before greeting a new connection")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    for mode in args.modes:
+        row = asyncio.run(run_mode(mode, args))
+        sys.stdout.write(json.dumps(row) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
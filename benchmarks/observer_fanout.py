@@ -0,0 +1,237 @@
+"""
+Observer fan-out benchmark.
+
+Measures how ConcreteEventManager and ConcreteNotificationManager scale with:
+    - the number of subscribers (1k to 1M),
+    - the cost of a subscriber: no-op, CPU-bound or sleep-bound,
+    - the attach/detach churn between two notifications (fraction of the subscribers replaced).
+
+Every case is written as one JSON line with the throughput, the notify tail latency, the attach/detach
+latency and the peak memory of building the subject, plus the commit it ran on. Save the output of two
+commits and diff them with `--compare`:
+
+    python -m benchmarks.observer_fanout --sizes 1000 100000 --output before.jsonl
+    python -m benchmarks.observer_fanout --sizes 1000 100000 --compare before.jsonl
+
+Sleep-bound subscribers are called one after another by the inline managers, so a 1M sleep-bound case
+takes minutes per round. Use `--executor thread:64` to run the notification manager on a thread pool.
+"""
+# Import libraries
+from __future__ import annotations
+import argparse
+import gc
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.behavioral.observer import notification_system, template
+from src.common.metrics import LatencyHistogram
+
+
+MANAGERS = {
+    "event": (template.ConcreteEventManager, template.Subscriber),
+    "notification": (notification_system.ConcreteNotificationManager, notification_system.Subscriber),
+}
+
+
+def make_subscriber_class(base: type, cost: str, cpu_iterations: int, sleep_seconds: float) -> type:
+    """Build a concrete subscriber of the given cost for one of the Subscriber interfaces"""
+    if cost == "noop":
+        def update(self, subject):
+            pass
+    elif cost == "cpu":
+        def update(self, subject):
+            total = 0
+            for value in range(cpu_iterations):
+                total += value * value
+    elif cost == "sleep":
+        def update(self, subject):
+            time.sleep(sleep_seconds)
+    else:
+        raise ValueError(f"Unknown subscriber cost: {cost}")
+    return type(f"{cost.capitalize()}{base.__name__}", (base,), {"update": update})
+
+
+def build_manager(name: str, executor: Optional[ThreadPoolExecutor]):
+    manager_class, _ = MANAGERS[name]
+    if name == "notification":
+        return manager_class(executor=executor)
+    return manager_class()
+
+
+def executor_label(name: str, args: argparse.Namespace) -> str:
+    """Dispatch the subscribers of the manager actually ran on, only the notification manager takes an executor"""
+    return args.executor if name == "notification" else "inline"
+
+
+def notify(manager) -> None:
+    result = manager.notify()
+    if result is not None:
+        result.wait()
+
+
+def measure_memory(name: str, subscriber_class: type, size: int) -> int:
+    """Peak bytes allocated while building a subject with `size` subscribers"""
+    gc.collect()
+    tracemalloc.start()
+    manager = build_manager(name, None)
+    for _ in range(size):
+        manager.attach(subscriber_class())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del manager
+    gc.collect()
+    return peak
+
+
+def run_case(name: str, cost: str, size: int, churn: float, args: argparse.Namespace,
+             executor: Optional[ThreadPoolExecutor]) -> Dict[str, Any]:
+    _, base = MANAGERS[name]
+    subscriber_class = make_subscriber_class(base, cost, args.cpu_iterations, args.sleep_seconds)
+    peak_memory = measure_memory(name, subscriber_class, size) if args.memory else None
+
+    manager = build_manager(name, executor)
+    subscribers = [subscriber_class() for _ in range(size)]
+    for subscriber in subscribers:
+        manager.attach(subscriber)
+
+    notify_latency = LatencyHistogram()
+    attach_latency = LatencyHistogram()
+    detach_latency = LatencyHistogram()
+    replaced = int(size * churn)
+    rounds = 0
+    updates = 0
+    notify_seconds = 0.0
+    started = perf_counter()
+
+    while rounds < args.rounds and (rounds == 0 or perf_counter() - started < args.max_case_seconds):
+        begin = perf_counter()
+        notify(manager)
+        elapsed = perf_counter() - begin
+        notify_latency.record(elapsed)
+        notify_seconds += elapsed
+        updates += len(subscribers)
+        rounds += 1
+
+        for _ in range(replaced):
+            index = random.randrange(len(subscribers))
+            begin = perf_counter()
+            manager.detach(subscribers[index])
+            detach_latency.record(perf_counter() - begin)
+
+            subscribers[index] = subscriber_class()
+            begin = perf_counter()
+            manager.attach(subscribers[index])
+            attach_latency.record(perf_counter() - begin)
+
+    p50, p99 = notify_latency.percentiles(0.50, 0.99)
+    return {
+        "manager": name,
+        "cost": cost,
+        "subscribers": size,
+        "churn": churn,
+        "executor": executor_label(name, args),
+        "rounds": rounds,
+        "updates_per_second": updates / notify_seconds if notify_seconds else None,
+        "notify_p50_seconds": p50,
+        "notify_p99_seconds": p99,
+        "notify_max_seconds": notify_latency.max,
+        "attach_p99_seconds": attach_latency.percentile(0.99) if attach_latency.count else None,
+        "detach_p99_seconds": detach_latency.percentile(0.99) if detach_latency.count else None,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+
+
+def case_key(row: Dict[str, Any]) -> Tuple:
+    return row["manager"], row["cost"], row["subscribers"], row["churn"], row["executor"]
+
+
+def compare(rows: Iterable[Dict[str, Any]], baseline_path: str) -> List[str]:
+    """Throughput of the current run relative to a previous run, one line per matching case"""
+    with open(baseline_path) as baseline_file:
+        baseline = {case_key(row): row for row in map(json.loads, baseline_file) if "manager" in row}
+    lines = []
+    for row in rows:
+        before = baseline.get(case_key(row))
+        if before and before["updates_per_second"] and row["updates_per_second"]:
+            ratio = row["updates_per_second"] / before["updates_per_second"]
+            lines.append(f"{row['manager']:>12} {row['cost']:>5} n={row['subscribers']:<8} churn={row['churn']:<5} "
+                         f"throughput x{ratio:.2f}")
+    return lines
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--managers", nargs="+", choices=sorted(MANAGERS), default=sorted(MANAGERS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--costs", nargs="+", choices=["noop", "cpu", "sleep"], default=["noop", "cpu", "sleep"])
+    parser.add_argument("--churn", nargs="+", type=float, default=[0.0, 0.01],
+                        help="Fraction of the subscribers detached and replaced after every notify")
+    parser.add_argument("--rounds", type=int, default=5, help="Notifications per case")
+    parser.add_argument("--max-case-seconds", type=float, default=10.0,
+                        help="Stop a case after this long, at least one round always runs")
+    parser.add_argument("--cpu-iterations", type=int, default=200)
+    parser.add_argument("--sleep-seconds", type=float, default=0.0001)
+    parser.add_argument("--executor", default="inline",
+                        help="Dispatch for the notification manager: inline or thread:<workers>")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="Skip the tracemalloc pass that measures peak memory")
+    parser.add_argument("--output", help="Write the JSON lines to this file instead of stdout")
+    parser.add_argument("--compare", help="JSON lines of a previous run to compare the throughput with")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    executor = None
+    if args.executor.startswith("thread:"):
+        executor = ThreadPoolExecutor(max_workers=int(args.executor.split(":", 1)[1]))
+    elif args.executor != "inline":
+        raise SystemExit(f"Unknown executor: {args.executor}")
+
+    output = open(args.output, "w") if args.output else sys.stdout
+
+    def emit(row: Dict[str, Any]):
+        output.write(json.dumps(row) + "\n")
+        output.flush()
+
+    rows = []
+    try:
+        emit({"environment": environment()})
+        for name in args.managers:
+            for cost in args.costs:
+                for size in args.sizes:
+                    for churn in args.churn:
+                        row = run_case(name, cost, size, churn, args, executor)
+                        rows.append(row)
+                        emit(row)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if output is not sys.stdout:
+            output.close()
+
+    if args.compare:
+        print("\n".join(compare(rows, args.compare)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Payment load test.
+
+Drives PaymentCreator.execute_transaction() with a mix of credit card, PayPal and crypto traffic against
+a SimulatedGateway. GatewayPaymentCreator and GatewayPayment decorate the real creators and products, so
+the business logic under test is the real one and only process_payment() gains the gateway's behavior:
+    - latency: log-normal per payment method, set by its median and p99,
+    - declines: process_payment() returns "Failed" with probability `decline_rate`,
+    - errors: process_payment() raises GatewayError with probability `error_rate`, like a timeout.
+
+Two load models:
+    - open: transactions arrive at `--rate` per second (Poisson arrivals) whether or not the earlier ones
+      finished, like real shoppers. Latency is measured from the scheduled arrival, so a saturated system
+      shows up as queueing delay instead of a silently lower rate.
+    - closed: `--concurrency` clients each send their next transaction as soon as the previous one
+      finished, which finds the maximum throughput.
+
+Every payment method, plus the total, is written as one JSON line with the throughput, the p50/p99/p999
+latency and the decline and error rates.
+
+    python -m benchmarks.payment_load --mode open --rate 500 --duration 10
+    python -m benchmarks.payment_load --mode closed --concurrency 64 --mix card=0.7 paypal=0.2 crypto=0.1
+"""
+# Import libraries
+from __future__ import annotations
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional
+
+from src.common.metrics import LatencyHistogram
+from src.creational.factory_method.card_validation import with_luhn_check_digit
+from src.creational.factory_method.payment_example import (
+    CreditCardPaymentCreator, CryptocurrencyPaymentCreator, PaymentCreator, PaymentInterface, PaypalPaymentCreator,
+)
+
+
+class GatewayError(Exception):
+    """The simulated gateway did not answer, e.g. a timeout"""
+
+
+class GatewayProfile(NamedTuple):
+    """Latency and failure distribution of one payment method"""
+    median_ms: float
+    p99_ms: float
+    decline_rate: float
+    error_rate: float
+
+
+class SimulatedGateway:
+    """Stand-in payment gateway with per-method latency and failure distributions"""
+    def __init__(self, profiles: Dict[str, GatewayProfile], seed: Optional[int] = None):
+        self.profiles = profiles
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def call(self, method: str) -> str:
+        profile = self.profiles[method]
+        # Log-normal latency: the median is exp(mu) and the p99 is exp(mu + 2.326 sigma).
+        sigma = math.log(max(profile.p99_ms, profile.median_ms) / profile.median_ms) / 2.326
+        with self._lock:
+            latency = self._random.lognormvariate(math.log(profile.median_ms), sigma) / 1000
+            outcome = self._random.random()
+        time.sleep(latency)
+        if outcome < profile.error_rate:
+            raise GatewayError(f"{method} gateway timed out")
+        if outcome < profile.error_rate + profile.decline_rate:
+            return "Failed"
+        return "Successful"
+
+
+class GatewayPayment(PaymentInterface):
+    """Decorates a payment product, process_payment() goes through the simulated gateway"""
+    __slots__ = ("product", "gateway", "method")
+
+    def __init__(self, product: PaymentInterface, gateway: SimulatedGateway, method: str):
+        self.product = product
+        self.gateway = gateway
+        self.method = method
+
+    def validate_payment_details(self):
+        return self.product.validate_payment_details()
+
+    def process_payment(self, amount: float):
+        self.product.process_payment(amount)
+        return self.gateway.call(self.method)
+
+    def generate_receipt(self, amount: float, status: str) -> str:
+        return self.product.generate_receipt(amount, status)
+
+
+class GatewayPaymentCreator(PaymentCreator):
+    """Decorates a payment creator so its products talk to the simulated gateway"""
+    __slots__ = ("creator", "gateway", "method")
+
+    def __init__(self, creator: PaymentCreator, gateway: SimulatedGateway, method: str):
+        super().__init__()
+        self.creator = creator
+        self.gateway = gateway
+        self.method = method
+
+    @property
+    def details(self) -> NamedTuple:
+        return self.creator.details
+
+    def create_payment_service(self) -> PaymentInterface:
+        return GatewayPayment(self.creator.create_payment_service(), self.gateway, self.method)
+
+    def account_key(self) -> Hashable:
+        return self.creator.account_key()
+
+    def masked_account(self) -> str:
+        return self.creator.masked_account()
+
+    def product_key(self) -> Hashable:
+        return self.creator.product_key()
+
+
+ACCOUNT_FACTORIES: Dict[str, Callable[[int], PaymentCreator]] = {
+    "card": lambda number: CreditCardPaymentCreator(card_number=with_luhn_check_digit(f"4{number:014d}"), cvv="123", expiry="12/30"),
+    "paypal": lambda number: PaypalPaymentCreator(email=f"buyer{number}@example.com", auth_token=f"token-{number}"),
+    "crypto": lambda number: CryptocurrencyPaymentCreator(wallet_address=f"wallet{number:016x}", blockchain_network="Tron"),
+}
+
+DEFAULT_PROFILES = {
+    "card": GatewayProfile(median_ms=20.0, p99_ms=120.0, decline_rate=0.03, error_rate=0.002),
+    "paypal": GatewayProfile(median_ms=60.0, p99_ms=400.0, decline_rate=0.05, error_rate=0.005),
+    "crypto": GatewayProfile(median_ms=150.0, p99_ms=1500.0, decline_rate=0.01, error_rate=0.01),
+}
+
+
+class MethodStats:
+    """Outcome counters and latency histogram of one payment method"""
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.succeeded = 0
+        self.declined = 0
+        self.errors = 0
+
+
+class LoadTest:
+    """Runs the traffic mix against the gateway-backed creators and collects per-method statistics"""
+    def __init__(self, mix: Dict[str, float], gateway: SimulatedGateway, accounts: int = 1000, seed: Optional[int] = None):
+        self.methods = list(mix)
+        self.weights = [mix[method] for method in self.methods]
+        self.creators = {
+            method: [GatewayPaymentCreator(ACCOUNT_FACTORIES[method](number), gateway, method) for number in range(accounts)]
+            for method in self.methods
+        }
+        self.stats = {method: MethodStats() for method in self.methods}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def next_transaction(self):
+        with self._lock:
+            method = self._random.choices(self.methods, self.weights)[0]
+            creator = self._random.choice(self.creators[method])
+            amount = round(self._random.uniform(1, 500), 2)
+        return method, creator, amount
+
+    def execute(self, method: str, creator: PaymentCreator, amount: float, started: float):
+        """Run one transaction, the latency counts from `started`"""
+        try:
+            status = creator.execute_transaction(amount).status
+        except GatewayError:
+            status = None
+        latency = perf_counter() - started
+        with self._lock:
+            stats = self.stats[method]
+            stats.latency.record(latency)
+            if status is None:
+                stats.errors += 1
+            elif status == "Successful":
+                stats.succeeded += 1
+            else:
+                stats.declined += 1
+
+    def run_open(self, rate: float, duration: float, max_workers: int):
+        rng = random.Random(self._random.random())
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            started = perf_counter()
+            scheduled = started
+            while scheduled - started < duration:
+                delay = scheduled - perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.execute, *self.next_transaction(), scheduled)
+                scheduled += rng.expovariate(rate)
+
+    def run_closed(self, concurrency: int, duration: float):
+        deadline = perf_counter() + duration
+
+        def client():
+            while perf_counter() < deadline:
+                self.execute(*self.next_transaction(), perf_counter())
+
+        threads = [threading.Thread(target=client, name=f"load-client-{number}") for number in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def summarize(method: str, stats: MethodStats, elapsed: float, args: argparse.Namespace) -> Dict[str, Any]:
+    total = stats.latency.count
+    p50, p99, p999 = stats.latency.percentiles(0.50, 0.99, 0.999)
+    return {
+        "mode": args.mode,
+        "method": method,
+        "transactions": total,
+        "seconds": elapsed,
+        "transactions_per_second": total / elapsed if elapsed else None,
+        "p50_ms": p50 * 1000,
+        "p99_ms": p99 * 1000,
+        "p999_ms": p999 * 1000,
+        "max_ms": stats.latency.max * 1000,
+        "decline_rate": stats.declined / total if total else 0.0,
+        "error_rate": stats.errors / total if total else 0.0,
+    }
+
+
+def parse_mix(values: List[str]) -> Dict[str, float]:
+    mix = {}
+    for value in values:
+        method, _, weight = value.partition("=")
+        if method not in ACCOUNT_FACTORIES or not weight:
+            raise SystemExit(f"Invalid --mix entry {value!r}, use e.g. card=0.7 with one of {sorted(ACCOUNT_FACTORIES)}")
+        mix[method] = float(weight)
+    return mix
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("open", "closed"), default="open")
+    parser.add_argument("--rate", type=float, default=200.0, help="Arrivals per second in open mode")
+    parser.add_argument("--concurrency", type=int, default=32, help="Clients in closed mode, worker threads in open mode")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of traffic")
+    parser.add_argument("--mix", nargs="+", default=["card=0.6", "paypal=0.3", "crypto=0.1"])
+    parser.add_argument("--accounts", type=int, default=1000, help="Accounts per payment method")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplies every gateway latency")
+    parser.add_argument("--decline-rate", type=float, default=None, help="Overrides every method's decline rate")
+    parser.add_argument("--error-rate", type=float, default=None, help="Overrides every method's error rate")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    mix = parse_mix(args.mix)
+    profiles = {
+        method: GatewayProfile(
+            profile.median_ms * args.latency_scale,
+            profile.p99_ms * args.latency_scale,
+            profile.decline_rate if args.decline_rate is None else args.decline_rate,
+            profile.error_rate if args.error_rate is None else args.error_rate,
+        )
+        for method, profile in DEFAULT_PROFILES.items()
+    }
+    load_test = LoadTest(mix, SimulatedGateway(profiles, args.seed), args.accounts, args.seed)
+
+    started = perf_counter()
+    if args.mode == "open":
+        load_test.run_open(args.rate, args.duration, args.concurrency)
+    else:
+        load_test.run_closed(args.concurrency, args.duration)
+    elapsed = perf_counter() - started
+
+    total = MethodStats()
+    for method, stats in load_test.stats.items():
+        total.latency.merge(stats.latency)
+        total.succeeded += stats.succeeded
+        total.declined += stats.declined
+        total.errors += stats.errors
+        sys.stdout.write(json.dumps(summarize(method, stats, elapsed, args)) + "\n")
+    sys.stdout.write(json.dumps(summarize("total", total, elapsed, args)) + "\n")
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
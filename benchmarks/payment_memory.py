@@ -0,0 +1,119 @@
+"""
+Payment memory benchmark.
+
+Measures the memory held per pending card transaction with tracemalloc in three layouts:
+    - dict_objects: a creator and a product per transaction that both keep the card details in their
+      __dict__, the layout payment_example.py used before the products got __slots__,
+    - slotted_objects: the current __slots__ CreditCardPaymentCreator and CreditCardPayment,
+    - payment_batch: a columnar PaymentBatch.
+
+The card number, CVV and expiry strings are created before the measurement starts and shared by every
+layout, so only the per-transaction overhead is counted. `--accounts` controls how many distinct cards
+the transactions are spread over. Every layout is written as one JSON line.
+
+    python -m benchmarks.payment_memory --transactions 200000 --accounts 50000
+"""
+# Import libraries
+from __future__ import annotations
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.creational.factory_method.payment_batch import PaymentBatch
+from src.creational.factory_method.payment_example import CreditCardPaymentCreator
+
+
+class DictCardPayment:
+    """Product with the pre-__slots__ layout"""
+    def __init__(self, card_number: str, cvv: str, expiry: str):
+        self.card_number = card_number
+        self.cvv = cvv
+        self.expiry = expiry
+
+
+class DictCardPaymentCreator:
+    """Creator with the pre-__slots__ layout, duplicating every field of its product"""
+    def __init__(self, card_number: str, cvv: str, expiry: str):
+        self.card_number = card_number
+        self.cvv = cvv
+        self.expiry = expiry
+
+    def create_payment_service(self) -> DictCardPayment:
+        return DictCardPayment(self.card_number, self.cvv, self.expiry)
+
+
+Card = Tuple[str, str, str]
+
+
+def dict_objects(cards: List[Card], amounts: List[float]) -> Any:
+    pending = []
+    for card, amount in zip(cards, amounts):
+        creator = DictCardPaymentCreator(*card)
+        pending.append((creator, creator.create_payment_service(), amount))
+    return pending
+
+
+def slotted_objects(cards: List[Card], amounts: List[float]) -> Any:
+    pending = []
+    for card, amount in zip(cards, amounts):
+        creator = CreditCardPaymentCreator(*card)
+        pending.append((creator, creator.create_payment_service(), amount))
+    return pending
+
+
+def payment_batch(cards: List[Card], amounts: List[float]) -> Any:
+    batch = PaymentBatch()
+    for card, amount in zip(cards, amounts):
+        batch.append(CreditCardPaymentCreator(*card), amount)
+    return batch
+
+
+LAYOUTS: Dict[str, Callable[[List[Card], List[float]], Any]] = {
+    "dict_objects": dict_objects,
+    "slotted_objects": slotted_objects,
+    "payment_batch": payment_batch,
+}
+
+
+def measure(layout: str, cards: List[Card], amounts: List[float]) -> Dict[str, Any]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        pending = LAYOUTS[layout](cards, amounts)
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del pending
+    return {
+        "layout": layout,
+        "transactions": len(cards),
+        "bytes": held,
+        "bytes_per_transaction": held / len(cards),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layouts", nargs="+", choices=sorted(LAYOUTS), default=list(LAYOUTS))
+    parser.add_argument("--transactions", type=int, default=200_000)
+    parser.add_argument("--accounts", type=int, default=50_000, help="Number of distinct cards")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    accounts = [(f"4{number:015d}", f"{number % 1000:03d}", "12/30") for number in range(args.accounts)]
+    cards = [accounts[number % len(accounts)] for number in range(args.transactions)]
+    amounts = [float(number % 500) for number in range(args.transactions)]
+    for layout in args.layouts:
+        sys.stdout.write(json.dumps(measure(layout, cards, amounts)) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
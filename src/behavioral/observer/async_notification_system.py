@@ -0,0 +1,134 @@
+"""
+Scenario: Asynchronous Notification System for Online Learning Platform
+
+The synchronous ConcreteNotificationManager calls every subscriber one after another, so a single slow
+subscriber holds up everybody behind it. Courses can have tens of thousands of students, therefore the
+asynchronous manager fans the notification out concurrently:
+    - Subscribers implement `async def update` and are awaited concurrently.
+    - Each subscriber gets its own timeout, a slow one is cancelled instead of blocking the rest.
+    - The number of subscribers running at the same time is bounded by `max_concurrency`.
+
+The latency of notify() is therefore driven by the slowest subscriber, not by the sum of all of them.
+"""
+# Import libraries
+from __future__ import annotations
+import asyncio
+from abc import ABC, abstractmethod
+from time import perf_counter
+from typing import Dict, Optional
+
+from src.behavioral.observer.notification_system import NotificationManager
+from src.common.metrics import DispatchMetrics
+from src.common.registry import SubscriberRegistry
+from src.common.tracing import PrintSink, tracer
+
+
+class AsyncSubscriber(ABC):
+    """Abstract Subscriber Interface for the asynchronous manager"""
+    @abstractmethod
+    async def update(self, subject: AsyncNotificationManager):
+        """Update state and notify"""
+        pass
+
+
+class AsyncNotificationManager(NotificationManager):
+    """Subject Interface. It manages asynchronous subscribers"""
+
+    @abstractmethod
+    async def notify(self) -> Dict[AsyncSubscriber, BaseException]:
+        """Notify all subscribers concurrently and return the ones that failed"""
+        pass
+
+
+class ConcreteAsyncNotificationManager(AsyncNotificationManager):
+    """
+    Concrete Subject. It awaits the subscribers concurrently.
+
+    A fixed number of workers pull subscribers from a shared iterator, so only `max_concurrency` updates
+    are in flight at any time and no task is created per subscriber.
+    """
+    def __init__(self, max_concurrency: int = 100, timeout: Optional[float] = None,
+                 weak_subscribers: bool = False, metrics: Optional[DispatchMetrics] = None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self._subscribers = SubscriberRegistry(weak=weak_subscribers)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.metrics = metrics
+
+    def attach(self, subscriber: AsyncSubscriber):
+        if tracer.enabled:
+            tracer.emit("Async Notification Manager: Attached a subscriber.")
+        self._subscribers.add(subscriber)
+
+    def detach(self, subscriber: AsyncSubscriber):
+        if tracer.enabled:
+            tracer.emit("Async Notification Manager: Detached a subscriber.")
+        self._subscribers.discard(subscriber)
+
+    async def notify(self) -> Dict[AsyncSubscriber, BaseException]:
+        if tracer.enabled:
+            tracer.emit("Async Notification Manager: Notifying observers...")
+        subscribers = iter(self._subscribers)
+        failures: Dict[AsyncSubscriber, BaseException] = {}
+        metrics = self.metrics if self.metrics is not None and self.metrics.enabled else None
+
+        async def worker():
+            # The workers share one iterator, so each subscriber is awaited exactly once.
+            for subscriber in subscribers:
+                started = perf_counter()
+                try:
+                    await asyncio.wait_for(subscriber.update(self), self.timeout)
+                except Exception as error:  # asyncio.TimeoutError included
+                    failures[subscriber] = error
+                    if metrics is not None:
+                        metrics.record(subscriber, perf_counter() - started, failed=True)
+                else:
+                    if metrics is not None:
+                        metrics.record(subscriber, perf_counter() - started)
+
+        workers = min(self.max_concurrency, len(self._subscribers))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        if failures and tracer.enabled:
+            tracer.emit(f"Async Notification Manager: {len(failures)} subscriber(s) failed or timed out.")
+        return failures
+
+
+class AsyncStudentSubscriber(AsyncSubscriber):
+    """Concrete Subscriber. It notifies students about new assignments"""
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def update(self, subject: AsyncNotificationManager):
+        await asyncio.sleep(self.delay)
+        if tracer.enabled:
+            tracer.emit("Message send to AsyncStudentSubscriber: {You have a new assignment!}")
+
+
+class AsyncInstructorSubscriber(AsyncSubscriber):
+    """Concrete Subscriber. It notifies instructors about new assignments"""
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def update(self, subject: AsyncNotificationManager):
+        await asyncio.sleep(self.delay)
+        if tracer.enabled:
+            tracer.emit("Message send to AsyncInstructorSubscriber: {A new assignment has been posted!}")
+
+
+if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
+
+    async def main():
+        notification_manager = ConcreteAsyncNotificationManager(max_concurrency=10, timeout=0.5)
+        for _ in range(3):
+            notification_manager.attach(AsyncStudentSubscriber(delay=0.2))
+        notification_manager.attach(AsyncInstructorSubscriber(delay=0.2))
+        notification_manager.attach(AsyncInstructorSubscriber(delay=5.0))  # Too slow, it is cancelled
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        failures = await notification_manager.notify()
+        print(f"Notified in {loop.time() - started:.2f}s, {len(failures)} subscriber(s) failed or timed out.")
+
+    asyncio.run(main())
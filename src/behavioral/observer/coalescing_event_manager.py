@@ -0,0 +1,126 @@
+"""
+Scenario: Coalescing Event Manager
+
+ConcreteEventManager.business_logic() notifies every subscriber on every state change, so a burst of 1,000
+changes means 1,000 full fan-outs while most of the intermediate states are already stale. The coalescing
+manager merges the changes that happen inside a window:
+    - Time window: the first change starts a timer, when it fires the subscribers are notified once.
+    - Count window: the subscribers are notified as soon as `max_changes` changes are pending.
+    - Without any window the changes are only delivered when flush() is called.
+
+Subscribers receive the latest state plus `subject.change_count`, the number of changes merged into the
+notification. Subscribers that need every single transition set `coalesce = False` and keep being notified
+synchronously on each change.
+"""
+# Import libraries
+from __future__ import annotations
+import threading
+from random import randrange
+from typing import Any, Optional
+
+from src.behavioral.observer.template import ConcreteEventManager, Subscriber
+from src.common.metrics import DispatchMetrics
+from src.common.registry import SubscriberRegistry
+from src.common.tracing import PrintSink, tracer
+
+
+class CoalescingEventManager(ConcreteEventManager):
+    """
+    Event Manager that merges bursts of state changes into a single notification.
+
+    With a time window the notification is delivered from a timer thread, all state access is guarded by a
+    re-entrant lock so subscribers may read the subject safely.
+    """
+    def __init__(self, window: Optional[float] = None, max_changes: Optional[int] = None,
+                 weak_subscribers: bool = False, metrics: Optional[DispatchMetrics] = None):
+        if window is not None and window <= 0:
+            raise ValueError("window must be a positive number of seconds")
+        if max_changes is not None and max_changes < 1:
+            raise ValueError("max_changes must be at least 1")
+        super().__init__(weak_subscribers, metrics)
+        self.window = window
+        self.max_changes = max_changes
+        self.change_count = 0
+        self._every_transition = SubscriberRegistry(weak=weak_subscribers)
+        self._pending = 0
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+
+    def attach(self, observer):
+        if getattr(observer, "coalesce", True):
+            super().attach(observer)
+        else:
+            if tracer.enabled:
+                tracer.emit("Event Manager: Attached a subscriber to every transition.")
+            self._every_transition.add(observer)
+
+    def detach(self, observer):
+        super().detach(observer)
+        self._every_transition.discard(observer)
+
+    def change_state(self, state: Any):
+        """Record a new state, subscribers that opted out of coalescing are notified immediately"""
+        with self._lock:
+            self._state = state
+            self.change_count = 1
+            self._dispatch(self._every_transition)
+
+            self._pending += 1
+            if self.max_changes is not None and self._pending >= self.max_changes:
+                self.flush()
+            elif self.window is not None and self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Deliver the pending changes now, if there are any"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            self.change_count = self._pending
+            self._pending = 0
+            self.notify()
+
+    def business_logic(self):
+        self.change_state(randrange(0, 10))
+
+
+class LatestStateObserver(Subscriber):
+    """Coalesced observer, it only cares about the latest state"""
+    def update(self, subject: CoalescingEventManager) -> None:
+        if tracer.enabled:
+            tracer.emit(f"LatestStateObserver: State is {subject._state} after {subject.change_count} change(s)")
+
+
+class AuditObserver(Subscriber):
+    """Observer that opted out of coalescing, it has to see every transition"""
+    coalesce = False
+
+    def __init__(self):
+        self.transitions = 0
+
+    def update(self, subject: CoalescingEventManager) -> None:
+        self.transitions += 1
+
+
+if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
+    event_manager = CoalescingEventManager(window=0.05, max_changes=250)
+    audit_observer = AuditObserver()
+    event_manager.attach(LatestStateObserver())
+    event_manager.attach(audit_observer)
+
+    # A burst of 1,000 changes results in 4 notifications for the coalesced observer.
+    for _ in range(1000):
+        event_manager.business_logic()
+
+    # A short burst below the count window is delivered once the time window has passed.
+    for _ in range(10):
+        event_manager.business_logic()
+    threading.Event().wait(0.1)
+
+    print(f"AuditObserver: Saw {audit_observer.transitions} transitions")
@@ -0,0 +1,52 @@
+"""
+Dispatch backends for the observer subjects.
+
+A subject hands every `update` call to a `concurrent.futures.Executor`:
+    - InlineExecutor: runs the call right away in the caller's thread, the classic observer behavior.
+    - ThreadPoolExecutor: for subscribers that block on I/O.
+    - ProcessPoolExecutor: for CPU-heavy subscribers that the GIL would otherwise serialize. The subscriber
+      and the subject are pickled, so both must be picklable.
+
+notify() returns a DispatchResult that collects the outcome of every subscriber.
+"""
+# Import libraries
+from __future__ import annotations
+from concurrent.futures import Executor, Future, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class InlineExecutor(Executor):
+    """Executor that runs each call synchronously in the calling thread"""
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+
+class DispatchResult:
+    """Handle on a notify() call. It gives access to the per-subscriber outcome once the calls finished"""
+    def __init__(self, calls: List[Tuple[Any, Future]]):
+        self._calls = calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every subscriber finished, return False if the timeout expired first"""
+        _, not_done = wait([future for _, future in self._calls], timeout=timeout)
+        return not not_done
+
+    def done(self) -> bool:
+        return all(future.done() for _, future in self._calls)
+
+    def failures(self, timeout: Optional[float] = None) -> Dict[Any, BaseException]:
+        """Wait for the subscribers and return the exception raised by each failed one"""
+        self.wait(timeout)
+        return {
+            subscriber: future.exception()
+            for subscriber, future in self._calls
+            if future.done() and not future.cancelled() and future.exception() is not None
+        }
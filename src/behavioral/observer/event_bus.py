@@ -0,0 +1,269 @@
+"""
+Scenario: Queued Event Bus with Backpressure
+
+Producers calling ConcreteEventManager.notify() wait for every subscriber, so a slow subscriber directly
+slows down whoever posts assignments. The queued event bus decouples both sides:
+    - Events are written into a bounded ring buffer, publish() never calls a subscriber.
+    - Every subscriber has its own cursor into the buffer, a lagging subscriber only falls behind itself.
+    - When the buffer is full the overflow policy decides what happens:
+        BLOCK: the producer waits until the slowest subscriber frees a slot.
+        DROP_OLDEST: the oldest event is overwritten, lagging cursors skip it.
+        DROP_NEWEST: the new event is rejected.
+        SAMPLE: one out of every `sample_every` overflowing events replaces the oldest one, the rest are dropped.
+    - stats() exposes the queue depth, the drops and the lag of every subscriber.
+
+Subscribers keep the Subscriber interface. They receive an EventView with the `_state` of the event and
+its `sequence` number instead of the live subject, since the subject may have moved on.
+"""
+# Import libraries
+from __future__ import annotations
+import threading
+from enum import Enum
+from random import randrange
+from typing import Any, Dict, List, Optional
+
+from src.behavioral.observer.template import EventManager, Subscriber
+from src.common.metrics import DispatchMetrics
+
+
+class OverflowPolicy(Enum):
+    """What publish() does when the ring buffer is full"""
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    SAMPLE = "sample"
+
+
+class EventView:
+    """Read-only view of a single event, passed to the subscribers instead of the subject"""
+    __slots__ = ("_state", "sequence")
+
+    def __init__(self, state: Any, sequence: int):
+        self._state = state
+        self.sequence = sequence
+
+    def __repr__(self) -> str:
+        return f"EventView(state={self._state!r}, sequence={self.sequence})"
+
+
+class _Cursor:
+    """Position of one subscriber in the ring buffer"""
+    __slots__ = ("subscriber", "position", "copied", "delivered", "missed", "thread")
+
+    def __init__(self, subscriber: Subscriber, position: int):
+        self.subscriber = subscriber
+        self.position = position
+        self.copied = position  # End of the batch consume() copied, those events are delivered even if evicted
+        self.delivered = 0
+        self.missed = 0
+        self.thread: Optional[threading.Thread] = None
+
+
+class QueuedEventManager(EventManager):
+    """
+    Event Manager that buffers events in a bounded ring buffer.
+
+    Events are delivered either synchronously with notify()/consume(), or by one consumer thread per
+    subscriber after start() was called.
+    """
+    def __init__(self, capacity: int = 1024, policy: OverflowPolicy = OverflowPolicy.BLOCK,
+                 sample_every: int = 10, metrics: Optional[DispatchMetrics] = None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+        self.capacity = capacity
+        self.policy = policy
+        self.sample_every = sample_every
+        self.metrics = metrics
+        self._buffer: List[Any] = [None] * capacity
+        self._head = 0  # Sequence number of the next event
+        self._tail = 0  # Oldest sequence number still held in the buffer
+        self._cursors: Dict[int, _Cursor] = {}
+        self._condition = threading.Condition()
+        self._running = False
+        self._state = None
+        self.published = 0
+        self.dropped = 0
+        self._overflows = 0
+
+    def attach(self, observer: Subscriber):
+        with self._condition:
+            if id(observer) in self._cursors:
+                return
+            cursor = self._cursors[id(observer)] = _Cursor(observer, self._head)
+            if self._running:
+                self._start_consumer(cursor)
+
+    def detach(self, observer: Subscriber):
+        with self._condition:
+            cursor = self._cursors.pop(id(observer), None)
+            # Wake the producer in case the detached subscriber was the one holding the buffer full.
+            self._condition.notify_all()
+        if cursor is not None and cursor.thread is not None and cursor.thread is not threading.current_thread():
+            cursor.thread.join()
+
+    def _reclaim(self):
+        """Move the tail up to the slowest cursor, freeing the slots every subscriber has consumed"""
+        self._tail = min((cursor.position for cursor in self._cursors.values()), default=self._head)
+
+    def _evict_oldest(self):
+        self._tail += 1
+        for cursor in self._cursors.values():
+            if cursor.position < self._tail:
+                cursor.missed += max(0, self._tail - max(cursor.position, cursor.copied))
+                cursor.position = self._tail
+
+    def publish(self, state: Any, timeout: Optional[float] = None) -> bool:
+        """Append an event to the buffer, return False if it was dropped or the timeout expired"""
+        with self._condition:
+            if self._head - self._tail >= self.capacity:
+                self._reclaim()
+            if self._head - self._tail >= self.capacity:
+                if self.policy is OverflowPolicy.BLOCK:
+                    def has_room():
+                        self._reclaim()
+                        return self._head - self._tail < self.capacity
+                    if not self._condition.wait_for(has_room, timeout):
+                        self.dropped += 1
+                        return False
+                elif self.policy is OverflowPolicy.DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                elif self.policy is OverflowPolicy.DROP_OLDEST:
+                    self.dropped += 1
+                    self._evict_oldest()
+                else:
+                    self._overflows += 1
+                    self.dropped += 1
+                    if self._overflows % self.sample_every:
+                        return False
+                    self._evict_oldest()
+
+            self._buffer[self._head % self.capacity] = state
+            self._head += 1
+            self._state = state
+            self.published += 1
+            self._condition.notify_all()
+            return True
+
+    def consume(self, observer: Subscriber, max_events: Optional[int] = None) -> int:
+        """
+        Deliver the pending events of one subscriber in the calling thread, return how many.
+        While the consumer threads are running they are the only ones that should call this.
+        """
+        with self._condition:
+            cursor = self._cursors.get(id(observer))
+            if cursor is None:
+                return 0
+            start = cursor.position
+            end = self._head if max_events is None else min(self._head, start + max_events)
+            events = [EventView(self._buffer[sequence % self.capacity], sequence) for sequence in range(start, end)]
+            cursor.copied = end
+
+        # The subscriber runs outside the lock, the copied events stay valid even if they get overwritten.
+        metrics = self.metrics
+        if metrics is None or not metrics.enabled:
+            for event in events:
+                observer.update(event)
+        else:
+            for event in events:
+                metrics.call(observer, observer.update, event)
+
+        with self._condition:
+            cursor.delivered += len(events)
+            cursor.position = max(cursor.position, end)
+            self._condition.notify_all()
+        return len(events)
+
+    def notify(self):
+        """Drain the buffer for every subscriber synchronously, the consumer threads do it when running"""
+        if self._running:
+            return
+        for cursor in list(self._cursors.values()):
+            self.consume(cursor.subscriber)
+
+    def business_logic(self):
+        self.publish(randrange(0, 10))
+
+    def _start_consumer(self, cursor: _Cursor):
+        def run():
+            while True:
+                with self._condition:
+                    self._condition.wait_for(
+                        lambda: not self._running or self._cursors.get(id(cursor.subscriber)) is not cursor
+                        or cursor.position < self._head
+                    )
+                    if self._cursors.get(id(cursor.subscriber)) is not cursor:
+                        return
+                    if not self._running and cursor.position >= self._head:
+                        return
+                self.consume(cursor.subscriber)
+
+        cursor.thread = threading.Thread(target=run, name=f"event-bus-{type(cursor.subscriber).__name__}", daemon=True)
+        cursor.thread.start()
+
+    def start(self):
+        """Start one consumer thread per subscriber"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            for cursor in self._cursors.values():
+                self._start_consumer(cursor)
+
+    def stop(self):
+        """Let the consumer threads drain the buffer and wait for them to exit"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+            threads = [cursor.thread for cursor in self._cursors.values() if cursor.thread is not None]
+        for thread in threads:
+            thread.join()
+        with self._condition:
+            for cursor in self._cursors.values():
+                cursor.thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the queue counters"""
+        with self._condition:
+            self._reclaim()
+            return {
+                "capacity": self.capacity,
+                "depth": self._head - self._tail,
+                "published": self.published,
+                "dropped": self.dropped,
+                "subscribers": {
+                    f"{type(cursor.subscriber).__name__}@{key:x}": {
+                        "lag": self._head - cursor.position,
+                        "delivered": cursor.delivered,
+                        "missed": cursor.missed,
+                    }
+                    for key, cursor in self._cursors.items()
+                },
+            }
+
+
+class FastObserver(Subscriber):
+    """Observer that keeps up with the producer"""
+    def update(self, subject: EventView) -> None:
+        pass
+
+
+class SlowObserver(Subscriber):
+    """Observer that falls behind the producer"""
+    def update(self, subject: EventView) -> None:
+        threading.Event().wait(0.001)
+
+
+if __name__ == "__main__":
+    event_bus = QueuedEventManager(capacity=64, policy=OverflowPolicy.DROP_OLDEST)
+    event_bus.attach(FastObserver())
+    event_bus.attach(SlowObserver())
+    event_bus.start()
+
+    for _ in range(2000):
+        event_bus.business_logic()
+
+    event_bus.stop()
+    print(event_bus.stats())
@@ -0,0 +1,345 @@
+"""
+Scenario: Durable Event Log with Replay
+
+A Subscriber attached after business_logic() already fired never learns about the earlier states, and a
+restarted notification worker has to recompute everything. The logged event manager writes every state
+change to an append-only, memory-mapped event log before notifying:
+    - Every event is identified by its byte offset in the log. Subscribers remember `subject.next_offset`
+      and pass it back to attach() after a restart to replay only what they missed.
+    - Records are read straight out of the memory map. With a StructCodec the payload is decoded from the
+      mapped memory without copying it.
+    - snapshot() stores the current state together with the offset it covers, compact() then drops every
+      record before that offset. Replaying from an older offset starts from the snapshot instead.
+
+File layout: a 32 byte header (magic, base offset, end offset) followed by records made of a 4 byte length,
+a 4 byte CRC32 and the payload. Offsets are logical, `base` is the offset of the first record still in the
+file, so compaction does not change the offsets subscribers already stored.
+"""
+# Import libraries
+from __future__ import annotations
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from random import randrange
+from typing import Any, Iterator, Optional, Tuple
+
+from src.behavioral.observer.event_bus import EventView
+from src.behavioral.observer.template import ConcreteEventManager, Subscriber
+from src.common.metrics import DispatchMetrics
+from src.common.tracing import PrintSink, tracer
+
+
+_HEADER = struct.Struct("<8sQQ8x")
+_RECORD = struct.Struct("<II")
+_MAGIC = b"EVLOG001"
+
+
+class EventCodec(ABC):
+    """Turns states into record payloads and back"""
+    @abstractmethod
+    def encode(self, state: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, payload: memoryview) -> Any:
+        pass
+
+
+class JsonCodec(EventCodec):
+    """Codec for any JSON serializable state, decoding copies the payload"""
+    def encode(self, state: Any) -> bytes:
+        return json.dumps(state, separators=(",", ":")).encode()
+
+    def decode(self, payload: memoryview) -> Any:
+        return json.loads(bytes(payload))
+
+
+class StructCodec(EventCodec):
+    """Codec for fixed-layout states, decoding reads the mapped memory directly"""
+    def __init__(self, layout: str = "<q"):
+        self._struct = struct.Struct(layout)
+
+    def encode(self, state: Any) -> bytes:
+        return self._struct.pack(*state) if isinstance(state, tuple) else self._struct.pack(state)
+
+    def decode(self, payload: memoryview) -> Any:
+        values = self._struct.unpack_from(payload)
+        return values[0] if len(values) == 1 else values
+
+
+class EventLog:
+    """
+    Append-only event log backed by a memory-mapped file that grows by doubling.
+
+    Memoryviews handed out by records() point into the map, release them before the next append() since
+    growing the file has to remap it.
+    """
+    def __init__(self, path: str, codec: Optional[EventCodec] = None, initial_size: int = 1 << 20):
+        self.path = path
+        self.codec = codec or JsonCodec()
+        self._lock = threading.RLock()
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._open(initial_size)
+
+    @property
+    def snapshot_path(self) -> str:
+        return self.path + ".snapshot"
+
+    def _open(self, initial_size: int = 1 << 20):
+        exists = os.path.exists(self.path) and os.path.getsize(self.path) >= _HEADER.size
+        self._file = open(self.path, "r+b" if exists else "w+b")
+        if not exists:
+            self._file.truncate(max(initial_size, _HEADER.size + _RECORD.size))
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if exists:
+            magic, self.base, self.end = _HEADER.unpack_from(self._map, 0)
+            if magic != _MAGIC:
+                raise ValueError(f"{self.path} is not an event log")
+            self._recover()
+        else:
+            self.base = self.end = 0
+            self._write_header()
+
+    def _write_header(self):
+        _HEADER.pack_into(self._map, 0, _MAGIC, self.base, self.end)
+
+    def _position(self, offset: int) -> int:
+        return _HEADER.size + offset - self.base
+
+    def _record_at(self, offset: int) -> Optional[Tuple[int, int]]:
+        """Return (payload position, length) of a valid record, None at the end of the written data"""
+        position = self._position(offset)
+        if position + _RECORD.size > len(self._map):
+            return None
+        length, checksum = _RECORD.unpack_from(self._map, position)
+        start = position + _RECORD.size
+        if length == 0 or start + length > len(self._map):
+            return None
+        with memoryview(self._map) as view, view[start:start + length] as payload:
+            if zlib.crc32(payload) != checksum:
+                return None
+        return start, length
+
+    def _recover(self):
+        """The header may lag behind the records after a crash, pick up every complete record past it"""
+        while (record := self._record_at(self.end)) is not None:
+            self.end += _RECORD.size + record[1]
+        self._write_header()
+
+    def _ensure_capacity(self, needed: int):
+        required = self._position(self.end) + needed
+        if required <= len(self._map):
+            return
+        size = len(self._map)
+        while size < required:
+            size *= 2
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def append(self, state: Any) -> int:
+        """Append a state and return its offset"""
+        payload = self.codec.encode(state)
+        if not payload:
+            raise ValueError("Empty payloads cannot be logged")
+        with self._lock:
+            self._ensure_capacity(_RECORD.size + len(payload))
+            offset = self.end
+            position = self._position(offset)
+            _RECORD.pack_into(self._map, position, len(payload), zlib.crc32(payload))
+            self._map[position + _RECORD.size:position + _RECORD.size + len(payload)] = payload
+            self.end = offset + _RECORD.size + len(payload)
+            self._write_header()
+            return offset
+
+    def records(self, from_offset: Optional[int] = None) -> Iterator[Tuple[int, int, memoryview]]:
+        """
+        Yield (offset, next offset, payload view) for every record from the given offset. The view is only
+        valid until the generator resumes, and appending while the generator is suspended is not allowed.
+        """
+        offset = self._check_offset(from_offset)
+        while offset < self.end:
+            start, length = self._require_record(offset)
+            next_offset = offset + _RECORD.size + length
+            with memoryview(self._map) as view, view[start:start + length] as payload:
+                yield offset, next_offset, payload
+            offset = next_offset
+
+    def read(self, from_offset: Optional[int] = None) -> Iterator[Tuple[int, int, Any]]:
+        """Yield (offset, next offset, state) for every record from the given offset, appending is allowed"""
+        offset = self._check_offset(from_offset)
+        while offset < self.end:
+            with self._lock:
+                start, length = self._require_record(offset)
+                with memoryview(self._map) as view, view[start:start + length] as payload:
+                    state = self.codec.decode(payload)
+            next_offset = offset + _RECORD.size + length
+            yield offset, next_offset, state
+            offset = next_offset
+
+    def _check_offset(self, from_offset: Optional[int]) -> int:
+        offset = self.base if from_offset is None else from_offset
+        if offset < self.base:
+            raise ValueError(f"Offset {offset} was compacted, the log starts at {self.base}")
+        return offset
+
+    def _require_record(self, offset: int) -> Tuple[int, int]:
+        record = self._record_at(offset)
+        if record is None:
+            raise ValueError(f"No record starts at offset {offset}")
+        return record
+
+    def flush(self):
+        """Force the mapped pages to disk"""
+        with self._lock:
+            self._map.flush()
+
+    def write_snapshot(self, state: Any, offset: int):
+        """Store a state that already includes every event before the offset"""
+        temporary = self.snapshot_path + ".tmp"
+        with open(temporary, "w") as snapshot_file:
+            json.dump({"offset": offset, "state": state}, snapshot_file)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary, self.snapshot_path)
+
+    def read_snapshot(self) -> Optional[Tuple[int, Any]]:
+        if not os.path.exists(self.snapshot_path):
+            return None
+        with open(self.snapshot_path) as snapshot_file:
+            snapshot = json.load(snapshot_file)
+        return snapshot["offset"], snapshot["state"]
+
+    def compact(self):
+        """Drop the records covered by the snapshot, the remaining offsets stay the same"""
+        snapshot = self.read_snapshot()
+        if snapshot is None or snapshot[0] <= self.base:
+            return
+        with self._lock:
+            new_base = snapshot[0]
+            start, stop = self._position(new_base), self._position(self.end)
+            temporary = self.path + ".compact"
+            with open(temporary, "w+b") as compacted:
+                compacted.write(_HEADER.pack(_MAGIC, new_base, self.end))
+                compacted.write(self._map[start:stop])
+                compacted.truncate(max(_HEADER.size + (stop - start) * 2, 1 << 16))
+                compacted.flush()
+                os.fsync(compacted.fileno())
+            self.close()
+            os.replace(temporary, self.path)
+            self._open()
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+                self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class LogEventView(EventView):
+    """Replayed event. `next_offset` is where a subscriber resumes after processing it"""
+    __slots__ = ("next_offset",)
+
+    def __init__(self, state: Any, sequence: Optional[int], next_offset: int):
+        super().__init__(state, sequence)
+        self.next_offset = next_offset
+
+
+class LoggedEventManager(ConcreteEventManager):
+    """
+    Event Manager that appends every state change to an EventLog before notifying.
+    `sequence` is the offset of the current state and `next_offset` the offset right after it.
+    """
+    def __init__(self, log: EventLog, weak_subscribers: bool = False, metrics: Optional[DispatchMetrics] = None):
+        super().__init__(weak_subscribers, metrics)
+        self.log = log
+        self.sequence: Optional[int] = None
+        self.next_offset = log.base
+
+        # Restore the latest state: start from the snapshot when it is still usable, then apply the records.
+        snapshot = log.read_snapshot()
+        start = None
+        if snapshot is not None and snapshot[0] >= log.base:
+            start = self.next_offset = snapshot[0]
+            self._state = snapshot[1]
+        for offset, next_offset, state in log.read(start):
+            self._state, self.sequence, self.next_offset = state, offset, next_offset
+
+    def attach(self, observer, from_offset: Optional[int] = None):
+        """Attach the observer, replaying the logged events from the offset first if one is given"""
+        if from_offset is not None:
+            self.replay(observer, from_offset)
+        super().attach(observer)
+
+    def replay(self, observer, from_offset: int = 0):
+        """Deliver the logged events from the offset, starting with the snapshot if it was compacted away"""
+        snapshot = self.log.read_snapshot()
+        if from_offset < self.log.base:
+            if snapshot is None or snapshot[0] != self.log.base:
+                raise ValueError(f"Offset {from_offset} was compacted and no snapshot covers it")
+            observer.update(LogEventView(snapshot[1], None, snapshot[0]))
+            from_offset = self.log.base
+        for offset, next_offset, state in self.log.read(from_offset):
+            observer.update(LogEventView(state, offset, next_offset))
+
+    def change_state(self, state: Any):
+        offset = self.log.append(state)
+        self._state, self.sequence, self.next_offset = state, offset, self.log.end
+        self.notify()
+
+    def business_logic(self):
+        if tracer.enabled:
+            tracer.emit("Event Manager: I'm changing my state.")
+        self.change_state(randrange(0, 10))
+
+    def snapshot(self):
+        """Snapshot the current state and drop the records it covers"""
+        self.log.flush()
+        self.log.write_snapshot(self._state, self.next_offset)
+        self.log.compact()
+
+
+class ResumableObserver(Subscriber):
+    """Observer that remembers where it stopped, so it can resume after a restart"""
+    def __init__(self, name: str):
+        self.name = name
+        self.next_offset = 0
+
+    def update(self, subject) -> None:
+        self.next_offset = subject.next_offset
+        if tracer.enabled:
+            tracer.emit(f"{self.name}: Saw state {subject._state} (resume at {self.next_offset})")
+
+
+if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
+    with tempfile.TemporaryDirectory() as directory:
+        log = EventLog(os.path.join(directory, "events.log"), codec=StructCodec("<q"))
+        event_manager = LoggedEventManager(log)
+        worker = ResumableObserver("Worker")
+        event_manager.attach(worker)
+        event_manager.business_logic()
+        event_manager.business_logic()
+
+        # The worker restarts, meanwhile two more events happen.
+        event_manager.detach(worker)
+        event_manager.business_logic()
+        event_manager.business_logic()
+        event_manager.attach(worker, from_offset=worker.next_offset)
+
+        # A late subscriber catches up from the snapshot after compaction.
+        event_manager.snapshot()
+        event_manager.business_logic()
+        event_manager.attach(ResumableObserver("Late subscriber"), from_offset=0)
+        log.close()
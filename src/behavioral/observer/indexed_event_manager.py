@@ -0,0 +1,193 @@
+"""
+Scenario: Predicate-Indexed Event Manager
+
+ConcreteObserverA and ConcreteObserverB read `subject._state` and ignore most of the events, but the
+ConcreteEventManager still calls every subscriber on every state change. Here subscribers declare their
+interest up front:
+    - RangeSubscriber: one or more closed state ranges `(low, high)`. They are kept in an interval tree,
+      so finding the interested subscribers costs O(log n + k) for k matches.
+    - PredicateSubscriber: an arbitrary `matches(state)` check. Predicates cannot be indexed, so they are
+      evaluated one by one. Prefer ranges whenever the interest can be expressed as one.
+    - Plain Subscriber: no declared interest, it receives every event like before.
+"""
+# Import libraries
+from __future__ import annotations
+import weakref
+from abc import abstractmethod
+from typing import Any, List, Optional, Sequence, Tuple
+
+from src.behavioral.observer.template import ConcreteEventManager, Subscriber
+from src.common.metrics import DispatchMetrics
+from src.common.tracing import PrintSink, tracer
+
+
+Interval = Tuple[Any, Any]
+
+
+class RangeSubscriber(Subscriber):
+    """Subscriber that is only interested in states inside the declared closed ranges"""
+    @abstractmethod
+    def interest(self) -> Sequence[Interval]:
+        """Return the (low, high) ranges this subscriber wants to be notified about"""
+        pass
+
+
+class PredicateSubscriber(Subscriber):
+    """Subscriber that is only interested in states accepted by its predicate"""
+    @abstractmethod
+    def matches(self, state: Any) -> bool:
+        """Return True if the subscriber wants to be notified about this state"""
+        pass
+
+
+class IntervalTree:
+    """
+    Static centered interval tree. Each node keeps the intervals overlapping its center twice, sorted by
+    low and by high, so a stabbing query only walks one root-to-leaf path plus the matching intervals.
+    Entries are (low, high, value) tuples.
+    """
+    def __init__(self, entries: List[Tuple[Any, Any, Any]]):
+        self._root = self._build(entries)
+
+    def _build(self, entries: List[Tuple[Any, Any, Any]]) -> Optional[tuple]:
+        if not entries:
+            return None
+        endpoints = sorted(point for low, high, _ in entries for point in (low, high))
+        center = endpoints[len(endpoints) // 2]
+        left, right, overlapping = [], [], []
+        for entry in entries:
+            if entry[1] < center:
+                left.append(entry)
+            elif entry[0] > center:
+                right.append(entry)
+            else:
+                overlapping.append(entry)
+        by_low = sorted(overlapping, key=lambda entry: entry[0])
+        by_high = sorted(overlapping, key=lambda entry: entry[1], reverse=True)
+        return center, by_low, by_high, self._build(left), self._build(right)
+
+    def stab(self, point: Any) -> List[Any]:
+        """Return the values of every interval that contains the point"""
+        found = []
+        node = self._root
+        while node is not None:
+            center, by_low, by_high, left, right = node
+            if point < center:
+                for low, _, value in by_low:
+                    if low > point:
+                        break
+                    found.append(value)
+                node = left
+            elif point > center:
+                for _, high, value in by_high:
+                    if high < point:
+                        break
+                    found.append(value)
+                node = right
+            else:
+                found.extend(value for _, _, value in by_low)
+                break
+        return found
+
+
+class IndexedEventManager(ConcreteEventManager):
+    """
+    Event Manager that only calls the subscribers interested in the current state.
+
+    The index is rebuilt lazily on the first notify() after an attach or detach, so heavy subscriber
+    churn between two events costs a single rebuild. Between rebuilds, notify() only touches the matching
+    ranges, the predicate subscribers and the subscribers without a declared interest.
+    With `weak_subscribers=True` the index only holds weak references too, collected subscribers are skipped.
+    """
+    def __init__(self, weak_subscribers: bool = False, metrics: Optional[DispatchMetrics] = None):
+        super().__init__(weak_subscribers, metrics)
+        self._tree: Optional[IntervalTree] = None
+        self._unindexed: List[int] = []
+        self._indexed: List[Any] = []  # Subscriber, or weak reference to it, at every attach position
+
+    def attach(self, observer):
+        super().attach(observer)
+        self._tree = None
+
+    def detach(self, observer):
+        super().detach(observer)
+        self._tree = None
+
+    def _build_index(self):
+        entries, unindexed, indexed = [], [], []
+        weak = self._subscribers.weak
+        for position, subscriber in enumerate(self._subscribers):
+            indexed.append(weakref.ref(subscriber) if weak else subscriber)
+            if isinstance(subscriber, RangeSubscriber):
+                for low, high in subscriber.interest():
+                    if low > high:
+                        raise ValueError(f"Invalid interest range ({low}, {high}) for {subscriber!r}")
+                    entries.append((low, high, position))
+            else:
+                unindexed.append(position)
+        self._tree = IntervalTree(entries)
+        self._unindexed = unindexed
+        self._indexed = indexed
+
+    def _subscriber_at(self, position: int) -> Optional[Subscriber]:
+        entry = self._indexed[position]
+        return entry() if self._subscribers.weak else entry
+
+    def matching_subscribers(self, state: Any) -> List[Subscriber]:
+        """Return the subscribers interested in the state, each one at most once, in attach order"""
+        if self._tree is None:
+            self._build_index()
+        # A subscriber with several overlapping ranges is stabbed more than once, the set removes duplicates.
+        matched = set(self._tree.stab(state))
+        for position in self._unindexed:
+            subscriber = self._subscriber_at(position)
+            if not isinstance(subscriber, PredicateSubscriber) or subscriber.matches(state):
+                matched.add(position)
+        subscribers = [self._subscriber_at(position) for position in sorted(matched)]
+        return [subscriber for subscriber in subscribers if subscriber is not None]
+
+    def notify(self):
+        if tracer.enabled:
+            tracer.emit("Event Manager: Notifying interested observers...")
+        self._dispatch(self.matching_subscribers(self._state))
+
+
+class RangeObserverA(RangeSubscriber):
+    """ConcreteObserverA expressed as a range, it only reacts to states below 3"""
+    def interest(self) -> Sequence[Interval]:
+        return [(float("-inf"), 2)]
+
+    def update(self, subject) -> None:
+        if tracer.enabled:
+            tracer.emit("RangeObserverA: Reacted to the event")
+
+
+class RangeObserverB(RangeSubscriber):
+    """ConcreteObserverB expressed as ranges, it reacts to 0 and to states from 2 upward"""
+    def interest(self) -> Sequence[Interval]:
+        return [(0, 0), (2, float("inf"))]
+
+    def update(self, subject) -> None:
+        if tracer.enabled:
+            tracer.emit("RangeObserverB: Reacted to the event")
+
+
+class EvenStateObserver(PredicateSubscriber):
+    """Predicate based observer, it only reacts to even states"""
+    def matches(self, state: Any) -> bool:
+        return state % 2 == 0
+
+    def update(self, subject) -> None:
+        if tracer.enabled:
+            tracer.emit("EvenStateObserver: Reacted to the event")
+
+
+if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
+    event_manager = IndexedEventManager()
+    event_manager.attach(RangeObserverA())
+    event_manager.attach(RangeObserverB())
+    event_manager.attach(EvenStateObserver())
+
+    for _ in range(3):
+        event_manager.business_logic()
@@ -14,9 +14,13 @@ When a new course assignment is posted, several types of notifications may go ou
 # Import libraries
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import List
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional
 
-from src.behavioral.observer.template import Subscriber
+from src.behavioral.observer.dispatch import DispatchResult, InlineExecutor
+from src.common.metrics import DispatchMetrics, timed_call
+from src.common.registry import SubscriberRegistry
+from src.common.tracing import PrintSink, tracer
 
 
 
@@ -40,23 +44,56 @@ class NotificationManager(ABC):
 
 
 class ConcreteNotificationManager(NotificationManager):
-    """Concrete Subject. It manages subscribers"""
-    def __init__(self):
-        self._subscribers: List[Subscriber] = []
+    """
+    Concrete Subject. It manages subscribers, optionally through weak references.
+
+    The executor decides how the update calls run: inline by default, or on a thread/process pool. A process
+    pool receives a pickled copy of the manager without its subscribers, executor and metrics.
+    """
+    def __init__(self, weak_subscribers: bool = False, executor: Optional[Executor] = None,
+                 metrics: Optional[DispatchMetrics] = None):
+        self._subscribers = SubscriberRegistry(weak=weak_subscribers)
+        self._executor = executor or InlineExecutor()
+        self.metrics = metrics
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_subscribers", None)
+        state.pop("_executor", None)
+        state.pop("metrics", None)
+        return state
 
     def attach(self, subscriber: Subscriber):
-        print("Notification Manager: Attached a subscriber.")
-        self._subscribers.append(subscriber)
+        if tracer.enabled:
+            tracer.emit("Notification Manager: Attached a subscriber.")
+        self._subscribers.add(subscriber)
 
     def detach(self, subscriber: Subscriber):
-        print("Notification Manager: Detached a subscriber.")
-        if subscriber in self._subscribers:
-            self._subscribers.remove(subscriber)
-
-    def notify(self):
-        print("Notification Manager: Notifying observers...")
+        if tracer.enabled:
+            tracer.emit("Notification Manager: Detached a subscriber.")
+        self._subscribers.discard(subscriber)
+
+    def notify(self) -> DispatchResult:
+        if tracer.enabled:
+            tracer.emit("Notification Manager: Notifying observers...")
+        submit = self._executor.submit
+        metrics = self.metrics
+        if metrics is None or not metrics.enabled:
+            return DispatchResult([(subscriber, submit(subscriber.update, self)) for subscriber in self._subscribers])
+
+        # The call is timed where it runs, the result is recorded once the future completes.
+        calls = []
         for subscriber in self._subscribers:
-            subscriber.update(self)
+            future = submit(timed_call, subscriber.update, self)
+            future.add_done_callback(
+                lambda done, subscriber=subscriber: metrics.record(
+                    subscriber,
+                    None if done.cancelled() or done.exception() else done.result(),
+                    failed=done.cancelled() or done.exception() is not None,
+                )
+            )
+            calls.append((subscriber, future))
+        return DispatchResult(calls)
 
 
 class Subscriber(ABC):
@@ -70,17 +107,27 @@ class Subscriber(ABC):
 class StudentSubscriber(Subscriber):
     """Concrete Subscriber. It notifies students about new assignments"""
     def update(self, subject: NotificationManager):
-        print("Message send to StudentSubscriber: {You have a new assignment!}")
+        if tracer.enabled:
+            tracer.emit("Message send to StudentSubscriber: {You have a new assignment!}")
 
 
 class InstructorSubscriber(Subscriber):
     """Concrete Subscriber. It notifies instructors about new assignments"""
     def update(self, subject: NotificationManager):
-        print("Message send to InstructorSubscriber: {A new assignment has been posted!}")
+        if tracer.enabled:
+            tracer.emit("Message send to InstructorSubscriber: {A new assignment has been posted!}")
 
 
 if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
     notification_manager = ConcreteNotificationManager()
     notification_manager.attach(StudentSubscriber())
     notification_manager.attach(InstructorSubscriber())
-    notification_manager.notify()
\ No newline at end of file
+    notification_manager.notify()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        threaded_manager = ConcreteNotificationManager(executor=executor)
+        threaded_manager.attach(StudentSubscriber())
+        threaded_manager.attach(InstructorSubscriber())
+        result = threaded_manager.notify()
+        print(f"Notification Manager: {len(result.failures())} of {len(result)} subscribers failed.")
@@ -1,6 +1,12 @@
 # Import libraries
+from __future__ import annotations
 from abc import ABC, abstractmethod
 from random import randrange
+from typing import Iterable, Optional
+
+from src.common.metrics import DispatchMetrics
+from src.common.registry import SubscriberRegistry
+from src.common.tracing import PrintSink, tracer
 
 
 class EventManager(ABC):
@@ -27,29 +33,44 @@ class EventManager(ABC):
 class ConcreteEventManager(EventManager):
     """
     The EventManager owns some important state and notifies observers when the state changes.
+    With `weak_subscribers=True` it only keeps weak references, so forgotten subscribers are dropped.
+    Passing DispatchMetrics records the calls, errors and latency of every subscriber.
     """
-    def __init__(self):
-        self._subscribers = []
+    def __init__(self, weak_subscribers: bool = False, metrics: Optional[DispatchMetrics] = None):
+        self._subscribers = SubscriberRegistry(weak=weak_subscribers)
         self._state = None
+        self.metrics = metrics
 
     def attach(self, observer):
-        print("Event Manager: Attached a subscriber.")
-        self._subscribers.append(observer)
+        if tracer.enabled:
+            tracer.emit("Event Manager: Attached a subscriber.")
+        self._subscribers.add(observer)
 
     def detach(self, observer):
-        print("Event Manager: Detached a subscriber.")
-        if observer in self._subscribers:
-            self._subscribers.remove(observer)
+        if tracer.enabled:
+            tracer.emit("Event Manager: Detached a subscriber.")
+        self._subscribers.discard(observer)
 
     def notify(self):
-        print("Event Manager: Notifying observers...")
-        for subscriber in self._subscribers:
-            subscriber.update(self)
+        if tracer.enabled:
+            tracer.emit("Event Manager: Notifying observers...")
+        self._dispatch(self._subscribers)
+
+    def _dispatch(self, subscribers: Iterable[Subscriber]):
+        metrics = self.metrics
+        if metrics is None or not metrics.enabled:
+            for subscriber in subscribers:
+                subscriber.update(self)
+        else:
+            for subscriber in subscribers:
+                metrics.call(subscriber, subscriber.update, self)
 
     def business_logic(self):
-        print("\nEvent Manager: I'm changing my state.")
+        if tracer.enabled:
+            tracer.emit("\nEvent Manager: I'm changing my state.")
         self._state = randrange(0, 10)
-        print(f"Subject: My state has just changed to: {self._state}")
+        if tracer.enabled:
+            tracer.emit(f"Subject: My state has just changed to: {self._state}")
         self.notify()
 
 
@@ -67,18 +88,21 @@ class Subscriber(ABC):
 class ConcreteObserverA(Subscriber):
     def update(self, subject: EventManager) -> None:
         if subject._state < 3:
-            print("ConcreteObserverA: Reacted to the event")
+            if tracer.enabled:
+                tracer.emit("ConcreteObserverA: Reacted to the event")
 
 
 class ConcreteObserverB(Subscriber):
     def update(self, subject: EventManager) -> None:
         if subject._state == 0 or subject._state >= 2:
-            print("ConcreteObserverB: Reacted to the event")
+            if tracer.enabled:
+                tracer.emit("ConcreteObserverB: Reacted to the event")
 
 
 
 if __name__ == "__main__":
     # The client code.
+    tracer.set_sink(PrintSink())
 
     event_manager = ConcreteEventManager()
 
@@ -0,0 +1,167 @@
+# Import libraries
+from __future__ import annotations
+import json
+import math
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, IO, List, Optional
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram. Every power of two is split into `sub_buckets` linear buckets, so the
+    percentiles are estimated within ~1/sub_buckets of the real value while memory stays bounded by the
+    range of the recorded values, not their number.
+    """
+    def __init__(self, sub_buckets: int = 32):
+        self.sub_buckets = sub_buckets
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= 0:
+            return -(1 << 30)
+        mantissa, exponent = math.frexp(value)
+        return exponent * self.sub_buckets + int((mantissa - 0.5) * 2 * self.sub_buckets)
+
+    def _value(self, index: int) -> float:
+        if index == -(1 << 30):
+            return 0.0
+        exponent, sub_bucket = divmod(index, self.sub_buckets)
+        return math.ldexp(0.5 + (sub_bucket + 0.5) / (2 * self.sub_buckets), exponent)
+
+    def record(self, value: float):
+        index = self._index(value)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: LatencyHistogram):
+        if other.sub_buckets != self.sub_buckets:
+            raise ValueError("Cannot merge histograms with a different resolution")
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentiles(self, *quantiles: float) -> List[float]:
+        """Estimated value for each quantile in [0, 1], clamped to the recorded min and max"""
+        if not self.count:
+            return [0.0 for _ in quantiles]
+        indexes = sorted(self._counts)
+        results = []
+        for quantile in quantiles:
+            rank = max(1, math.ceil(quantile * self.count))
+            seen = 0
+            for index in indexes:
+                seen += self._counts[index]
+                if seen >= rank:
+                    results.append(min(max(self._value(index), self.min), self.max))
+                    break
+        return results
+
+    def percentile(self, quantile: float) -> float:
+        return self.percentiles(quantile)[0]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class SubscriberStats:
+    """Calls, errors and latency of a single subscriber"""
+    __slots__ = ("label", "calls", "errors", "latency")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.calls = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+
+def timed_call(function: Callable, *args) -> float:
+    """Run the function and return how long it took. Module level so process pools can pickle it"""
+    started = perf_counter()
+    function(*args)
+    return perf_counter() - started
+
+
+class DispatchMetrics:
+    """
+    Per-subscriber instrumentation for the observer subjects.
+
+    Subjects only look at it once per notify(): when it is missing or `enabled` is False they run their
+    plain loop, so switching the metrics off costs a single attribute check per notification.
+    """
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._stats: Dict[int, SubscriberStats] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def label(subscriber: Any) -> str:
+        return f"{type(subscriber).__name__}@{id(subscriber):x}"
+
+    def record(self, subscriber: Any, seconds: Optional[float], failed: bool = False):
+        """Record one update call, `seconds` may be None when a failed call could not be timed"""
+        with self._lock:
+            stats = self._stats.get(id(subscriber))
+            if stats is None:
+                stats = self._stats[id(subscriber)] = SubscriberStats(self.label(subscriber))
+            stats.calls += 1
+            if failed:
+                stats.errors += 1
+            if seconds is not None:
+                stats.latency.record(seconds)
+
+    def call(self, subscriber: Any, function: Callable, *args) -> Any:
+        """Run an update call in the current thread and record it"""
+        started = perf_counter()
+        try:
+            result = function(*args)
+        except BaseException:
+            self.record(subscriber, perf_counter() - started, failed=True)
+            raise
+        self.record(subscriber, perf_counter() - started)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Per-subscriber counters, the subscribers that took the most total time come first"""
+        # record() updates the histograms under the lock, read them under it too so no row is torn.
+        rows = []
+        with self._lock:
+            for entry in self._stats.values():
+                p50, p95, p99 = entry.latency.percentiles(0.50, 0.95, 0.99)
+                rows.append({
+                    "subscriber": entry.label,
+                    "calls": entry.calls,
+                    "errors": entry.errors,
+                    "total_seconds": entry.latency.total,
+                    "mean_seconds": entry.latency.mean,
+                    "p50_seconds": p50,
+                    "p95_seconds": p95,
+                    "p99_seconds": p99,
+                    "max_seconds": entry.latency.max,
+                })
+        rows.sort(key=lambda row: row["total_seconds"], reverse=True)
+        return rows
+
+    def export(self, stream: Optional[IO[str]] = None) -> str:
+        """Serialize the snapshot as JSON, and write it to the stream if one is given"""
+        payload = json.dumps(self.snapshot(), indent=2)
+        if stream is not None:
+            stream.write(payload)
+        return payload
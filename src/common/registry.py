@@ -0,0 +1,79 @@
+# Import libraries
+from __future__ import annotations
+import weakref
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class SubscriberRegistry:
+    """
+    Insertion-ordered set of subscribers used by the observer subjects.
+
+    Subscribers are stored in a dict keyed by their identity, so attach, detach and membership checks are
+    O(1) instead of the O(n) scans of a plain list. Attaching the same subscriber twice is a no-op.
+
+    With `weak=True` only weak references are kept and a subscriber that is garbage collected disappears
+    from the registry on its own, so subscribers that are never detached do not leak.
+
+    Iterating returns a snapshot taken at the start of the iteration, therefore subscribers may attach or
+    detach while a notify() is running. The snapshot is cached until the next change, so notifying
+    repeatedly without churn does not copy anything.
+    """
+    def __init__(self, weak: bool = False):
+        self.weak = weak
+        self._entries: Dict[int, Any] = {}
+        self._snapshot: Optional[Tuple[Any, ...]] = None
+
+    def add(self, subscriber: Any) -> bool:
+        """Add the subscriber, return False if it was already registered"""
+        key = id(subscriber)
+        if key in self._entries:
+            return False
+        if self.weak:
+            self._entries[key] = weakref.ref(subscriber, self._make_callback(key))
+        else:
+            self._entries[key] = subscriber
+        self._snapshot = None
+        return True
+
+    def discard(self, subscriber: Any) -> bool:
+        """Remove the subscriber, return False if it was not registered"""
+        if self._entries.pop(id(subscriber), None) is None:
+            return False
+        self._snapshot = None
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self._snapshot = None
+
+    def _make_callback(self, key: int):
+        registry = weakref.ref(self)
+
+        def remove(reference: weakref.ref):
+            # Only drop the entry if it still belongs to the dead object and was not replaced meanwhile.
+            owner = registry()
+            if owner is not None and owner._entries.get(key) is reference:
+                del owner._entries[key]
+                owner._snapshot = None
+
+        return remove
+
+    def __contains__(self, subscriber: Any) -> bool:
+        entry = self._entries.get(id(subscriber))
+        if entry is None:
+            return False
+        return (entry() if self.weak else entry) is subscriber
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Any]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._snapshot = tuple(self._entries.values())
+        if not self.weak:
+            return iter(snapshot)
+        return (subscriber for subscriber in (reference() for reference in snapshot) if subscriber is not None)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(weak={self.weak}, size={len(self)})"
@@ -0,0 +1,167 @@
+"""
+Tracing hooks shared by the examples.
+
+The hot-path methods (attach/detach/notify, send, process_payment, render, launch, ...) used to print
+a line on every call. They now emit to the module level `tracer` instead:
+
+    if tracer.enabled:
+        tracer.emit(f"Sending email: {message}")
+
+By default the sink is a NullSink and `enabled` is False, so a call costs one attribute check and the
+message is never even formatted. The sinks below are opt-in:
+    - PrintSink: writes every message to stdout, the original behavior. The `__main__` demos use it.
+    - BufferedSink: collects messages and writes them in chunks.
+    - SampledSink: forwards one out of every N messages to another sink.
+    - AsyncSink: hands messages to a background thread that forwards them to another sink.
+
+Only the library code goes through the tracer. The `__main__` demos print their own results directly,
+so they show up whatever sink is installed.
+"""
+# Import libraries
+from __future__ import annotations
+import itertools
+import queue
+import sys
+import threading
+from abc import ABC, abstractmethod
+from typing import IO, List, Optional
+
+
+class TraceSink(ABC):
+    """Destination of the trace messages"""
+    @abstractmethod
+    def emit(self, message: str):
+        """Handle a single message"""
+        pass
+
+    def flush(self):
+        """Push out any buffered message"""
+        pass
+
+    def close(self):
+        """Flush and release the resources held by the sink"""
+        self.flush()
+
+
+class NullSink(TraceSink):
+    """Sink that drops everything, installed by default"""
+    def emit(self, message: str):
+        pass
+
+
+class PrintSink(TraceSink):
+    """Sink that prints every message, like the examples originally did"""
+    def __init__(self, stream: Optional[IO[str]] = None):
+        self.stream = stream
+
+    def emit(self, message: str):
+        print(message, file=self.stream or sys.stdout)
+
+
+class BufferedSink(TraceSink):
+    """Sink that writes the messages to a stream in chunks of `capacity` lines"""
+    def __init__(self, stream: Optional[IO[str]] = None, capacity: int = 1024):
+        self.stream = stream
+        self.capacity = capacity
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+
+    def emit(self, message: str):
+        with self._lock:
+            self._buffer.append(message)
+            if len(self._buffer) < self.capacity:
+                return
+            lines, self._buffer = self._buffer, []
+        self._write(lines)
+
+    def flush(self):
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if lines:
+            self._write(lines)
+
+    def _write(self, lines: List[str]):
+        stream = self.stream or sys.stdout
+        stream.write("\n".join(lines) + "\n")
+        stream.flush()
+
+
+class SampledSink(TraceSink):
+    """Sink that forwards only one out of every `every` messages"""
+    def __init__(self, sink: TraceSink, every: int = 100):
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.sink = sink
+        self.every = every
+        self._counter = itertools.count()
+
+    def emit(self, message: str):
+        if next(self._counter) % self.every == 0:
+            self.sink.emit(message)
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        self.sink.close()
+
+
+class AsyncSink(TraceSink):
+    """Sink that forwards the messages to another sink from a background thread"""
+    _STOP = object()
+
+    def __init__(self, sink: TraceSink):
+        self.sink = sink
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-sink", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            message = self._queue.get()
+            if message is self._STOP:
+                return
+            if isinstance(message, threading.Event):
+                # Flush request: everything queued before it was forwarded.
+                self.sink.flush()
+                message.set()
+                continue
+            self.sink.emit(message)
+
+    def emit(self, message: str):
+        self._queue.put(message)
+
+    def flush(self):
+        """Wait until the messages emitted so far were forwarded, then flush the wrapped sink"""
+        if not self._thread.is_alive():
+            self.sink.flush()
+            return
+        forwarded = threading.Event()
+        self._queue.put(forwarded)
+        forwarded.wait()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        self.sink.close()
+
+
+class Tracer:
+    """Holds the active sink. `enabled` is a plain attribute so the call sites can check it cheaply"""
+    def __init__(self):
+        self.sink: TraceSink = NullSink()
+        self.enabled = False
+
+    def set_sink(self, sink: Optional[TraceSink]) -> TraceSink:
+        """Install a sink (None restores the NullSink) and return the previous one"""
+        previous = self.sink
+        self.sink = sink if sink is not None else NullSink()
+        self.enabled = not isinstance(self.sink, NullSink)
+        return previous
+
+    def emit(self, message: str):
+        self.sink.emit(message)
+
+
+tracer = Tracer()
@@ -15,6 +15,9 @@ Each cloud provider needs these services:
 """
 # Import libraries
 from abc import ABC, abstractmethod
+from typing import Sequence
+
+from src.common.tracing import PrintSink, tracer
 
 
 
@@ -26,6 +29,12 @@ class ComputingInstance(ABC):
         """Lunches a computing instance to cloud provider"""
         pass
 
+    @classmethod
+    def launch_many(cls, instances: Sequence["ComputingInstance"]):
+        """Launches several instances, providers with a bulk API override it to make a single call"""
+        for instance in instances:
+            instance.launch()
+
 class StorageService(ABC):
     """Abstract storage service interface which acts as a blueprint for concrete products"""
     @abstractmethod
@@ -33,6 +42,12 @@ class StorageService(ABC):
         """Initializes a new bucket in the cloud provider"""
         pass
 
+    @classmethod
+    def create_buckets(cls, services: Sequence["StorageService"]):
+        """Creates the bucket of every service, one call each unless the provider overrides it"""
+        for service in services:
+            service.create_bucket()
+
 class DatabaseService(ABC):
     """Abstract database service interface which acts as a blueprint for concrete products"""
     @abstractmethod
@@ -40,54 +55,81 @@ class DatabaseService(ABC):
         """Makes the database ready to use in the cloud provider"""
         pass
 
+    @classmethod
+    def provision_many(cls, services: Sequence["DatabaseService"]):
+        """Provisions every database, one call each unless the provider overrides it"""
+        for service in services:
+            service.provision()
+
 
 ########################## Concrete Products ##########################
 class AWSComputingInstance(ComputingInstance):
     """Concrete computing instance for AWS"""
     def launch(self):
-        print("Launching AWS EC2 instance...")
+        if tracer.enabled:
+            tracer.emit("Launching AWS EC2 instance...")
+
+    @classmethod
+    def launch_many(cls, instances: Sequence[ComputingInstance]):
+        # A single RunInstances call launches the whole batch.
+        if tracer.enabled:
+            tracer.emit(f"Launching {len(instances)} AWS EC2 instances...")
 
 class AWSStorageService(StorageService):
     """Concrete storage service for AWS"""
     def create_bucket(self):
-        print("Creating AWS S3 bucket...")
+        if tracer.enabled:
+            tracer.emit("Creating AWS S3 bucket...")
 
 class AWSDatabaseService(DatabaseService):
     """Concrete database service for AWS"""
     def provision(self):
-        print("Provisioning AWS RDS...")
+        if tracer.enabled:
+            tracer.emit("Provisioning AWS RDS...")
 
 
 class AzureComputingInstance(ComputingInstance):
     """Concrete computing instance for Azure"""
     def launch(self):
-        print("Launching Azure VM...")
+        if tracer.enabled:
+            tracer.emit("Launching Azure VM...")
 
 class AzureStorageService(StorageService):
     """Concrete storage service for Azure"""
     def create_bucket(self):
-        print("Creating Azure Blob Storage...")
+        if tracer.enabled:
+            tracer.emit("Creating Azure Blob Storage...")
 
 class AzureDatabaseService(DatabaseService):
     """Concrete database service for Azure"""
     def provision(self):
-        print("Provisioning Azure SQL Database...")
+        if tracer.enabled:
+            tracer.emit("Provisioning Azure SQL Database...")
 
 
 class GCPComputingInstance(ComputingInstance):
     """Concrete computing instance for GCP"""
     def launch(self):
-        print("Launching GCP Compute Engine...")
+        if tracer.enabled:
+            tracer.emit("Launching GCP Compute Engine...")
+
+    @classmethod
+    def launch_many(cls, instances: Sequence[ComputingInstance]):
+        # A single bulkInsert call launches the whole batch.
+        if tracer.enabled:
+            tracer.emit(f"Launching {len(instances)} GCP Compute Engine instances...")
 
 class GCPStorageService(StorageService):
     """Concrete storage service for GCP"""
     def create_bucket(self):
-        print("Creating GCP Cloud Storage...")
+        if tracer.enabled:
+            tracer.emit("Creating GCP Cloud Storage...")
 
 class GCPDatabaseService(DatabaseService):
     """Concrete database service for GCP"""
     def provision(self):
-        print("Provisioning GCP Spanner...")
+        if tracer.enabled:
+            tracer.emit("Provisioning GCP Spanner...")
 
 
 ########################## Abstract Factory ##########################
@@ -162,5 +204,6 @@ class Client:
 
 
 if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
     client = Client(provider=AWSCloudServiceCreator())
     client.deploy_application()
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""
+Dependency-aware deployment of a cloud service family.
+
+Client.deploy_application() launches the compute instance, creates the bucket and provisions the database
+one after another, so a deployment takes the sum of every step even though the steps do not depend on each
+other. DeploymentEngine runs a DeploymentPlan instead:
+    1. The plan is a dependency graph of named steps. DeploymentPlan.from_provider() adds the products of a
+       CloudServiceCreator as the "compute", "storage" and "database" steps, further steps (migrations,
+       releases, ...) can be added with their dependencies.
+    2. Steps start on a thread pool as soon as all of their dependencies finished, so a deployment takes as
+       long as its longest chain of dependent steps. A cycle or an unknown dependency is reported before
+       anything runs.
+    3. When a step raises, the steps depending on it are skipped, the independent ones still run.
+    4. The DeploymentReport holds the start and finish of every step and the critical path: the chain of
+       dependent steps that determined the total duration.
+"""
+# Import libraries
+from __future__ import annotations
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from src.common.tracing import PrintSink, tracer
+from src.creational.abstract_factory.cloud_provider_example import AWSCloudServiceCreator, CloudServiceCreator
+
+
+class DeploymentCycleError(ValueError):
+    """The plan's dependencies form a cycle, the message lists it"""
+
+
+class DeploymentStep(NamedTuple):
+    name: str
+    action: Callable[[], object]
+    depends_on: Tuple[str, ...]
+
+
+class StepTiming(NamedTuple):
+    """Start and finish of a step, in seconds since the deployment started"""
+    started: float
+    finished: float
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+class DeploymentReport(NamedTuple):
+    elapsed: float
+    timings: Dict[str, StepTiming]
+    critical_path: List[str]
+    failed: Dict[str, BaseException]
+    skipped: List[str]
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.failed and not self.skipped
+
+
+class DeploymentPlan:
+    """Dependency graph of the steps of a deployment"""
+    def __init__(self):
+        self.steps: Dict[str, DeploymentStep] = {}
+
+    def add(self, name: str, action: Callable[[], object], depends_on: Iterable[str] = ()) -> DeploymentPlan:
+        if name in self.steps:
+            raise ValueError(f"The plan already has a step named {name!r}")
+        self.steps[name] = DeploymentStep(name, action, tuple(depends_on))
+        return self
+
+    @classmethod
+    def from_provider(cls, provider: CloudServiceCreator,
+                      dependencies: Optional[Mapping[str, Iterable[str]]] = None) -> DeploymentPlan:
+        """
+        A plan with the compute, storage and database products of the provider. They are independent
+        unless `dependencies` says otherwise, e.g. {"compute": ["database"]}.
+        """
+        dependencies = dependencies or {}
+        plan = cls()
+        plan.add("compute", provider.create_compute_instance().launch, dependencies.get("compute", ()))
+        plan.add("storage", provider.create_storage_service().create_bucket, dependencies.get("storage", ()))
+        plan.add("database", provider.create_database_service().provision, dependencies.get("database", ()))
+        return plan
+
+    def topological_order(self) -> List[str]:
+        """The step names, every step after its dependencies. Raises on unknown dependencies and cycles"""
+        for step in self.steps.values():
+            for dependency in step.depends_on:
+                if dependency not in self.steps:
+                    raise ValueError(f"Step {step.name!r} depends on the unknown step {dependency!r}")
+
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1: being visited, 2: done
+        for root in self.steps:
+            if root in state:
+                continue
+            stack = [(root, iter(self.steps[root].depends_on))]
+            state[root] = 1
+            while stack:
+                name, dependencies = stack[-1]
+                for dependency in dependencies:
+                    if state.get(dependency) == 1:
+                        cycle = [entry for entry, _ in stack]
+                        cycle = cycle[cycle.index(dependency):] + [dependency]
+                        raise DeploymentCycleError(
+                            f"Dependency cycle, each step depends on the next: {' -> '.join(cycle)}")
+                    if dependency not in state:
+                        state[dependency] = 1
+                        stack.append((dependency, iter(self.steps[dependency].depends_on)))
+                        break
+                else:
+                    stack.pop()
+                    state[name] = 2
+                    order.append(name)
+        return order
+
+
+class DeploymentEngine:
+    """Runs the steps of a DeploymentPlan concurrently, in dependency order"""
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+
+    def deploy(self, plan: DeploymentPlan) -> DeploymentReport:
+        order = plan.topological_order()
+        dependents: Dict[str, List[str]] = {name: [] for name in order}
+        waiting_on = {name: len(plan.steps[name].depends_on) for name in order}
+        for name in order:
+            for dependency in plan.steps[name].depends_on:
+                dependents[dependency].append(name)
+
+        timings: Dict[str, StepTiming] = {}
+        failed: Dict[str, BaseException] = {}
+        skipped: List[str] = []
+        origin = time.perf_counter()
+
+        def run(step: DeploymentStep) -> StepTiming:
+            started = time.perf_counter() - origin
+            if tracer.enabled:
+                tracer.emit(f"Starting {step.name} at {started:.3f}s")
+            step.action()
+            return StepTiming(started, time.perf_counter() - origin)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or max(len(order), 1),
+                                thread_name_prefix="deployment") as pool:
+            running: Dict[Future, str] = {pool.submit(run, plan.steps[name]): name
+                                          for name in order if not waiting_on[name]}
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        failed[name] = error
+                        skipped.extend(self._downstream(name, dependents, skipped))
+                        continue
+                    timings[name] = future.result()
+                    for dependent in dependents[name]:
+                        waiting_on[dependent] -= 1
+                        if not waiting_on[dependent] and dependent not in skipped:
+                            running[pool.submit(run, plan.steps[dependent])] = dependent
+
+        elapsed = time.perf_counter() - origin
+        return DeploymentReport(elapsed, timings, self.critical_path(plan, timings), failed, skipped)
+
+    @staticmethod
+    def _downstream(name: str, dependents: Dict[str, List[str]], skipped: List[str]) -> List[str]:
+        found: List[str] = []
+        pending = list(dependents[name])
+        while pending:
+            dependent = pending.pop()
+            if dependent not in found and dependent not in skipped:
+                found.append(dependent)
+                pending.extend(dependents[dependent])
+        return found
+
+    @staticmethod
+    def critical_path(plan: DeploymentPlan, timings: Mapping[str, StepTiming]) -> List[str]:
+        """The chain of dependent steps with the largest total duration, among the steps that ran"""
+        length: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for name in plan.topological_order():
+            if name not in timings:
+                continue
+            dependencies = [dependency for dependency in plan.steps[name].depends_on if dependency in length]
+            before = max(dependencies, key=length.__getitem__, default=None)
+            previous[name] = before
+            length[name] = timings[name].duration + (length[before] if before else 0.0)
+        if not length:
+            return []
+        path = [max(length, key=length.__getitem__)]
+        while previous[path[-1]] is not None:
+            path.append(previous[path[-1]])
+        return path[::-1]
+
+
+if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
+
+    def slow(action: Callable[[], object], seconds: float) -> Callable[[], object]:
+        """Gives a demo step the latency of a real cloud API call"""
+        def step():
+            time.sleep(seconds)
+            return action()
+        return step
+
+    plan = DeploymentPlan()
+    for name, step in DeploymentPlan.from_provider(AWSCloudServiceCreator()).steps.items():
+        plan.add(name, slow(step.action, {"compute": 0.3, "storage": 0.1, "database": 0.6}[name]))
+    plan.add("migrate", slow(lambda: None, 0.2), depends_on=["database"])
+    plan.add("release", slow(lambda: None, 0.1), depends_on=["compute", "storage", "migrate"])
+
+    report = DeploymentEngine().deploy(plan)
+    total = sum(timing.duration for timing in report.timings.values())
+    print(f"Deployed in {report.elapsed:.2f}s instead of {total:.2f}s, "
+          f"critical path: {' -> '.join(report.critical_path)}")
+
+    plan.steps["database"] = plan.steps["database"]._replace(depends_on=("release",))
+    try:
+        DeploymentEngine().deploy(plan)
+    except DeploymentCycleError as error:
+        print(error)
@@ -0,0 +1,184 @@
+"""
+Bulk deployment of an application fleet across cloud providers.
+
+Deploying hundreds of applications with one Client run each makes three API calls per application, one
+after another. FleetScheduler deploys the whole list at once:
+    1. Deployments are grouped by provider (the class of their CloudServiceCreator).
+    2. Each provider gets a ProviderLimit: at most `concurrency` API calls in flight, on a thread pool of
+       its own, so a slow or rate-limited provider does not hold up the others.
+    3. The deployments of a provider are cut into batches of `batch_size`. A batch makes one call per
+       product kind through the bulk methods of the abstract products (launch_many, create_buckets,
+       provision_many). Providers with a bulk API (AWS RunInstances, GCP bulkInsert) override them to launch
+       the whole batch in one call, the others fall back to a call per product.
+    4. Within a batch the steps keep the order of Client.deploy_application(): every product is created,
+       then the compute instances are launched, then the buckets created, then the databases provisioned.
+       The batches of a provider run concurrently, up to its `concurrency`.
+    5. A factory method or a bulk call that raises fails only the applications it was for, the error is
+       their DeploymentResult.error and their remaining steps are skipped, as in deploy_application().
+    6. run() yields a DeploymentResult for every application as soon as its batch finished, in completion
+       order, so progress can be reported while the fleet is deploying.
+"""
+# Import libraries
+from __future__ import annotations
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Type
+
+from src.creational.abstract_factory import cloud_provider_example as cloud
+from src.creational.abstract_factory.cloud_provider_example import (
+    AWSCloudServiceCreator, AzureCloudServiceCreator, Client, CloudServiceCreator, GCPCloudServiceCreator,
+)
+
+
+# Product kind -> (factory method, bulk method of the product class)
+_STEPS = (
+    ("compute", "create_compute_instance", "launch_many"),
+    ("storage", "create_storage_service", "create_buckets"),
+    ("database", "create_database_service", "provision_many"),
+)
+
+
+class ProviderLimit(NamedTuple):
+    """Concurrent API calls and applications per bulk call allowed for one provider"""
+    concurrency: int = 4
+    batch_size: int = 1
+
+
+class Deployment(NamedTuple):
+    name: str
+    provider: CloudServiceCreator
+
+
+class DeploymentResult(NamedTuple):
+    """Outcome of one application, `elapsed` counts from the start of the run"""
+    name: str
+    provider: str
+    elapsed: float
+    error: Optional[BaseException]
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+class FleetScheduler:
+    """Deploys many applications concurrently, with per-provider limits and bulk calls"""
+    def __init__(self, limits: Optional[Mapping[Type[CloudServiceCreator], ProviderLimit]] = None,
+                 default_limit: ProviderLimit = ProviderLimit()):
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+
+    def limit_for(self, provider_type: Type[CloudServiceCreator]) -> ProviderLimit:
+        limit = self.limits.get(provider_type, self.default_limit)
+        if limit.concurrency < 1 or limit.batch_size < 1:
+            raise ValueError(f"Invalid limit for {provider_type.__name__}: {limit}")
+        return limit
+
+    def run(self, deployments: Iterable[Deployment]) -> Iterator[DeploymentResult]:
+        """Deploy everything and yield the result of every application as soon as it is known"""
+        deployments = list(deployments)
+        groups: Dict[Type[CloudServiceCreator], List[int]] = {}
+        for index, deployment in enumerate(deployments):
+            groups.setdefault(type(deployment.provider), []).append(index)
+
+        origin = time.perf_counter()
+        pools = {provider_type: ThreadPoolExecutor(self.limit_for(provider_type).concurrency,
+                                                   thread_name_prefix=f"fleet-{provider_type.__name__}")
+                 for provider_type in groups}
+        calls: Dict[Future, Tuple[int, ...]] = {}
+        try:
+            # Submit the first batch of every provider before the second one of any, so all start right away.
+            batches = {provider_type: self._batches(group, self.limit_for(provider_type).batch_size)
+                       for provider_type, group in groups.items()}
+            while batches:
+                for provider_type, pending in list(batches.items()):
+                    batch = next(pending, None)
+                    if batch is None:
+                        del batches[provider_type]
+                        continue
+                    providers = [deployments[index].provider for index in batch]
+                    calls[pools[provider_type].submit(self._deploy_batch, providers)] = batch
+
+            for call in as_completed(calls):
+                for index, error in zip(calls.pop(call), call.result()):
+                    deployment = deployments[index]
+                    yield DeploymentResult(deployment.name, type(deployment.provider).__name__,
+                                           time.perf_counter() - origin, error)
+        finally:
+            # Stopping the iteration early cancels the calls that did not start yet.
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _deploy_batch(providers: Sequence[CloudServiceCreator]) -> List[Optional[Exception]]:
+        """Deploy a batch in the order of Client.deploy_application(), returns the error of every application"""
+        errors: List[Optional[Exception]] = [None] * len(providers)
+        products: List[Optional[List[Any]]] = []
+        for position, provider in enumerate(providers):
+            try:
+                products.append([getattr(provider, create)() for _, create, _ in _STEPS])
+            except Exception as error:
+                errors[position] = error
+                products.append(None)
+
+        for step, (_, _, bulk) in enumerate(_STEPS):
+            ready = [position for position, error in enumerate(errors) if error is None]
+            if not ready:
+                break
+            step_products = [products[position][step] for position in ready]
+            try:
+                getattr(type(step_products[0]), bulk)(step_products)
+            except Exception as error:
+                for position in ready:
+                    errors[position] = error
+        return errors
+
+    @staticmethod
+    def _batches(group: List[int], batch_size: int) -> Iterator[Tuple[int, ...]]:
+        for start in range(0, len(group), batch_size):
+            yield tuple(group[start:start + batch_size])
+
+    def deploy(self, deployments: Iterable[Deployment]) -> List[DeploymentResult]:
+        return list(self.run(deployments))
+
+
+if __name__ == "__main__":
+    def simulate_api_latency(product_type: type, method_name: str, seconds: float):
+        """Gives every call of a demo product method, single or bulk, the latency of a cloud API call"""
+        method = getattr(product_type, method_name)
+        is_bulk = isinstance(product_type.__dict__.get(method_name), classmethod)
+        function = method.__func__ if is_bulk else method
+
+        def call(*args):
+            time.sleep(seconds)
+            return function(*args)
+        setattr(product_type, method_name, classmethod(call) if is_bulk else call)
+
+    for prefix in ("AWS", "Azure", "GCP"):
+        simulate_api_latency(getattr(cloud, f"{prefix}ComputingInstance"), "launch", 0.02)
+        simulate_api_latency(getattr(cloud, f"{prefix}StorageService"), "create_bucket", 0.01)
+        simulate_api_latency(getattr(cloud, f"{prefix}DatabaseService"), "provision", 0.03)
+    for prefix in ("AWS", "GCP"):
+        simulate_api_latency(getattr(cloud, f"{prefix}ComputingInstance"), "launch_many", 0.02)
+
+    providers = (AWSCloudServiceCreator(), AzureCloudServiceCreator(), GCPCloudServiceCreator())
+    fleet = [Deployment(f"app-{number:03d}", providers[number % 3]) for number in range(300)]
+
+    started = time.perf_counter()
+    for deployment in fleet[:30]:
+        Client(deployment.provider).deploy_application()
+    sequential = (time.perf_counter() - started) * len(fleet) / 30
+
+    scheduler = FleetScheduler({
+        AWSCloudServiceCreator: ProviderLimit(concurrency=16, batch_size=25),
+        AzureCloudServiceCreator: ProviderLimit(concurrency=8, batch_size=10),
+        GCPCloudServiceCreator: ProviderLimit(concurrency=16, batch_size=25),
+    })
+    results = []
+    for result in scheduler.run(fleet):
+        results.append(result)
+        if len(results) % 50 == 0:
+            print(f"{len(results)}/{len(fleet)} deployed after {result.elapsed:.2f}s")
+    elapsed = max(result.elapsed for result in results)
+    print(f"{sum(result.succeeded for result in results)} applications deployed in {elapsed:.2f}s, "
+          f"one at a time would take about {sequential:.2f}s")
@@ -15,6 +15,8 @@ UI components:
 # Import libraries
 from abc import ABC, abstractmethod
 
+from src.common.tracing import PrintSink, tracer
+
 
 # Abstract Products
 class Button(ABC):
@@ -45,59 +47,68 @@ class TextField(ABC):
 class WindowsButton(Button):
     """Concrete button for creating Windows button"""
     def render(self):
-        print("Rendering Windows button...")
+        if tracer.enabled:
+            tracer.emit("Rendering Windows button...")
 
 class WindowsCheckbox(Checkbox):
     """Concrete checkbox for creating Windows checkbox"""
     def render(self):
-        print("Rendering Windows checkbox...")
+        if tracer.enabled:
+            tracer.emit("Rendering Windows checkbox...")
 
 class WindowsTextField(TextField):
     """Concrete textfield for creating Windows textfield"""
     def render(self):
-        print("Rendering Windows textfield...")
+        if tracer.enabled:
+            tracer.emit("Rendering Windows textfield...")
 
 
 class MacButton(Button):
     """Concrete button for creating Mac button"""
 
     def render(self):
-        print("Rendering Mac button...")
+        if tracer.enabled:
+            tracer.emit("Rendering Mac button...")
 
 
 class MacCheckbox(Checkbox):
     """Concrete checkbox for creating Mac checkbox"""
 
     def render(self):
-        print("Rendering Mac checkbox...")
+        if tracer.enabled:
+            tracer.emit("Rendering Mac checkbox...")
 
 
 class MacTextField(TextField):
     """Concrete textfield for creating Mac textfield"""
 
     def render(self):
-        print("Rendering Mac textfield...")
+        if tracer.enabled:
+            tracer.emit("Rendering Mac textfield...")
 
 
 class LinuxButton(Button):
     """Concrete button for creating Linux button"""
 
     def render(self):
-        print("Rendering Linux button...")
+        if tracer.enabled:
+            tracer.emit("Rendering Linux button...")
 
 
 class LinuxCheckbox(Checkbox):
     """Concrete checkbox for creating Linux checkbox"""
 
     def render(self):
-        print("Rendering Linux checkbox...")
+        if tracer.enabled:
+            tracer.emit("Rendering Linux checkbox...")
 
 
 class LinuxTextField(TextField):
     """Concrete textfield for creating Linux textfield"""
 
     def render(self):
-        print("Rendering Linux textfield...")
+        if tracer.enabled:
+            tracer.emit("Rendering Linux textfield...")
 
 
 # Abstract Creator
@@ -171,5 +182,6 @@ class Client:
 
 
 if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
     client = Client(platform=MacGUICreator())
     client.create_ui()
\ No newline at end of file
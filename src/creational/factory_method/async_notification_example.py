@@ -0,0 +1,328 @@
+"""
+Async Notification System Scenario:
+The synchronous channels in notification_example.py would open a new connection for every message. The
+async channels below share a connection pool instead:
+    1. Pool size limit: at most `max_size` connections are open at the same time.
+    2. Keep-alive: idle connections are reused until they were idle for `idle_timeout` seconds.
+    3. Pipelining: up to `pipeline_depth` messages are written before the acknowledgements are read.
+
+LocalSinkServer is an in-process stand-in for the SMTP/SMS/push providers. It speaks a line protocol: it
+greets every new connection with "READY" (after an optional handshake delay, like a TLS or SMTP greeting)
+and acknowledges every "<channel>\t<message>" line with "OK".
+
+The async channels format their messages through the same precompiled MessageTemplate as the synchronous
+channels, so both families always produce the same text.
+"""
+# Import libraries
+from __future__ import annotations
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.common.tracing import PrintSink, tracer
+from src.creational.factory_method.message_template import MessageTemplate
+from src.creational.factory_method.notification_example import (
+    EmailNotification, PushNotification, SMSNotification,
+)
+
+
+## Local stand-in server
+class LocalSinkServer:
+    """In-process provider stand-in that counts the connections and the messages it receives"""
+    def __init__(self, handshake_delay: float = 0.0):
+        self.handshake_delay = handshake_delay
+        self.connections = 0
+        self.received: Dict[str, int] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start(self) -> LocalSinkServer:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        if self.handshake_delay:
+            await asyncio.sleep(self.handshake_delay)
+        writer.write(b"READY\n")
+        try:
+            while line := await reader.readline():
+                channel, _, _ = line.partition(b"\t")
+                channel = channel.decode()
+                self.received[channel] = self.received.get(channel, 0) + 1
+                writer.write(b"OK\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def __aenter__(self) -> LocalSinkServer:
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+## Connection pool
+class Connection:
+    """One open connection to the provider"""
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+
+    @property
+    def closed(self) -> bool:
+        return self.writer.is_closing() or self.reader.at_eof()
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class ConnectionPool:
+    """
+    Bounded pool of keep-alive connections. With `keep_alive=False` every checkout opens a new connection
+    and closes it afterwards, which is what a per-message implementation does.
+    """
+    def __init__(self, host: str, port: int, max_size: int = 10, idle_timeout: float = 30.0,
+                 pipeline_depth: int = 64, keep_alive: bool = True):
+        if max_size < 1 or pipeline_depth < 1:
+            raise ValueError("max_size and pipeline_depth must be at least 1")
+        self.host = host
+        self.port = port
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.pipeline_depth = pipeline_depth
+        self.keep_alive = keep_alive
+        self.opened = 0
+        self.reused = 0
+        self._idle: Deque[Connection] = deque()
+        self._slots = asyncio.Semaphore(max_size)
+
+    async def _connect(self) -> Connection:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        greeting = await reader.readline()
+        if greeting != b"READY\n":
+            writer.close()
+            raise ConnectionError(f"Unexpected greeting from provider: {greeting!r}")
+        self.opened += 1
+        return Connection(reader, writer)
+
+    async def acquire(self) -> Connection:
+        await self._slots.acquire()
+        try:
+            now = time.monotonic()
+            while self._idle:
+                connection = self._idle.pop()
+                if not connection.closed and now - connection.last_used < self.idle_timeout:
+                    self.reused += 1
+                    return connection
+                await connection.close()
+            return await self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, connection: Connection, reusable: bool = True):
+        try:
+            if self.keep_alive and reusable and not connection.closed:
+                connection.last_used = time.monotonic()
+                self._idle.append(connection)
+            else:
+                await connection.close()
+        finally:
+            self._slots.release()
+
+    async def send(self, lines: Sequence[bytes]):
+        """Send the lines over one pooled connection, `pipeline_depth` lines per round trip"""
+        connection = await self.acquire()
+        reusable = False
+        try:
+            for start in range(0, len(lines), self.pipeline_depth):
+                window = lines[start:start + self.pipeline_depth]
+                connection.writer.write(b"".join(window))
+                await connection.writer.drain()
+                for _ in window:
+                    if await connection.reader.readline() != b"OK\n":
+                        raise ConnectionError("Provider did not acknowledge the message")
+            reusable = True
+        finally:
+            await self.release(connection, reusable)
+
+    async def close(self):
+        while self._idle:
+            await self._idle.pop().close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"opened": self.opened, "reused": self.reused, "idle": len(self._idle)}
+
+
+## Product & Concrete Products
+class AsyncNotificationInterface(ABC):
+    """Product Interface, It is an abstract blueprint for asynchronous notification channels"""
+    channel = ""
+    # Single-field channel template around the message, channels without one format message by message.
+    template: Optional[MessageTemplate] = None
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    @abstractmethod
+    def format_message(self, message: str) -> str:
+        """Format the message to be sent"""
+        pass
+
+    def format_many(self, messages: Iterable[str]) -> List[str]:
+        """Format a batch of messages"""
+        if self.template is None:
+            return [self.format_message(message) for message in messages]
+        return self.template.render_column(messages)
+
+    def _encode(self, message: str) -> bytes:
+        # The protocol is line based, so a message cannot contain line breaks.
+        single_line = message.replace("\n", " ")
+        return f"{self.channel}\t{single_line}\n".encode()
+
+    async def send(self, message: str):
+        """Send the message over a pooled connection"""
+        if tracer.enabled:
+            tracer.emit(f"Sending {self.channel}: {message}")
+        await self.pool.send([self._encode(message)])
+
+    async def send_many(self, messages: Sequence[str]):
+        """Send a batch of messages pipelined over a single pooled connection"""
+        if tracer.enabled:
+            tracer.emit(f"Sending {len(messages)} {self.channel} message(s) in one batch")
+        await self.pool.send([self._encode(message) for message in messages])
+
+
+class AsyncEmailNotification(AsyncNotificationInterface):
+    """Concrete Product, It sends Email Notifications asynchronously"""
+    channel = "email"
+    template = EmailNotification.template
+
+    def format_message(self, message: str) -> str:
+        return self.template.render_value(message)
+
+
+class AsyncSMSNotification(AsyncNotificationInterface):
+    """Concrete Product, It sends SMS Notifications asynchronously"""
+    channel = "SMS"
+    template = SMSNotification.template
+
+    def format_message(self, message: str) -> str:
+        return self.template.render_value(message)
+
+
+class AsyncPushNotification(AsyncNotificationInterface):
+    """Concrete Product, It sends Push Notifications asynchronously"""
+    channel = "Push"
+    template = PushNotification.template
+
+    def format_message(self, message: str) -> str:
+        return self.template.render_value(message)
+
+
+## Creator & Concrete Creators
+class AsyncNotificationCreator(ABC):
+    """Factory Class, It creates asynchronous notification objects that share the creator's pool"""
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    @abstractmethod
+    def create_notification(self) -> AsyncNotificationInterface:
+        """Factory Method, It creates the notification object based on the channel"""
+        pass
+
+    async def notify_user(self, message: str):
+        """Main business logic, It creates the notification object and sends the message"""
+        notification = self.create_notification()
+        await notification.send(notification.format_message(message))
+
+    async def notify_many(self, messages: Iterable[str], chunk_size: int = 256) -> int:
+        """
+        Bulk business logic, It sends the messages in chunks. Up to the pool size chunks are in flight at
+        once, each one pipelined over its own connection. Returns the number of messages sent.
+        If a chunk fails, the chunks still in flight are cancelled before the error is raised.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        notification = self.create_notification()
+        messages = iter(messages)
+        in_flight: List[asyncio.Task] = []
+        sent = 0
+        try:
+            while chunk := notification.format_many(list(islice(messages, chunk_size))):
+                in_flight.append(asyncio.create_task(notification.send_many(chunk)))
+                sent += len(chunk)
+                if len(in_flight) >= self.pool.max_size:
+                    in_flight = await self._wait_chunks(in_flight, asyncio.FIRST_COMPLETED)
+            while in_flight:
+                in_flight = await self._wait_chunks(in_flight, asyncio.FIRST_EXCEPTION)
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            raise
+        return sent
+
+    @staticmethod
+    async def _wait_chunks(in_flight: List[asyncio.Task], return_when: str) -> List[asyncio.Task]:
+        """Wait for some chunks, raise the first failure and return the chunks still in flight"""
+        done, pending = await asyncio.wait(in_flight, return_when=return_when)
+        in_flight[:] = pending
+        failures = [task.exception() for task in done if task.exception() is not None]
+        if failures:
+            raise failures[0]
+        return in_flight
+
+
+class AsyncEmailNotificationCreator(AsyncNotificationCreator):
+    """Concrete Factory, It creates the AsyncEmailNotification object"""
+    def create_notification(self) -> AsyncNotificationInterface:
+        return AsyncEmailNotification(self.pool)
+
+
+class AsyncSMSNotificationCreator(AsyncNotificationCreator):
+    """Concrete Factory, It creates the AsyncSMSNotification object"""
+    def create_notification(self) -> AsyncNotificationInterface:
+        return AsyncSMSNotification(self.pool)
+
+
+class AsyncPushNotificationCreator(AsyncNotificationCreator):
+    """Concrete Factory, It creates the AsyncPushNotification object"""
+    def create_notification(self) -> AsyncNotificationInterface:
+        return AsyncPushNotification(self.pool)
+
+
+if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
+
+    async def main():
+        async with LocalSinkServer(handshake_delay=0.01) as server:
+            pool = ConnectionPool(*server.address, max_size=4)
+            await AsyncEmailNotificationCreator(pool).notify_user("Hello, this is an email notification")
+            await AsyncSMSNotificationCreator(pool).notify_user("Hello, this is an SMS notification")
+            await AsyncPushNotificationCreator(pool).notify_many(
+                (f"Campaign message #{number}" for number in range(1000)), chunk_size=250
+            )
+            await pool.close()
+            print(f"Pool: {pool.stats()}, provider received {server.received} over {server.connections} connection(s)")
+
+    asyncio.run(main())
@@ -0,0 +1,214 @@
+"""
+Card detail validation, one card at a time or millions at once.
+
+Both validators run the same checks and report the failed ones as CardRejection flags:
+    1. FORMAT: the card number, CVV or expiry contains something else than digits (and the "/" of MM/YY).
+    2. LENGTH: the card number length is not allowed for its card scheme.
+    3. CHECKSUM: the Luhn checksum of the card number fails.
+    4. UNKNOWN_BIN: the first six digits do not belong to a known card scheme.
+    5. EXPIRED: the MM/YY expiry is before the current month.
+    6. CVV: the CVV length does not match the card scheme (4 digits for American Express, 3 otherwise).
+
+validate_card() is plain Python and is what CreditCardPayment.validate_payment_details() uses.
+validate_cards() takes arrays of card numbers, CVVs and expiry dates and runs every check as a NumPy array
+operation, for settlement file pre-checks with millions of rows:
+
+    result = validate_cards(numbers, cvvs, expiries)
+    rejected = numbers[~result.valid]
+    reasons = result.reasons[~result.valid]     # CardRejection bit flags
+"""
+# Import libraries
+from __future__ import annotations
+import time
+from datetime import date
+from enum import IntFlag
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # validate_card() does not need NumPy, validate_cards() does
+    np = None
+
+
+class CardRejection(IntFlag):
+    """Reasons a card is rejected, combined as bit flags. A valid card has no flag set"""
+    NONE = 0
+    FORMAT = 1
+    LENGTH = 2
+    CHECKSUM = 4
+    UNKNOWN_BIN = 8
+    EXPIRED = 16
+    CVV = 32
+
+
+class CardScheme(NamedTuple):
+    """A range of six digit BINs with the card lengths and the CVV length of its scheme"""
+    name: str
+    low: int
+    high: int
+    lengths: Tuple[int, ...]
+    cvv_length: int
+
+
+BIN_TABLE: Tuple[CardScheme, ...] = (
+    CardScheme("visa", 400000, 499999, (13, 16, 19), 3),
+    CardScheme("mastercard", 510000, 559999, (16,), 3),
+    CardScheme("mastercard", 222100, 272099, (16,), 3),
+    CardScheme("amex", 340000, 349999, (15,), 4),
+    CardScheme("amex", 370000, 379999, (15,), 4),
+    CardScheme("discover", 601100, 601199, (16, 17, 18, 19), 3),
+    CardScheme("discover", 644000, 659999, (16, 17, 18, 19), 3),
+)
+
+MAX_CARD_LENGTH = 19
+_LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+
+def _month_index(value: date) -> int:
+    return value.year * 12 + value.month - 1
+
+
+## Scalar fallback
+def luhn_valid(card_number: str) -> bool:
+    total = 0
+    for position, digit in enumerate(reversed(card_number)):
+        total += _LUHN_DOUBLED[int(digit)] if position % 2 else int(digit)
+    return total % 10 == 0
+
+
+def with_luhn_check_digit(partial_number: str) -> str:
+    """Append the Luhn check digit, e.g. to generate valid test card numbers"""
+    total = 0
+    for position, digit in enumerate(reversed(partial_number)):
+        total += int(digit) if position % 2 else _LUHN_DOUBLED[int(digit)]
+    return partial_number + str(-total % 10)
+
+
+def validate_card(card_number: str, cvv: str, expiry: str, today: Optional[date] = None) -> CardRejection:
+    """Check a single card, returns CardRejection.NONE when it is valid"""
+    reasons = CardRejection.NONE
+    scheme = None
+    if not (card_number.isascii() and card_number.isdigit()) or len(card_number) > MAX_CARD_LENGTH:
+        reasons |= CardRejection.FORMAT
+    else:
+        bin_number = int(card_number[:6].ljust(6, "0"))
+        scheme = next((entry for entry in BIN_TABLE if entry.low <= bin_number <= entry.high), None)
+        if scheme is None:
+            reasons |= CardRejection.UNKNOWN_BIN
+        elif len(card_number) not in scheme.lengths:
+            reasons |= CardRejection.LENGTH
+        if not luhn_valid(card_number):
+            reasons |= CardRejection.CHECKSUM
+
+    if not (cvv.isascii() and cvv.isdigit()):
+        reasons |= CardRejection.FORMAT
+    elif len(cvv) != (scheme.cvv_length if scheme is not None else len(cvv)) or len(cvv) not in (3, 4):
+        reasons |= CardRejection.CVV
+
+    month, slash, year = expiry[:2], expiry[2:3], expiry[3:]
+    if slash != "/" or len(expiry) != 5 or not (month + year).isascii() or not (month + year).isdigit() \
+            or not 1 <= int(month) <= 12:
+        reasons |= CardRejection.FORMAT
+    elif (2000 + int(year)) * 12 + int(month) - 1 < _month_index(today or date.today()):
+        reasons |= CardRejection.EXPIRED
+    return reasons
+
+
+## Vectorized batch validation
+class CardValidationResult(NamedTuple):
+    """`valid` is a boolean mask, `reasons` holds the CardRejection flags of every row as uint8"""
+    valid: "np.ndarray"
+    reasons: "np.ndarray"
+
+
+def _ascii(values: "np.ndarray") -> "np.ndarray":
+    """Mask of the values that only contain ASCII characters, so they can be viewed as bytes"""
+    return np.char.str_len(np.char.encode(values, "utf-8")) == np.char.str_len(values)
+
+
+def _digit_matrix(values: "np.ndarray", width: int, right_aligned: bool) -> "np.ndarray":
+    """Digits of every value as a (rows, width) uint8 matrix, padded with zeros"""
+    padded = np.char.rjust(values, width, "0") if right_aligned else np.char.ljust(values, width, "0")
+    return padded.astype(f"S{width}").view(np.uint8).reshape(-1, width) - ord("0")
+
+
+def validate_cards(card_numbers: Sequence[str], cvvs: Sequence[str], expiries: Sequence[str],
+                   today: Optional[date] = None) -> CardValidationResult:
+    """Check every row with array operations, the result matches validate_card() row by row"""
+    if np is None:
+        raise ImportError("validate_cards() requires NumPy, use validate_card() for single cards")
+    numbers = np.asarray(card_numbers, dtype=str)
+    cvvs = np.asarray(cvvs, dtype=str)
+    expiries = np.asarray(expiries, dtype=str)
+    if not numbers.shape == cvvs.shape == expiries.shape or numbers.ndim != 1:
+        raise ValueError("card_numbers, cvvs and expiries must be one dimensional and of the same length")
+    # The flags are cast to uint8 when they are or-ed in, NumPy 2 refuses to cast the IntFlag implicitly.
+    reasons = np.zeros(len(numbers), dtype=np.uint8)
+
+    # Card number: rows that are not all digits are replaced by a placeholder so the byte views below work.
+    lengths = np.char.str_len(numbers)
+    well_formed = _ascii(numbers) & np.char.isdigit(numbers) & (lengths <= MAX_CARD_LENGTH)
+    numbers = np.where(well_formed, numbers, "0")
+    reasons[~well_formed] |= np.uint8(CardRejection.FORMAT)
+
+    # Luhn: right aligned, leading zeros do not change the sum, every second digit from the right is doubled.
+    digits = _digit_matrix(numbers, MAX_CARD_LENGTH, right_aligned=True)
+    doubled = np.asarray(_LUHN_DOUBLED, dtype=np.uint8)[digits[:, 1::2]]
+    checksum = (digits[:, 0::2].sum(axis=1, dtype=np.int64) + doubled.sum(axis=1, dtype=np.int64)) % 10
+    reasons[well_formed & (checksum != 0)] |= np.uint8(CardRejection.CHECKSUM)
+
+    # BIN ranges give the scheme, which decides the allowed lengths and the CVV length.
+    prefix = _digit_matrix(numbers, 6, right_aligned=False).astype(np.int64)
+    bin_numbers = prefix @ (10 ** np.arange(5, -1, -1, dtype=np.int64))
+    known = np.zeros(len(numbers), dtype=bool)
+    length_ok = np.zeros(len(numbers), dtype=bool)
+    cvv_length = np.zeros(len(numbers), dtype=np.int64)
+    for scheme in BIN_TABLE:
+        in_range = (bin_numbers >= scheme.low) & (bin_numbers <= scheme.high) & ~known
+        known |= in_range
+        length_ok |= in_range & np.isin(lengths, scheme.lengths)
+        cvv_length[in_range] = scheme.cvv_length
+    reasons[well_formed & ~known] |= np.uint8(CardRejection.UNKNOWN_BIN)
+    reasons[well_formed & known & ~length_ok] |= np.uint8(CardRejection.LENGTH)
+
+    # CVV: 3 or 4 digits, and exactly the scheme's length when the scheme is known.
+    cvv_lengths = np.char.str_len(cvvs)
+    cvv_digits = _ascii(cvvs) & np.char.isdigit(cvvs)
+    reasons[~cvv_digits] |= np.uint8(CardRejection.FORMAT)
+    cvv_wrong = ~np.isin(cvv_lengths, (3, 4)) | (well_formed & known & (cvv_lengths != cvv_length))
+    reasons[cvv_digits & cvv_wrong] |= np.uint8(CardRejection.CVV)
+
+    # Expiry: MM/YY, the card is valid until the end of that month.
+    expiry_shaped = (np.char.str_len(expiries) == 5) & _ascii(expiries)
+    expiry_bytes = np.where(expiry_shaped, expiries, "00/00").astype("S5").view(np.uint8).reshape(-1, 5)
+    expiry_digits = expiry_bytes[:, [0, 1, 3, 4]].astype(np.int64) - ord("0")
+    month = expiry_digits[:, 0] * 10 + expiry_digits[:, 1]
+    year = 2000 + expiry_digits[:, 2] * 10 + expiry_digits[:, 3]
+    expiry_ok = (expiry_shaped & (expiry_bytes[:, 2] == ord("/")) & ((expiry_digits >= 0) & (expiry_digits <= 9)).all(axis=1)
+                 & (month >= 1) & (month <= 12))
+    reasons[~expiry_ok] |= np.uint8(CardRejection.FORMAT)
+    reasons[expiry_ok & (year * 12 + month - 1 < _month_index(today or date.today()))] |= np.uint8(CardRejection.EXPIRED)
+
+    return CardValidationResult(reasons == 0, reasons)
+
+
+if __name__ == "__main__":
+    print(validate_card("4111111111111111", "123", "12/30"))
+    print(validate_card("4111111111111112", "12", "01/20"))
+
+    if np is None:
+        print("NumPy is not installed, skipping the batch validation demo")
+    else:
+        rows = 1_000_000
+        rng = np.random.default_rng(7)
+        numbers = np.char.add("4", rng.integers(10 ** 14, 10 ** 15, rows).astype(str))
+        cvvs = rng.integers(100, 1000, rows).astype(str)
+        expiries = np.char.add(np.char.add(np.char.zfill(rng.integers(1, 13, rows).astype(str), 2), "/"),
+                               rng.integers(20, 35, rows).astype(str))
+        started = time.perf_counter()
+        result = validate_cards(numbers, cvvs, expiries)
+        elapsed = time.perf_counter() - started
+        print(f"Validated {rows:,} cards in {elapsed:.2f}s, {int(result.valid.sum()):,} valid")
+        for flag in CardRejection:
+            if flag:
+                print(f"  {flag.name}: {int(((result.reasons & flag) != 0).sum()):,}")
@@ -0,0 +1,170 @@
+"""
+Creation policies for factory methods.
+
+By default a creator builds a fresh product every time its business logic runs. A creation policy lets a
+creator reuse products instead:
+    1. NewInstancePolicy: a new product every time, the default behavior.
+    2. SingletonPolicy: one product per key, for stateless products such as ConcreteProduct1 or SMSNotification.
+    3. LRUPolicy: a bounded least-recently-used cache, keyed on the creator's constructor arguments.
+    4. PoolPolicy: a thread-safe object pool. Products are checked out for the duration of one operation and
+       checked back in afterwards, so stateful products are never shared by two callers at once.
+
+Creators get the policy support from PolicyCreatorMixin. The key of a product comes from
+`creator.product_key()` and every policy counts its hits and misses.
+
+    creator = SMSNotificationCreator()
+    creator.creation_policy = SingletonPolicy()
+"""
+# Import libraries
+from __future__ import annotations
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Deque, Dict, Hashable, Iterator, Optional
+
+
+class CreationPolicy(ABC):
+    """Decides whether a creator builds a new product or reuses an existing one"""
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def acquire(self, factory: Callable[[], Any], key: Hashable) -> Any:
+        """Return a product for the key, calling the factory when none can be reused"""
+        pass
+
+    def release(self, product: Any, key: Hashable):
+        """Give the product back once the caller is done with it"""
+        pass
+
+    @contextmanager
+    def checkout(self, factory: Callable[[], Any], key: Hashable) -> Iterator[Any]:
+        """Acquire a product for the duration of the with block"""
+        product = self.acquire(factory, key)
+        try:
+            yield product
+        finally:
+            self.release(product, key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+
+class NewInstancePolicy(CreationPolicy):
+    """Build a new product on every call"""
+    def acquire(self, factory: Callable[[], Any], key: Hashable) -> Any:
+        with self._lock:
+            self.misses += 1
+        return factory()
+
+
+class SingletonPolicy(CreationPolicy):
+    """Build one product per key and hand the same one out forever"""
+    def __init__(self):
+        super().__init__()
+        self._products: Dict[Hashable, Any] = {}
+
+    def acquire(self, factory: Callable[[], Any], key: Hashable) -> Any:
+        with self._lock:
+            product = self._products.get(key)
+            if product is not None:
+                self.hits += 1
+                return product
+            self.misses += 1
+            product = self._products[key] = factory()
+            return product
+
+
+class LRUPolicy(CreationPolicy):
+    """Keep the `maxsize` most recently used products"""
+    def __init__(self, maxsize: int = 128):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        super().__init__()
+        self.maxsize = maxsize
+        self._products: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def acquire(self, factory: Callable[[], Any], key: Hashable) -> Any:
+        with self._lock:
+            product = self._products.get(key)
+            if product is not None:
+                self._products.move_to_end(key)
+                self.hits += 1
+                return product
+            self.misses += 1
+            product = self._products[key] = factory()
+            if len(self._products) > self.maxsize:
+                self._products.popitem(last=False)
+            return product
+
+
+class PoolPolicy(CreationPolicy):
+    """
+    Pool of interchangeable products per key. A checked-out product belongs to one caller only, at most
+    `max_idle` products per key are kept for reuse once they are checked back in.
+    """
+    def __init__(self, max_idle: int = 16, reset: Optional[Callable[[Any], None]] = None):
+        if max_idle < 0:
+            raise ValueError("max_idle cannot be negative")
+        super().__init__()
+        self.max_idle = max_idle
+        self.reset = reset
+        self._idle: Dict[Hashable, Deque[Any]] = {}
+
+    def acquire(self, factory: Callable[[], Any], key: Hashable) -> Any:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.hits += 1
+                return idle.pop()
+            self.misses += 1
+        return factory()
+
+    def release(self, product: Any, key: Hashable):
+        if self.reset is not None:
+            self.reset(product)
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < self.max_idle:
+                idle.append(product)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._lock:
+            stats["idle"] = sum(len(idle) for idle in self._idle.values())
+        return stats
+
+
+class PolicyCreatorMixin:
+    """Gives a creator an optional creation policy, the creator's business logic uses checkout_product()"""
+    __slots__ = ()
+    creation_policy: Optional[CreationPolicy] = None
+
+    def product_key(self) -> Hashable:
+        """Key the policy stores products under. Creators with constructor arguments add them to the key"""
+        return type(self)
+
+    def acquire_product(self, factory: Callable[[], Any]) -> Any:
+        """Return a product from the policy, or a fresh one when there is no policy. Pair with release_product()"""
+        policy = self.creation_policy
+        if policy is None:
+            return factory()
+        return policy.acquire(factory, self.product_key())
+
+    def release_product(self, product: Any):
+        """Give a product from acquire_product() back to the policy"""
+        policy = self.creation_policy
+        if policy is not None:
+            policy.release(product, self.product_key())
+
+    def checkout_product(self, factory: Callable[[], Any]) -> ContextManager[Any]:
+        """Context manager that yields a product from the policy, or a fresh one when there is no policy"""
+        policy = self.creation_policy
+        if policy is None:
+            return nullcontext(factory())
+        return policy.checkout(factory, self.product_key())
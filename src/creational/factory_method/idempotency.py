@@ -0,0 +1,143 @@
+"""
+Idempotency keys for payment transactions.
+
+Clients and load balancers retry requests that timed out, and every retry used to run process_payment()
+again: another gateway round trip, and a second charge if the first attempt had in fact gone through.
+IdempotentPaymentExecutor wraps PaymentCreator.execute_transaction() with a cache keyed by the caller's
+transaction id:
+    1. A repeated transaction id returns the stored TransactionResult without touching the gateway.
+    2. Duplicates that arrive while the first call is still running wait for it instead of running in
+       parallel, and get its result (or its exception).
+    3. Entries expire `ttl` seconds after they were stored and at most `max_size` entries are kept, the
+       oldest ones are evicted first.
+    4. Exceptions are not cached, a retry after a crashed attempt runs the transaction again.
+    5. Reusing a transaction id for a different account or amount raises a ValueError.
+"""
+# Import libraries
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from src.common.tracing import PrintSink, tracer
+from src.creational.factory_method.payment_example import (
+    CreditCardPaymentCreator, PaymentCreator, TransactionResult,
+)
+
+
+class _Entry(NamedTuple):
+    """Stored outcome of a transaction"""
+    expires: float
+    fingerprint: Tuple[Hashable, float]
+    result: TransactionResult
+
+
+class _InFlight:
+    """A transaction that is running right now, duplicates wait on `done`"""
+    __slots__ = ("fingerprint", "done", "result", "error")
+
+    def __init__(self, fingerprint: Tuple[Hashable, float]):
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.result: Optional[TransactionResult] = None
+        self.error: Optional[BaseException] = None
+
+
+class IdempotentPaymentExecutor:
+    """Runs every transaction id at most once within the TTL"""
+    def __init__(self, ttl: float = 24 * 3600, max_size: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        if ttl <= 0 or max_size < 1:
+            raise ValueError("ttl must be positive and max_size at least 1")
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._in_flight: Dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _check(transaction_id: Hashable, stored: Tuple[Hashable, float], fingerprint: Tuple[Hashable, float]):
+        if stored != fingerprint:
+            raise ValueError(f"Transaction id {transaction_id!r} was already used for a different payment")
+
+    def _evict(self, now: float):
+        # Entries are stored in expiry order since every entry lives for the same ttl.
+        entries = self._entries
+        while entries and (len(entries) > self.max_size or next(iter(entries.values())).expires <= now):
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def execute_transaction(self, creator: PaymentCreator, amount: float, transaction_id: Hashable) -> TransactionResult:
+        """Run the transaction unless the id was seen before, in which case its stored result is returned"""
+        fingerprint = (creator.account_key(), amount)
+        with self._lock:
+            now = self.clock()
+            entry = self._entries.get(transaction_id)
+            if entry is not None and entry.expires > now:
+                self._check(transaction_id, entry.fingerprint, fingerprint)
+                self.hits += 1
+                return entry.result
+            in_flight = self._in_flight.get(transaction_id)
+            if in_flight is None:
+                in_flight = self._in_flight[transaction_id] = _InFlight(fingerprint)
+                self.misses += 1
+                owner = True
+            else:
+                self._check(transaction_id, in_flight.fingerprint, fingerprint)
+                self.waits += 1
+                owner = False
+
+        if not owner:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.result
+
+        try:
+            in_flight.result = creator.execute_transaction(amount)
+        except BaseException as error:
+            in_flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[transaction_id]
+                if in_flight.error is None:
+                    now = self.clock()
+                    self._entries[transaction_id] = _Entry(now + self.ttl, fingerprint, in_flight.result)
+                    self._entries.move_to_end(transaction_id)
+                    self._evict(now)
+            in_flight.done.set()
+        return in_flight.result
+
+    def forget(self, transaction_id: Hashable):
+        """Drop a stored result, e.g. after the payment was refunded"""
+        with self._lock:
+            self._entries.pop(transaction_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "in_flight": len(self._in_flight), "hits": self.hits,
+                    "misses": self.misses, "waits": self.waits, "evictions": self.evictions}
+
+
+if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
+    executor = IdempotentPaymentExecutor(ttl=60, max_size=10_000)
+    card = CreditCardPaymentCreator(card_number="4111111111111111", cvv="123", expiry="12/30")
+    print(executor.execute_transaction(card, 49.99, "order-1001"))
+    print(executor.execute_transaction(card, 49.99, "order-1001"))  # Retry: served from the cache
+
+    # Five concurrent duplicates of a new order charge the card once.
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(lambda _: executor.execute_transaction(card, 10.0, "order-1002"), range(5)))
+    print(f"{len(set(results))} distinct result(s) for 5 concurrent requests, {executor.stats()}")
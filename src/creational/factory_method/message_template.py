@@ -0,0 +1,114 @@
+"""
+Precompiled message templates.
+
+A MessageTemplate parses a `str.format` style template once and compiles it into an f-string function of
+the field values. The constant segments live in that function and are shared by every render, and the
+fields are pulled out of each record with one `operator.itemgetter` call:
+
+    template = MessageTemplate("Hi {name}, your order {order_id} has shipped")
+    template.render({"name": "Ada", "order_id": 42})
+    template.render_many(records)          # list of strings
+    template.stream(records, 10_000)       # generator of rendered chunks, bounded memory
+    MessageTemplate("Email: {message}").render_value("Hi")   # single-field templates, one value
+
+Only plain field names are supported (no attribute or index lookups), format specs and conversions such
+as `{amount:.2f}` or `{name!r}` are kept.
+"""
+# Import libraries
+from __future__ import annotations
+from itertools import islice
+from operator import itemgetter
+from string import Formatter
+from typing import Any, Callable, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+
+Segment = Tuple[str, Optional[str], str, Optional[str]]
+
+
+def _escape(text: str) -> str:
+    """Escape text for the literal part of a single-quoted f-string"""
+    return text.encode("unicode_escape").decode("ascii").replace("'", "\\'").replace("{", "{{").replace("}", "}}")
+
+
+class MessageTemplate:
+    """Template compiled once and rendered for many records"""
+    def __init__(self, source: str):
+        self.source = source
+        self._segments: List[Segment] = list(Formatter().parse(source))
+        fields = []
+        for _, field_name, _, conversion in self._segments:
+            if field_name is None:
+                continue
+            if not field_name.isidentifier():
+                raise ValueError(f"Only plain field names are supported in templates, got {{{field_name}}}")
+            if conversion not in (None, "r", "s", "a"):
+                raise ValueError(f"Unknown conversion in template field {{{field_name}!{conversion}}}")
+            if field_name not in fields:
+                fields.append(field_name)
+        self.fields: Tuple[str, ...] = tuple(fields)
+
+        # The template becomes a single f-string function of the field values: the constant segments are
+        # stored once in its code object and rendering does not parse the template again.
+        parts = []
+        for literal, field_name, format_spec, conversion in self._segments:
+            parts.append(_escape(literal))
+            if field_name is not None:
+                if "{" in format_spec:
+                    raise ValueError(f"Nested fields in format specs are not supported: {{{field_name}:{format_spec}}}")
+                parts.append("{_%d%s%s}" % (self.fields.index(field_name), "!" + conversion if conversion else "",
+                                             ":" + _escape(format_spec) if format_spec else ""))
+        arguments = ", ".join(f"_{index}" for index in range(len(self.fields)))
+        self._render: Callable[..., str] = eval(f"lambda {arguments}: f'{''.join(parts)}'", {})
+        self._getter = itemgetter(*self.fields) if self.fields else None
+        # Single-field templates render one value with a direct call of the compiled function.
+        self.render_value: Callable[[Any], str] = self._render if len(self.fields) == 1 else self._not_single_field
+
+    def _not_single_field(self, value: Any) -> str:
+        raise ValueError(f"render_value needs a template with exactly one field, {self!r} has {len(self.fields)}")
+
+    def __repr__(self) -> str:
+        return f"MessageTemplate({self.source!r})"
+
+    def render(self, record: Mapping[str, Any]) -> str:
+        return self.render_many((record,))[0]
+
+    def render_many(self, records: Iterable[Mapping[str, Any]]) -> List[str]:
+        """Render every record of the batch"""
+        render, getter = self._render, self._getter
+        if getter is None:
+            constant = render()
+            return [constant for _ in records]
+        if len(self.fields) == 1:
+            return [render(getter(record)) for record in records]
+        return [render(*getter(record)) for record in records]
+
+    def render_column(self, values: Iterable[Any]) -> List[str]:
+        """Render a single-field template straight from the field values, without building records"""
+        if len(self.fields) != 1:
+            raise ValueError(f"render_column needs a template with exactly one field, {self!r} has {len(self.fields)}")
+        render = self._render
+        return [render(value) for value in values]
+
+    def stream(self, records: Iterable[Mapping[str, Any]], chunk_size: int = 1000) -> Iterator[List[str]]:
+        """Render the records chunk by chunk, only one chunk is held in memory at a time"""
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        records = iter(records)
+        while chunk := list(islice(records, chunk_size)):
+            yield self.render_many(chunk)
+
+    def embed(self, field_name: str, inner: MessageTemplate) -> MessageTemplate:
+        """
+        Return a template where the field is replaced by the inner template, e.g. a channel template
+        "Email notification: {message}" around a campaign template "Hi {name}". Renders in a single pass.
+        """
+        parts = []
+        for literal, name, format_spec, conversion in self._segments:
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if name is None:
+                continue
+            if name == field_name and not format_spec and not conversion:
+                parts.append(inner.source)
+            else:
+                parts.append("{" + name + ("!" + conversion if conversion else "") + (":" + format_spec if format_spec else "") + "}")
+        return MessageTemplate("".join(parts))
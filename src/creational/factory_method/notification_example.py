@@ -10,14 +10,30 @@ The system should support:
 Each notification type should have:
     1. A format_message() Method
     2. A send() Method
+
+Bulk campaigns use notify_many(), which creates the product once and formats and sends the messages in
+chunks through format_many() and send_many().
+
+The built-in channels format through a precompiled MessageTemplate. Personalized campaigns pass their own
+template to notify_records(), it is embedded into the channel template once and rendered for every recipient
+record. Channels without a template fall back to format_message() for every message.
 """
 # Import libraries
 from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Any, Iterable, List, Mapping, Optional, Sequence
+
+from src.common.tracing import PrintSink, tracer
+from src.creational.factory_method.creation_policy import PolicyCreatorMixin, SingletonPolicy
+from src.creational.factory_method.message_template import MessageTemplate
 
 
 ## Product & Concrete Products
 class NotificationInterface(ABC):
     """Product Interface, It is an abstract blueprint for creating different notification channels"""
+    # Single-field channel template around the message, channels without one format message by message.
+    template: Optional[MessageTemplate] = None
+
     @abstractmethod
     def format_message(self, message: str) -> str:
         """Format the message to be sent"""
@@ -28,37 +44,78 @@ class NotificationInterface(ABC):
         """Send the message"""
         pass
 
+    def format_many(self, messages: Iterable[str]) -> List[str]:
+        """Format a batch of messages"""
+        if self.template is None:
+            return [self.format_message(message) for message in messages]
+        return self.template.render_column(messages)
+
+    def personalize(self, template: MessageTemplate) -> Optional[MessageTemplate]:
+        """
+        Embed a campaign template into the channel template, the result renders recipient records.
+        Returns None for channels without a template, their messages go through format_many().
+        """
+        if self.template is None:
+            return None
+        return self.template.embed("message", template)
+
+    def send_many(self, messages: Sequence[str]):
+        """Send a batch of messages, channels with a bulk API override it to send them in one call"""
+        for message in messages:
+            self.send(message)
+
 
 class EmailNotification(NotificationInterface):
     """Concrete Product, It implements the NotificationInterface for Email Notifications"""
+    template = MessageTemplate("Email notification: {message}")
+
     def format_message(self, message: str) -> str:
-        return f"Email notification: {message}"
+        return self.template.render_value(message)
 
     def send(self, message: str):
-        print(f"Sending email: {message}")
+        if tracer.enabled:
+            tracer.emit(f"Sending email: {message}")
+
+    def send_many(self, messages: Sequence[str]):
+        if tracer.enabled:
+            tracer.emit(f"Sending {len(messages)} email message(s) in one batch")
 
 
 class SMSNotification(NotificationInterface):
     """Concrete Product, It implements the NotificationInterface for SMS Notifications"""
+    template = MessageTemplate("SMS notification: {message}")
+
     def format_message(self, message: str) -> str:
-        return f"SMS notification: {message}"
+        return self.template.render_value(message)
 
     def send(self, message: str):
-        print(f"Sending SMS: {message}")
+        if tracer.enabled:
+            tracer.emit(f"Sending SMS: {message}")
+
+    def send_many(self, messages: Sequence[str]):
+        if tracer.enabled:
+            tracer.emit(f"Sending {len(messages)} SMS message(s) in one batch")
 
 
 class PushNotification(NotificationInterface):
     """Concrete Product, It implements the NotificationInterface for Push Notifications"""
+    template = MessageTemplate("Push notification: {message}")
+
     def format_message(self, message: str) -> str:
-        return f"Push notification: {message}"
+        return self.template.render_value(message)
 
     def send(self, message: str):
-        print(f"Sending Push: {message}")
+        if tracer.enabled:
+            tracer.emit(f"Sending Push: {message}")
+
+    def send_many(self, messages: Sequence[str]):
+        if tracer.enabled:
+            tracer.emit(f"Sending {len(messages)} Push message(s) in one batch")
 
 
 ## Creator & Concrete Creators
-class NotificationCreator(ABC):
-    """Factory Class, It creates the notification objects"""
+class NotificationCreator(PolicyCreatorMixin, ABC):
+    """Factory Class, It creates the notification objects, optionally reusing them through a creation policy"""
 
     @abstractmethod
     def create_notification(self) -> NotificationInterface:
@@ -67,9 +124,42 @@ class NotificationCreator(ABC):
 
     def notify_user(self, message: str):
         """Main business logic, It creates the notification object and sends the message"""
-        notification = self.create_notification()
-        formatted_message = notification.format_message(message)
-        notification.send(formatted_message)
+        with self.checkout_product(self.create_notification) as notification:
+            formatted_message = notification.format_message(message)
+            notification.send(formatted_message)
+
+    def notify_many(self, messages: Iterable[str], chunk_size: int = 1000) -> int:
+        """
+        Bulk business logic, It creates the notification object once and sends the messages in chunks.
+        Messages may be any iterable, a generator is consumed one chunk at a time. Returns the number sent.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        messages = iter(messages)
+        sent = 0
+        with self.checkout_product(self.create_notification) as notification:
+            while chunk := list(islice(messages, chunk_size)):
+                notification.send_many(notification.format_many(chunk))
+                sent += len(chunk)
+        return sent
+
+    def notify_records(self, template: MessageTemplate, records: Iterable[Mapping[str, Any]],
+                       chunk_size: int = 1000) -> int:
+        """
+        Personalized bulk business logic, It renders the template for every recipient record and sends the
+        messages in chunks. The records are streamed, only one chunk is rendered at a time. Returns the number sent.
+        """
+        sent = 0
+        with self.checkout_product(self.create_notification) as notification:
+            personalized = notification.personalize(template)
+            if personalized is None:
+                chunks = (notification.format_many(chunk) for chunk in template.stream(records, chunk_size))
+            else:
+                chunks = personalized.stream(records, chunk_size)
+            for chunk in chunks:
+                notification.send_many(chunk)
+                sent += len(chunk)
+        return sent
 
 
 class EmailNotificationCreator(NotificationCreator):
@@ -92,8 +182,19 @@ class PushNotificationCreator(NotificationCreator):
 
 
 if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
     email_creator = EmailNotificationCreator()
     email_creator.notify_user("Hello, this is an email notification")
 
     sms_creator = SMSNotificationCreator()
-    sms_creator.notify_user("Hello, this is an SMS notification")
\ No newline at end of file
+    sms_creator.creation_policy = SingletonPolicy()  # SMSNotification is stateless, one instance is enough
+    sms_creator.notify_user("Hello, this is an SMS notification")
+    sms_creator.notify_user("Hello again, this SMS reused the same notification object")
+
+    push_creator = PushNotificationCreator()
+    push_creator.notify_many((f"Campaign message #{number}" for number in range(2500)), chunk_size=1000)
+
+    campaign = MessageTemplate("Hi {name}, your order #{order_id} has shipped")
+    email_creator.notify_records(campaign, [{"name": "Ada", "order_id": 1001}], chunk_size=1)
+    recipients = ({"name": f"Customer {number}", "order_id": number} for number in range(10_000))
+    email_creator.notify_records(campaign, recipients, chunk_size=5000)
@@ -0,0 +1,137 @@
+"""
+Columnar storage for pending payment transactions.
+
+Millions of pending transactions as creator objects cost several Python objects each. PaymentBatch keeps
+them as columns in typed arrays instead:
+    - `methods`: the payment method of every transaction, an index into PAYMENT_METHODS (array "B").
+    - `amounts`: the amounts (array "d").
+    - `fields`: one column per detail field (card number, email, wallet address, ...). The strings are
+      interned in a table shared by the batch, the columns only hold their indexes (array "I"), so an
+      account with many transactions stores its details once.
+
+Indexing the batch returns a PaymentView, a two-slot object that reads the columns on demand and only
+builds a creator when the transaction is executed.
+
+    batch = PaymentBatch()
+    batch.append(CreditCardPaymentCreator("4111111111111111", "123", "12/30"), 49.99)
+    batch[0].execute_transaction()
+"""
+# Import libraries
+from __future__ import annotations
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple, Type
+
+from src.common.tracing import PrintSink, tracer
+from src.creational.factory_method.payment_example import (
+    CardDetails, CreditCardPaymentCreator, CryptocurrencyPaymentCreator, PayPalDetails, PaymentCreator,
+    PaypalPaymentCreator, TransactionResult, WalletDetails,
+)
+
+
+# Method code -> (creator class, details type). The codes are stored in the batch, only append new methods.
+PAYMENT_METHODS: Tuple[Tuple[Type[PaymentCreator], Type[NamedTuple]], ...] = (
+    (CreditCardPaymentCreator, CardDetails),
+    (PaypalPaymentCreator, PayPalDetails),
+    (CryptocurrencyPaymentCreator, WalletDetails),
+)
+_METHOD_CODES: Dict[type, int] = {details: code for code, (_, details) in enumerate(PAYMENT_METHODS)}
+_FIELD_COLUMNS = max(len(details._fields) for _, details in PAYMENT_METHODS)
+
+
+class PaymentView:
+    """Lightweight view of one transaction of a PaymentBatch"""
+    __slots__ = ("batch", "index")
+
+    def __init__(self, batch: PaymentBatch, index: int):
+        self.batch = batch
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"PaymentView({self.method.__name__}, {self.amount!r}, {self.details!r})"
+
+    @property
+    def method(self) -> Type[PaymentCreator]:
+        return PAYMENT_METHODS[self.batch.methods[self.index]][0]
+
+    @property
+    def amount(self) -> float:
+        return self.batch.amounts[self.index]
+
+    @property
+    def details(self) -> NamedTuple:
+        return self.batch.details(self.index)
+
+    def creator(self) -> PaymentCreator:
+        return self.method(*self.details)
+
+    def execute_transaction(self) -> TransactionResult:
+        return self.creator().execute_transaction(self.amount)
+
+
+class PaymentBatch:
+    """Pending transactions stored column by column"""
+    def __init__(self):
+        self.methods = array("B")
+        self.amounts = array("d")
+        self.fields: Tuple[array, ...] = tuple(array("I") for _ in range(_FIELD_COLUMNS))
+        self._strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+
+    def _intern(self, value: str) -> int:
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self._strings)
+            self._strings.append(value)
+        return string_id
+
+    def append(self, creator: PaymentCreator, amount: float):
+        code = _METHOD_CODES.get(type(creator.details))
+        if code is None:
+            raise TypeError(f"{type(creator).__name__} cannot be stored in a PaymentBatch")
+        self.methods.append(code)
+        self.amounts.append(amount)
+        values = creator.details
+        for column, field in enumerate(self.fields):
+            field.append(self._intern(values[column]) if column < len(values) else 0)
+
+    def extend(self, transactions: Iterable[Tuple[PaymentCreator, float]]):
+        for creator, amount in transactions:
+            self.append(creator, amount)
+
+    def details(self, index: int) -> NamedTuple:
+        details_type = PAYMENT_METHODS[self.methods[index]][1]
+        strings = self._strings
+        return details_type(*(strings[self.fields[column][index]] for column in range(len(details_type._fields))))
+
+    def __len__(self) -> int:
+        return len(self.methods)
+
+    def __getitem__(self, index: int) -> PaymentView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PaymentBatch index out of range")
+        return PaymentView(self, index)
+
+    def __iter__(self) -> Iterator[PaymentView]:
+        for index in range(len(self)):
+            yield PaymentView(self, index)
+
+    def total_amount(self) -> float:
+        return sum(self.amounts)
+
+    def nbytes(self) -> int:
+        """Size of the columns, without the interned strings"""
+        columns = (self.methods, self.amounts, *self.fields)
+        return sum(column.itemsize * len(column) for column in columns)
+
+
+if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
+    batch = PaymentBatch()
+    batch.extend((CreditCardPaymentCreator(card_number="4111111111111111", cvv="123", expiry="12/30"), 10.0 + number)
+                 for number in range(1000))
+    batch.append(PaypalPaymentCreator(email="buyer@example.com", auth_token="token"), 25.0)
+    print(batch[-1])
+    print(batch[0].execute_transaction())
+    print(f"{len(batch)} transactions totalling ${batch.total_amount():,.2f} in {batch.nbytes():,} bytes of columns")
@@ -13,16 +13,42 @@ Each notification type should have:
     3. A generate_receipt(amount: float) method that returns a formatted receipt string
 """
 # Import libraries
+import hashlib
+import time
 from abc import ABC, abstractmethod
+from typing import Hashable, NamedTuple, Optional
+
+from src.common.tracing import PrintSink, tracer
+from src.creational.factory_method.card_validation import CardRejection, validate_card
+from src.creational.factory_method.creation_policy import CreationPolicy, LRUPolicy, PolicyCreatorMixin
+from src.creational.factory_method.receipt_sink import ReceiptSink
+
+
+## Payment details
+class CardDetails(NamedTuple):
+    card_number: str
+    cvv: str
+    expiry: str
+
+
+class PayPalDetails(NamedTuple):
+    email: str
+    auth_token: str
+
+
+class WalletDetails(NamedTuple):
+    wallet_address: str
+    blockchain_network: str
 
 
 ## Product & Concrete Products
 class PaymentInterface(ABC):
     """Product interface, abstract implementation of payment products"""
+    __slots__ = ()
 
     @abstractmethod
     def validate_payment_details(self):
-        """Validated payment information"""
+        """Validated payment information, returns the rejection reasons or a falsy value when it is valid"""
         pass
 
     @abstractmethod
@@ -31,115 +57,260 @@ class PaymentInterface(ABC):
         pass
 
     @abstractmethod
-    def generate_receipt(self, amount: float, status: str):
-        """Generates a receipt for the payment"""
+    def generate_receipt(self, amount: float, status: str) -> str:
+        """Generates and returns a receipt for the payment"""
         pass
 
 
 class CreditCardPayment(PaymentInterface):
     """Concrete product for creditcard payment"""
+    __slots__ = ("card_number", "cvv", "expiry")
+
     def __init__(self, card_number: str, cvv: str, expiry: str):
         self.card_number = card_number
         self.cvv = cvv
         self.expiry = expiry
 
-    def validate_payment_details(self):
-        print(f"Validating Card ending with {self.card_number[-4:]}")
+    def validate_payment_details(self) -> CardRejection:
+        """Check the card details, see validate_cards() in card_validation.py to check many cards at once"""
+        reasons = validate_card(self.card_number, self.cvv, self.expiry)
+        if tracer.enabled:
+            tracer.emit(f"Validating Card ending with {self.card_number[-4:]}: {reasons!r}" if reasons
+                        else f"Validating Card ending with {self.card_number[-4:]}")
+        return reasons
 
     def process_payment(self, amount: float):
-        print(f"Processing ${amount:,} with card ending with {self.card_number[-4:]}")
+        if tracer.enabled:
+            tracer.emit(f"Processing ${amount:,} with card ending with {self.card_number[-4:]}")
         return "Successful"
 
-    def generate_receipt(self, amount: float, status: str):
-        print(f"Payment of ${amount:,} with card ending with {self.card_number[-4:]} was {status}")
+    def generate_receipt(self, amount: float, status: str) -> str:
+        receipt = f"Payment of ${amount:,} with card ending with {self.card_number[-4:]} was {status}"
+        if tracer.enabled:
+            tracer.emit(receipt)
+        return receipt
 
 
 class PayPalPayment(PaymentInterface):
     """Concrete product for PayPal payment"""
+    __slots__ = ("email", "auth_token")
+
     def __init__(self, email: str, auth_token: str):
         self.email = email
         self.auth_token = auth_token
 
     def validate_payment_details(self):
-        print(f"validating PayPal account with email {self.email}")
+        if tracer.enabled:
+            tracer.emit(f"validating PayPal account with email {self.email}")
 
     def process_payment(self, amount: float):
-        print(f"Processing ${amount:,} with PayPal account {self.email}")
+        if tracer.enabled:
+            tracer.emit(f"Processing ${amount:,} with PayPal account {self.email}")
         return "Failed"
 
-    def generate_receipt(self, amount: float, status: str):
-        print(f"Payment of ${amount:,} with PayPal account {self.email} was {status}")
+    def generate_receipt(self, amount: float, status: str) -> str:
+        receipt = f"Payment of ${amount:,} with PayPal account {self.email} was {status}"
+        if tracer.enabled:
+            tracer.emit(receipt)
+        return receipt
 
 
 class CryptocurrencyPayment(PaymentInterface):
     """Concrete product for Cryptocurrency payment"""
+    __slots__ = ("wallet_address", "blockchain_network")
+
     def __init__(self, wallet_address: str, blockchain_network: str):
         self.wallet_address = wallet_address
         self.blockchain_network = blockchain_network
 
     def validate_payment_details(self):
-        print(f"validating wallet ending with {self.wallet_address[-8:]}")
+        if tracer.enabled:
+            tracer.emit(f"validating wallet ending with {self.wallet_address[-8:]}")
 
     def process_payment(self, amount: float):
-        print(f"Processing ${amount:,} with wallet ending with {self.wallet_address[-8:]}")
+        if tracer.enabled:
+            tracer.emit(f"Processing ${amount:,} with wallet ending with {self.wallet_address[-8:]}")
         return "Successful"
 
-    def generate_receipt(self, amount: float, status: str):
-        print(f"Payment of ${amount:,} with wallet ending with {self.wallet_address[-8:]} was {status}")
+    def generate_receipt(self, amount: float, status: str) -> str:
+        receipt = f"Payment of ${amount:,} with wallet ending with {self.wallet_address[-8:]} was {status}"
+        if tracer.enabled:
+            tracer.emit(receipt)
+        return receipt
+
+
+
+# Status of a transaction whose payment details failed validation, it is never processed.
+REJECTED = "Rejected"
+
 
+class TransactionResult(NamedTuple):
+    """Outcome of one transaction"""
+    status: str
+    receipt: Optional[str]
 
 
 # Creator and Concreate creators
-class PaymentCreator(ABC):
-    """Factory class for creating processing objects"""
+class PaymentCreator(PolicyCreatorMixin, ABC):
+    """
+    Factory class for creating processing objects, optionally reusing them through a creation policy.
+    Receipts are stored in `receipt_sink` when one is set. Creators and products use __slots__, millions of
+    them can be pending at once.
+    """
+    # The slots sit behind properties so that creators which never call super().__init__() read None.
+    __slots__ = ("_creation_policy", "_receipt_sink")
+
+    @property
+    def creation_policy(self) -> Optional[CreationPolicy]:
+        return getattr(self, "_creation_policy", None)
+
+    @creation_policy.setter
+    def creation_policy(self, policy: Optional[CreationPolicy]):
+        self._creation_policy = policy
+
+    @property
+    def receipt_sink(self) -> Optional[ReceiptSink]:
+        return getattr(self, "_receipt_sink", None)
+
+    @receipt_sink.setter
+    def receipt_sink(self, sink: Optional[ReceiptSink]):
+        self._receipt_sink = sink
 
     @abstractmethod
     def create_payment_service(self) -> PaymentInterface:
         """Factory method to return a payment object"""
         pass
 
-
-    def execute_transaction(self, amount: float):
+    def account_key(self) -> Hashable:
+        """
+        Identifies the paying account, transactions of one account must be processed in order. Defaults to
+        product_key(), creators without constructor arguments put all of their transactions in one account.
+        """
+        return self.product_key()
+
+    @property
+    def details(self) -> tuple:
+        """
+        The payment details as a tuple, in the order of the constructor arguments. Empty by default, such
+        creators cannot be stored in a PaymentBatch or sent to another process.
+        """
+        return ()
+
+    def masked_account(self) -> str:
+        """
+        A reference to the account that is safe to store and log. Defaults to a short hash of account_key(),
+        creators override it to show the last characters of the account instead.
+        """
+        return hashlib.sha256(repr(self.account_key()).encode()).hexdigest()[:16]
+
+    def execute_transaction(self, amount: float) -> TransactionResult:
         """Main business logic to execute the transaction"""
-        payment_service = self.create_payment_service()
-        payment_service.validate_payment_details()
-        process_result = payment_service.process_payment(amount)
-        payment_service.generate_receipt(amount, process_result)
+        with self.checkout_product(self.create_payment_service) as payment_service:
+            if payment_service.validate_payment_details():
+                process_result = REJECTED
+            else:
+                process_result = payment_service.process_payment(amount)
+            receipt = payment_service.generate_receipt(amount, process_result)
+        result = TransactionResult(process_result, receipt)
+        self.store_receipt(amount, result)
+        return result
+
+    def store_receipt(self, amount: float, result: TransactionResult):
+        """Hand the receipt to the receipt sink, if there is one"""
+        if self.receipt_sink is not None:
+            self.receipt_sink.append({"at": time.time(), "method": type(self).__name__, "account": self.masked_account(),
+                                      "amount": amount, "status": result.status, "receipt": result.receipt})
 
 
 class CreditCardPaymentCreator(PaymentCreator):
     """Concrete creator for creditcard payment"""
+    __slots__ = ("card_number", "cvv", "expiry")
+
     def __init__(self, card_number: str, cvv: str, expiry: str):
+        super().__init__()
         self.card_number = card_number
         self.cvv = cvv
         self.expiry = expiry
 
+    @property
+    def details(self) -> CardDetails:
+        return CardDetails(self.card_number, self.cvv, self.expiry)
+
     def create_payment_service(self) -> PaymentInterface:
         return CreditCardPayment(card_number=self.card_number, cvv=self.cvv, expiry=self.expiry)
 
+    def product_key(self) -> Hashable:
+        return type(self), self.card_number, self.cvv, self.expiry
+
+    def account_key(self) -> Hashable:
+        return self.card_number
+
+    def masked_account(self) -> str:
+        return f"card ending with {self.card_number[-4:]}"
+
 
 class PaypalPaymentCreator(PaymentCreator):
     """Concrete creator for PayPal payment"""
+    __slots__ = ("email", "auth_token")
 
     def __init__(self, email: str, auth_token: str):
+        super().__init__()
         self.email = email
         self.auth_token = auth_token
 
+    @property
+    def details(self) -> PayPalDetails:
+        return PayPalDetails(self.email, self.auth_token)
+
     def create_payment_service(self) -> PaymentInterface:
         return PayPalPayment(email=self.email, auth_token=self.auth_token)
 
+    def product_key(self) -> Hashable:
+        return type(self), self.email, self.auth_token
+
+    def account_key(self) -> Hashable:
+        return self.email
+
+    def masked_account(self) -> str:
+        user, _, domain = self.email.partition("@")
+        return f"PayPal account {user[:1]}***@{domain}"
+
 
 class CryptocurrencyPaymentCreator(PaymentCreator):
     """Concrete creator for PayPal payment"""
+    __slots__ = ("wallet_address", "blockchain_network")
 
     def __init__(self, wallet_address: str, blockchain_network: str):
+        super().__init__()
         self.wallet_address = wallet_address
         self.blockchain_network = blockchain_network
 
+    @property
+    def details(self) -> WalletDetails:
+        return WalletDetails(self.wallet_address, self.blockchain_network)
+
     def create_payment_service(self) -> PaymentInterface:
         return CryptocurrencyPayment(wallet_address=self.wallet_address, blockchain_network=self.blockchain_network)
 
+    def product_key(self) -> Hashable:
+        return type(self), self.wallet_address, self.blockchain_network
+
+    def account_key(self) -> Hashable:
+        return self.blockchain_network, self.wallet_address
+
+    def masked_account(self) -> str:
+        return f"{self.blockchain_network} wallet ending with {self.wallet_address[-8:]}"
+
 
 if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
     cryptocurrency_payment_processor = CryptocurrencyPaymentCreator(wallet_address="abcdefghigklmnop", blockchain_network="Tron")
     cryptocurrency_payment_processor.execute_transaction(300000.00)
+
+    # Creators with the same arguments share the cached payment object through one LRU policy.
+    payment_objects = LRUPolicy(maxsize=1024)
+    for _ in range(2):
+        card_payment_processor = CreditCardPaymentCreator(card_number="4111111111111111", cvv="123", expiry="12/30")
+        card_payment_processor.creation_policy = payment_objects
+        card_payment_processor.execute_transaction(49.99)
+    print(f"Creation policy: {payment_objects.stats()}")
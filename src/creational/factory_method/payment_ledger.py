@@ -0,0 +1,366 @@
+"""
+Write-ahead ledger for payment state transitions.
+
+execute_transaction() keeps the state of a transaction in local variables only: a crash between
+process_payment() and generate_receipt() loses whether the customer was charged. LedgerPaymentExecutor
+writes every transition to a PaymentLedger first:
+    BEGIN (method, masked account, amount, reference) -> VALIDATED -> PROCESSED (status) -> RECEIPTED (receipt)
+and ABORTED when validation or processing raised before a status was known. A transaction whose details
+fail validation skips VALIDATED and is PROCESSED with the REJECTED status, it is never charged.
+
+The ledger is an append-only, memory-mapped file that is preallocated (and doubled when it fills up):
+    - Records are written straight into the map. Once written they survive a crash of the process, the
+      kernel owns the pages, only an OS crash or power loss can lose records that were not synced yet.
+    - Durability uses group commit. commit(lsn) waits until a background thread has synced the map up to
+      that position. Every thread that waits while a sync is running is covered by the next one, so with
+      many concurrent transactions one msync covers many of them. Only the PROCESSED record is committed
+      before the receipt is generated, the other transitions ride along with it.
+    - checkpoint() copies the latest records of the pending transactions into a fresh file of `initial_size`
+      that replaces the ledger, so under continuous traffic the file only grows with the transactions in
+      flight, not with the ones already finished.
+    - recover() scans the records once, CRC-checking each one, and returns the transactions that did not
+      reach RECEIPTED or ABORTED. LedgerPaymentExecutor.recover() finishes them: PROCESSED transactions get
+      their receipt, earlier ones are executed again (at-least-once, like any retry of process_payment()).
+    - The payment details never reach the file, BEGIN only holds the payment method, masked_account() and
+      the caller's `reference` (e.g. the order id). On recovery a `resolve` callback gets every pending
+      transaction and returns its creator, with the card, CVV or token looked up wherever they are kept.
+
+File layout: a 32 byte header (magic) followed by records made of a 4 byte length, a 4 byte CRC32, an
+8 byte transaction id, a 1 byte state and a JSON payload.
+"""
+# Import libraries
+from __future__ import annotations
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from enum import IntEnum
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from src.common.tracing import PrintSink, tracer
+from src.creational.factory_method.creation_policy import CreationPolicy
+from src.creational.factory_method.payment_batch import PAYMENT_METHODS
+from src.creational.factory_method.payment_example import (
+    REJECTED, CreditCardPaymentCreator, PaymentCreator, PaypalPaymentCreator, TransactionResult,
+)
+from src.creational.factory_method.receipt_sink import ReceiptSink
+
+
+_HEADER = struct.Struct("<8s24x")
+_RECORD = struct.Struct("<IIQB")
+_MAGIC = b"PAYWAL02"
+_METHOD_CODES = {creator_type: code for code, (creator_type, _) in enumerate(PAYMENT_METHODS)}
+
+
+class TransactionState(IntEnum):
+    BEGIN = 1
+    VALIDATED = 2
+    PROCESSED = 3
+    RECEIPTED = 4
+    ABORTED = 5
+
+
+class PendingTransaction(NamedTuple):
+    """A transaction found incomplete by the recovery scan, `account` is the creator's masked_account()"""
+    transaction_id: int
+    state: TransactionState
+    method: Type[PaymentCreator]
+    account: str
+    amount: float
+    reference: Any
+    status: Optional[str]
+
+
+class PaymentLedger:
+    """Preallocated, memory-mapped write-ahead log with group commit"""
+    def __init__(self, path: str, initial_size: int = 64 << 20):
+        self.path = path
+        self.initial_size = max(initial_size, 1 << 16)
+        self.syncs = 0
+        self.commits = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._committed = threading.Condition()
+        self._closed = False
+        self._requested = 0
+        self._epoch = 0
+
+        exists = os.path.exists(path) and os.path.getsize(path) >= _HEADER.size
+        self._file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            self._file.truncate(self.initial_size)
+            self._file.write(_HEADER.pack(_MAGIC))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if _HEADER.unpack_from(self._map, 0)[0] != _MAGIC:
+            raise ValueError(f"{path} is not a payment ledger")
+
+        # The recovery scan finds the end of the valid records and the next transaction id.
+        self.end = _HEADER.size
+        self._last_id = 0
+        self._states: Dict[int, Tuple[TransactionState, Dict[str, Any]]] = {}
+        for transaction_id, state, payload in self._scan():
+            self._track(transaction_id, state, payload)
+            self._last_id = max(self._last_id, transaction_id)
+        self.durable = self.end
+
+        self._committer = threading.Thread(target=self._commit_loop, name="ledger-committer", daemon=True)
+        self._committer.start()
+
+    # Records
+    def _scan(self) -> Iterator[Tuple[int, TransactionState, Any]]:
+        """Yield the valid records from the start and advance `end` past them, stops at the first bad one"""
+        while self.end + _RECORD.size <= len(self._map):
+            length, checksum, transaction_id, state = _RECORD.unpack_from(self._map, self.end)
+            start = self.end + _RECORD.size
+            if length == 0 or start + length > len(self._map):
+                return
+            with memoryview(self._map) as view, view[self.end + 8:start + length] as covered:
+                if zlib.crc32(covered) != checksum:
+                    return  # Torn write at the end of the log
+            payload = json.loads(self._map[start:start + length])
+            self.end = start + length
+            yield transaction_id, TransactionState(state), payload
+
+    def _track(self, transaction_id: int, state: TransactionState, payload: Any):
+        if state == TransactionState.BEGIN:
+            self._states[transaction_id] = (state, {"begin": payload})
+        elif state in (TransactionState.RECEIPTED, TransactionState.ABORTED):
+            self._states.pop(transaction_id, None)
+        elif transaction_id in self._states:
+            self._states[transaction_id] = (state, {**self._states[transaction_id][1], "status": payload})
+
+    @staticmethod
+    def _encode(transaction_id: int, state: TransactionState, payload: Any) -> bytes:
+        data = json.dumps(payload, separators=(",", ":")).encode()
+        body = struct.pack("<QB", transaction_id, state) + data
+        return struct.pack("<II", len(data), zlib.crc32(body)) + body
+
+    def append(self, transaction_id: int, state: TransactionState, payload: Any = None) -> int:
+        """Write a record and return its log sequence number, pass it to commit() to make it durable"""
+        record = self._encode(transaction_id, state, payload)
+        while True:
+            with self._lock:
+                if self.end + len(record) <= len(self._map):
+                    self._map[self.end:self.end + len(record)] = record
+                    self.end += len(record)
+                    self._track(transaction_id, state, payload)
+                    return self.end
+            self._grow(len(record))
+
+    def _grow(self, needed: int):
+        # The committer holds _flush_lock while it syncs the map, so the map is never replaced under it.
+        with self._flush_lock, self._lock:
+            size = len(self._map)
+            if self.end + needed <= size:
+                return
+            while size < self.end + needed:
+                size *= 2
+            self._map.flush()
+            self._map.close()
+            self._file.truncate(size)
+            os.fsync(self._file.fileno())
+            self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def begin(self, creator: PaymentCreator, amount: float, reference: Any = None) -> int:
+        """
+        Log the start of a transaction and return its id. `reference` is any JSON value the caller can find
+        the payment details by on recovery, the details themselves are not logged.
+        """
+        code = _METHOD_CODES.get(type(creator))
+        if code is None:
+            raise TypeError(f"{type(creator).__name__} cannot be logged in the payment ledger")
+        with self._lock:
+            self._last_id += 1
+            transaction_id = self._last_id
+        self.append(transaction_id, TransactionState.BEGIN, [code, creator.masked_account(), amount, reference])
+        return transaction_id
+
+    # Group commit
+    def commit(self, lsn: int):
+        """Wait until everything up to the log sequence number is synced to disk"""
+        with self._committed:
+            # An lsn past the end was handed out before a checkpoint, which synced everything first.
+            if self.durable >= lsn or lsn > self.end:
+                return
+            if lsn > self._requested:
+                self._requested = lsn
+                self._committed.notify_all()
+            self.commits += 1
+            epoch = self._epoch
+            while self.durable < lsn and self._epoch == epoch and not self._closed:
+                self._committed.wait()
+
+    def _commit_loop(self):
+        page = mmap.ALLOCATIONGRANULARITY
+        while True:
+            with self._committed:
+                while self._requested <= self.durable and not self._closed:
+                    self._committed.wait()
+                if self._closed:
+                    return
+            # The target is recorded before the flush lock is released, a checkpoint cannot rewind the log
+            # between the sync and the update of `durable`.
+            with self._flush_lock:
+                with self._lock:
+                    target = self.end
+                start = self.durable // page * page
+                self._map.flush(start, target - start)
+                with self._committed:
+                    self.durable = target
+                    self.syncs += 1
+                    self._committed.notify_all()
+
+    # Recovery
+    def pending(self) -> List[PendingTransaction]:
+        """Transactions that started but neither reached RECEIPTED nor ABORTED"""
+        with self._lock:
+            states = list(self._states.items())
+        pending = []
+        for transaction_id, (state, data) in states:
+            code, account, amount, reference = data["begin"]
+            pending.append(PendingTransaction(transaction_id, state, PAYMENT_METHODS[code][0], account, amount,
+                                              reference, data.get("status")))
+        return pending
+
+    def checkpoint(self) -> int:
+        """
+        Compact the ledger: the BEGIN record and the latest transition of every pending transaction are
+        written to a fresh file, which replaces the ledger once it is synced. Returns the number of
+        transactions carried over.
+        """
+        with self._flush_lock, self._lock:
+            records = []
+            for transaction_id, (state, data) in self._states.items():
+                records.append(self._encode(transaction_id, TransactionState.BEGIN, data["begin"]))
+                if state != TransactionState.BEGIN:
+                    records.append(self._encode(transaction_id, state, data.get("status")))
+            records = b"".join(records)
+            size = self.initial_size
+            while size < _HEADER.size + len(records):
+                size *= 2
+            temporary = self.path + ".compact"
+            with open(temporary, "w+b") as compacted:
+                compacted.truncate(size)
+                compacted.write(_HEADER.pack(_MAGIC) + records)
+                compacted.flush()
+                os.fsync(compacted.fileno())
+            self._map.close()
+            self._file.close()
+            os.replace(temporary, self.path)
+            self._file = open(self.path, "r+b")
+            self._map = mmap.mmap(self._file.fileno(), 0)
+            with self._committed:
+                self.end = self.durable = self._requested = _HEADER.size + len(records)
+                # Commits still waiting were covered: their transactions are either complete or were copied.
+                self._epoch += 1
+                self._committed.notify_all()
+            return len(self._states)
+
+    def close(self):
+        with self._committed:
+            self._closed = True
+            self._committed.notify_all()
+        self._committer.join()
+        with self._flush_lock, self._lock:
+            self._map.flush()
+            self.durable = self.end
+            self._map.close()
+            self._file.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"bytes": self.end, "pending": len(self._states), "commits": self.commits, "syncs": self.syncs,
+                "commits_per_sync": self.commits / self.syncs if self.syncs else 0.0}
+
+
+class LedgerPaymentExecutor:
+    """Runs execute_transaction()'s steps with every state transition logged in the ledger first"""
+    def __init__(self, ledger: PaymentLedger):
+        self.ledger = ledger
+
+    def execute_transaction(self, creator: PaymentCreator, amount: float, reference: Any = None) -> TransactionResult:
+        """Execute the transaction, `reference` is logged to find its payment details on recovery"""
+        return self._run(creator, amount, self.ledger.begin(creator, amount, reference))
+
+    def _run(self, creator: PaymentCreator, amount: float, transaction_id: int,
+             status: Optional[str] = None) -> TransactionResult:
+        ledger = self.ledger
+        with creator.checkout_product(creator.create_payment_service) as payment_service:
+            if status is None:
+                try:
+                    if payment_service.validate_payment_details():
+                        status = REJECTED
+                    else:
+                        ledger.append(transaction_id, TransactionState.VALIDATED)
+                        status = payment_service.process_payment(amount)
+                except BaseException:
+                    ledger.append(transaction_id, TransactionState.ABORTED)
+                    raise
+                # The status must be durable before anyone sees a receipt for it.
+                ledger.commit(ledger.append(transaction_id, TransactionState.PROCESSED, status))
+            receipt = payment_service.generate_receipt(amount, status)
+        ledger.append(transaction_id, TransactionState.RECEIPTED, receipt)
+        result = TransactionResult(status, receipt)
+        creator.store_receipt(amount, result)
+        return result
+
+    def recover(self, resolve: Callable[[PendingTransaction], PaymentCreator],
+                receipt_sink: Optional[ReceiptSink] = None,
+                creation_policy: Optional[CreationPolicy] = None) -> List[Tuple[int, TransactionResult]]:
+        """
+        Finish the transactions a crash left incomplete, returns (transaction id, result) pairs. `resolve`
+        builds the creator of a pending transaction from its method and reference, the receipt sink and the
+        creation policy are given to the creators that do not have their own.
+        """
+        results = []
+        for pending in self.ledger.pending():
+            creator = resolve(pending)
+            if creator.receipt_sink is None:
+                creator.receipt_sink = receipt_sink
+            if creator.creation_policy is None:
+                creator.creation_policy = creation_policy
+            status = pending.status if pending.state == TransactionState.PROCESSED else None
+            if tracer.enabled:
+                tracer.emit(f"Recovering transaction {pending.transaction_id} of {pending.account} "
+                            f"from {pending.state.name}")
+            results.append((pending.transaction_id, self._run(creator, pending.amount, pending.transaction_id,
+                                                              status)))
+        return results
+
+
+if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "payments.wal")
+        ledger = PaymentLedger(path, initial_size=1 << 20)
+        card = CreditCardPaymentCreator(card_number="4111111111111111", cvv="123", expiry="12/30")
+        paypal = PaypalPaymentCreator(email="buyer@example.com", auth_token="token")
+
+        # Simulate a crash: one transaction stopped after PROCESSED, another one right after BEGIN.
+        charged = ledger.begin(card, 99.0, reference="order-1001")
+        ledger.append(charged, TransactionState.VALIDATED)
+        ledger.commit(ledger.append(charged, TransactionState.PROCESSED, "Successful"))
+        ledger.begin(paypal, 15.0, reference="order-1002")
+        ledger.close()
+
+        # The orders' payment details come back from wherever the application keeps them, not from the ledger.
+        orders = {"order-1001": card, "order-1002": paypal}
+        ledger = PaymentLedger(path)
+        executor = LedgerPaymentExecutor(ledger)
+        for transaction_id, result in executor.recover(lambda pending: orders[pending.reference]):
+            print(transaction_id, result)
+
+        # Concurrent transactions share their syncs.
+        tracer.set_sink(None)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            list(pool.map(lambda number: executor.execute_transaction(card, float(number)), range(20_000)))
+        elapsed = time.perf_counter() - started
+        print(f"20,000 durable transactions in {elapsed:.2f}s, {ledger.stats()}")
+        ledger.close()
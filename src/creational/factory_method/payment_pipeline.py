@@ -0,0 +1,227 @@
+"""
+Pipelined transaction engine for payment creators.
+
+PaymentCreator.execute_transaction() runs validate_payment_details(), process_payment() and
+generate_receipt() back to back, one transaction at a time. During a checkout spike most of that time is
+spent waiting on the gateway, so PaymentPipeline runs the three steps as stages instead:
+    1. Every stage has its own worker threads, set with `workers=(validate, process, receipt)`.
+    2. Every worker has a bounded queue. When a stage falls behind, the stages before it block, so the
+       number of transactions in flight stays bounded by the queue sizes.
+    3. A transaction is routed to a worker by the hash of `creator.account_key()` in every stage. Transactions
+       of the same account always take the same workers in the same FIFO order, so they are validated,
+       charged and receipted in submission order while other accounts overtake them.
+
+A failed stage skips the remaining stages of that transaction and its error is reported with the result.
+A transaction whose details fail validation is not processed, its receipt reports the REJECTED status.
+stream() yields the results as they complete, run() returns them in submission order, and stats() reports
+the throughput and the busy time of every stage. Closing the stream() generator early stops the pipeline,
+the transactions that have not started a stage yet are not run.
+"""
+# Import libraries
+from __future__ import annotations
+import queue
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from src.common.tracing import AsyncSink, PrintSink, tracer
+from src.creational.factory_method.payment_example import (
+    REJECTED, CreditCardPaymentCreator, CryptocurrencyPaymentCreator, PaymentCreator, PaypalPaymentCreator,
+    TransactionResult,
+)
+
+
+_STOP = object()
+
+
+class PipelineResult(NamedTuple):
+    """Result of one transaction, `index` is its position in the submitted stream"""
+    index: int
+    account: Any
+    result: Optional[TransactionResult]
+    error: Optional[BaseException]
+
+
+class _Job:
+    """A transaction travelling through the stages"""
+    __slots__ = ("index", "creator", "amount", "account", "route", "product", "status", "receipt", "error")
+
+    def __init__(self, index: int, creator: PaymentCreator, amount: float):
+        self.index = index
+        self.creator = creator
+        self.amount = amount
+        self.account = creator.account_key()
+        self.route = hash(self.account)
+        self.product = None
+        self.status: Optional[str] = None
+        self.receipt: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+def _validate(job: _Job):
+    job.product = job.creator.acquire_product(job.creator.create_payment_service)
+    if job.product.validate_payment_details():
+        job.status = REJECTED
+
+
+def _process(job: _Job):
+    if job.status is None:
+        job.status = job.product.process_payment(job.amount)
+
+
+def _receipt(job: _Job):
+    job.receipt = job.product.generate_receipt(job.amount, job.status)
+    job.creator.store_receipt(job.amount, TransactionResult(job.status, job.receipt))
+
+
+class _Stage:
+    """Workers, queues and counters of one stage"""
+    def __init__(self, name: str, work: Callable[[_Job], None], workers: int, queue_size: int):
+        if workers < 1:
+            raise ValueError(f"The {name} stage needs at least one worker")
+        self.name = name
+        self.work = work
+        self.queues: List[queue.Queue] = [queue.Queue(queue_size) for _ in range(workers)]
+        self.running = workers
+        self.busy_seconds = 0.0
+        self.completed = 0
+        self.failed = 0
+
+
+class PaymentPipeline:
+    """Runs transactions through the validate, process and receipt stages concurrently"""
+    def __init__(self, workers: Union[int, Sequence[int]] = (2, 8, 2), queue_size: int = 64):
+        if isinstance(workers, int):
+            workers = (workers, workers, workers)
+        if len(workers) != 3:
+            raise ValueError("workers needs one count per stage: (validate, process, receipt)")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.workers = tuple(workers)
+        self.queue_size = queue_size
+        self._stages: List[_Stage] = []
+        self._lock = threading.Lock()
+        self._elapsed = 0.0
+        self._transactions = 0
+
+    def _forward(self, stage_index: int, job: Any, results: queue.Queue):
+        if stage_index == len(self._stages):
+            if job is not _STOP and job.product is not None:
+                job.creator.release_product(job.product)
+                job.product = None
+            results.put(job)
+            return
+        stage = self._stages[stage_index]
+        if job is _STOP:
+            for worker_queue in stage.queues:
+                worker_queue.put(_STOP)
+        else:
+            stage.queues[job.route % len(stage.queues)].put(job)
+
+    def _worker(self, stage_index: int, worker_queue: queue.Queue, results: queue.Queue, stop: threading.Event):
+        stage = self._stages[stage_index]
+        busy = 0.0
+        completed = failed = 0
+        while (job := worker_queue.get()) is not _STOP:
+            # Once stopped, the queued jobs are only passed on so the stop signal still reaches every stage.
+            if job.error is None and not stop.is_set():
+                started = perf_counter()
+                try:
+                    stage.work(job)
+                    completed += 1
+                except Exception as error:
+                    job.error = error
+                    failed += 1
+                busy += perf_counter() - started
+            self._forward(stage_index + 1, job, results)
+        with self._lock:
+            stage.busy_seconds += busy
+            stage.completed += completed
+            stage.failed += failed
+            stage.running -= 1
+            last = stage.running == 0
+        # The last worker to stop passes the stop signal on, by then all of its stage's jobs were forwarded.
+        if last:
+            self._forward(stage_index + 1, _STOP, results)
+
+    def stream(self, transactions: Iterable[Tuple[PaymentCreator, float]]) -> Iterator[PipelineResult]:
+        """Run the (creator, amount) transactions and yield the results as they complete"""
+        stages = (("validate", _validate), ("process", _process), ("receipt", _receipt))
+        self._stages = [_Stage(name, work, count, self.queue_size) for (name, work), count in zip(stages, self.workers)]
+        results: queue.Queue = queue.Queue()
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=self._worker, args=(index, worker_queue, results, stop), daemon=True,
+                             name=f"payment-{stage.name}-{number}")
+            for index, stage in enumerate(self._stages)
+            for number, worker_queue in enumerate(stage.queues)
+        ]
+        feed_error: List[BaseException] = []
+
+        def feed():
+            try:
+                for index, (creator, amount) in enumerate(transactions):
+                    if stop.is_set():
+                        break
+                    self._forward(0, _Job(index, creator, amount), results)
+            except BaseException as error:
+                feed_error.append(error)
+            finally:
+                self._forward(0, _STOP, results)
+
+        feeder = threading.Thread(target=feed, daemon=True, name="payment-feeder")
+        started = perf_counter()
+        self._transactions = 0
+        for thread in threads:
+            thread.start()
+        feeder.start()
+        try:
+            while (job := results.get()) is not _STOP:
+                self._transactions += 1
+                result = None if job.error is not None else TransactionResult(job.status, job.receipt)
+                yield PipelineResult(job.index, job.account, result, job.error)
+        finally:
+            self._elapsed = perf_counter() - started
+            # Also reached when the caller closes the generator early, nothing may keep charging after that.
+            stop.set()
+            feeder.join()
+            for thread in threads:
+                thread.join()
+        if feed_error:
+            raise feed_error[0]
+
+    def run(self, transactions: Iterable[Tuple[PaymentCreator, float]]) -> List[PipelineResult]:
+        """Run the transactions and return the results in submission order"""
+        return sorted(self.stream(transactions), key=lambda result: result.index)
+
+    def stats(self) -> Dict[str, Any]:
+        """Throughput of the last run and the busy time of every stage"""
+        with self._lock:
+            return {
+                "transactions": self._transactions,
+                "elapsed_seconds": self._elapsed,
+                "transactions_per_second": self._transactions / self._elapsed if self._elapsed else 0.0,
+                "stages": {
+                    stage.name: {"workers": len(stage.queues), "completed": stage.completed, "failed": stage.failed,
+                                 "busy_seconds": stage.busy_seconds}
+                    for stage in self._stages
+                },
+            }
+
+
+if __name__ == "__main__":
+    # The stages trace from several threads, AsyncSink keeps the printed lines whole.
+    tracer.set_sink(AsyncSink(PrintSink()))
+    creators = [
+        CreditCardPaymentCreator(card_number="4111111111111111", cvv="123", expiry="12/30"),
+        PaypalPaymentCreator(email="buyer@example.com", auth_token="token"),
+        CryptocurrencyPaymentCreator(wallet_address="abcdefghigklmnop", blockchain_network="Tron"),
+    ]
+    pipeline = PaymentPipeline(workers=(1, 3, 1), queue_size=4)
+    results = pipeline.run((creators[number % 3], 10.0 + number) for number in range(6))
+    tracer.set_sink(None).close()
+    for result in results:
+        print(result.index, result.account, result.result)
+
+    pipeline.run((creators[number % 3], 1.0) for number in range(30_000))
+    print(pipeline.stats())
@@ -0,0 +1,202 @@
+"""
+Buffered, append-only receipt storage.
+
+generate_receipt() only traced its receipt, nothing was kept for reconciliation. A ReceiptSink stores them:
+    1. append() only adds the receipt to an in-memory buffer. The buffer is written with a single write()
+       call once it holds `buffer_size` receipts, on flush(), or every `flush_interval` seconds from a
+       background thread. Receipts are written in the order they were appended.
+    2. Receipts are stored as JSON lines in numbered segment files, receipts-00000001.jsonl and so on. A new
+       segment is started once the current one reaches `max_segment_bytes` or `max_segment_age` seconds.
+    3. fsync is done in groups: at most once per `sync_interval` seconds, and always when a segment is
+       rotated or the sink is closed. Receipts written since the last fsync may be lost on a power failure.
+
+ReceiptReader streams the receipts back segment by segment. A line cut off by a crash at the end of a
+segment is skipped.
+
+    sink = ReceiptSink("/var/lib/payments/receipts")
+    creator.receipt_sink = sink
+"""
+# Import libraries
+from __future__ import annotations
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.common.tracing import PrintSink, tracer
+
+_PREFIX = "receipts-"
+_SUFFIX = ".jsonl"
+
+
+def _segment_name(index: int) -> str:
+    return f"{_PREFIX}{index:08d}{_SUFFIX}"
+
+
+def _segment_indexes(directory: str) -> List[int]:
+    indexes = []
+    for name in os.listdir(directory):
+        if name.startswith(_PREFIX) and name.endswith(_SUFFIX) and name[len(_PREFIX):-len(_SUFFIX)].isdigit():
+            indexes.append(int(name[len(_PREFIX):-len(_SUFFIX)]))
+    return sorted(indexes)
+
+
+class ReceiptSink:
+    """Collects receipts in memory and appends them to rotating segment files in bulk"""
+    def __init__(self, directory: str, buffer_size: int = 4096, max_segment_bytes: int = 64 << 20,
+                 max_segment_age: float = 3600.0, sync_interval: float = 1.0, flush_interval: Optional[float] = 0.5):
+        if buffer_size < 1 or max_segment_bytes < 1:
+            raise ValueError("buffer_size and max_segment_bytes must be at least 1")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.buffer_size = buffer_size
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.sync_interval = sync_interval
+        self.written = 0
+        self.syncs = 0
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._file = None
+        self._segment_bytes = 0
+        self._segment_opened = 0.0
+        self._last_sync = time.monotonic()
+        self._dirty = False
+        indexes = _segment_indexes(directory)
+        self._segment = indexes[-1] if indexes else 0
+        self._open_segment()
+
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if flush_interval:
+            self._flusher = threading.Thread(target=self._flush_periodically, args=(flush_interval,),
+                                             name="receipt-flusher", daemon=True)
+            self._flusher.start()
+
+    @property
+    def segment_path(self) -> str:
+        return os.path.join(self.directory, _segment_name(self._segment))
+
+    def _open_segment(self):
+        # A restarted sink never appends to an older segment, its last line may be torn.
+        self._segment += 1
+        self._file = open(self.segment_path, "ab", buffering=0)
+        self._segment_bytes = 0
+        self._segment_opened = time.monotonic()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+        self._dirty = False
+        self.syncs += 1
+
+    def append(self, receipt: Dict[str, Any]):
+        """Buffer a receipt, it is written once the buffer is full or on the next flush"""
+        line = json.dumps(receipt, separators=(",", ":"), default=str)
+        with self._lock:
+            self._buffer.append(line)
+            full = len(self._buffer) >= self.buffer_size
+        if full:
+            self.flush()
+
+    def flush(self, sync: bool = False):
+        """Write the buffered receipts, and fsync them if `sync` is set"""
+        # The buffer is taken and written under the I/O lock, so the receipts reach the file in append order.
+        with self._io_lock:
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+            self._write(lines, sync)
+
+    def _write(self, lines: List[str], sync: bool = False):
+        """Write the lines to the current segment, called with the I/O lock held"""
+        if self._file is None:
+            raise ValueError("The receipt sink is closed")
+        if lines:
+            data = ("\n".join(lines) + "\n").encode()
+            self._file.write(data)
+            self._segment_bytes += len(data)
+            self.written += len(lines)
+            self._dirty = True
+        now = time.monotonic()
+        if self._segment_bytes >= self.max_segment_bytes or (
+                self._segment_bytes and now - self._segment_opened >= self.max_segment_age):
+            self._sync()
+            self._file.close()
+            self._open_segment()
+        elif self._dirty and (sync or now - self._last_sync >= self.sync_interval):
+            self._sync()
+
+    def _flush_periodically(self, interval: float):
+        while not self._closed.wait(interval):
+            self.flush()
+
+    def close(self):
+        """Write and fsync everything that is buffered, then close the current segment"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush(sync=True)
+        with self._io_lock:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> ReceiptSink:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buffered = len(self._buffer)
+        return {"written": self.written, "buffered": buffered, "syncs": self.syncs, "segment": self._segment}
+
+
+class ReceiptReader:
+    """Streams the stored receipts back in the order they were written"""
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def segments(self) -> List[str]:
+        return [os.path.join(self.directory, _segment_name(index)) for index in _segment_indexes(self.directory)]
+
+    def stream(self, from_segment: int = 0) -> Iterator[Dict[str, Any]]:
+        """Yield every receipt of the segments numbered `from_segment` and up"""
+        for index in _segment_indexes(self.directory):
+            if index < from_segment:
+                continue
+            with open(os.path.join(self.directory, _segment_name(index)), "rb", buffering=1 << 20) as segment:
+                for line in segment:
+                    if not line.endswith(b"\n"):
+                        break  # Torn write at the end of the segment
+                    yield json.loads(line)
+
+
+if __name__ == "__main__":
+    # payment_example imports this module, importing it at the top would be circular.
+    from src.creational.factory_method.payment_example import CreditCardPaymentCreator, PaypalPaymentCreator
+
+    tracer.set_sink(PrintSink())
+    with tempfile.TemporaryDirectory() as directory:
+        with ReceiptSink(directory, max_segment_bytes=1 << 20) as sink:
+            for creator in (CreditCardPaymentCreator(card_number="4111111111111111", cvv="123", expiry="12/30"),
+                            PaypalPaymentCreator(email="buyer@example.com", auth_token="token")):
+                creator.receipt_sink = sink
+                creator.execute_transaction(25.0)
+
+            tracer.set_sink(None)
+            started = time.perf_counter()
+            for number in range(100_000):
+                sink.append({"account": f"account-{number % 97}", "amount": 1.0, "status": "Successful"})
+            sink.flush(sync=True)
+            print(f"Stored 100,000 receipts in {time.perf_counter() - started:.2f}s, {sink.stats()}")
+
+        reader = ReceiptReader(directory)
+        receipts = reader.stream()
+        print(next(receipts))
+        print(f"{sum(1 for _ in receipts) + 1} receipts in {len(reader.segments())} segment(s)")
@@ -0,0 +1,289 @@
+"""
+Rate-limited send scheduler for notification creators.
+
+Providers throttle every channel differently: SMS gateways allow a few messages per second, push services
+thousands. Instead of sleeping in the caller of notify_user(), messages are submitted to a SendScheduler:
+    1. Every channel (the notification product class, e.g. SMSNotification) has its own token bucket.
+    2. Every channel has a priority queue, higher priorities are sent first and equal priorities in
+       submission order.
+    3. The scheduler always sends from a channel that has tokens, so while SMS waits for its next token the
+       push and email queues keep draining. It only sleeps when every non-empty channel is throttled.
+    4. A channel with several tokens available sends a whole batch through format_many() and send_many().
+
+stats() reports the queue wait time and the achieved send rate of every channel. A batch that fails to
+format or send is counted as failed in stats() and the scheduler moves on to the next one.
+
+    scheduler = SendScheduler({SMSNotification: (5, 5), PushNotification: (1000, 200)})
+    scheduler.submit(SMSNotificationCreator(), "Your code is 1234", priority=10)
+    scheduler.run()
+"""
+# Import libraries
+from __future__ import annotations
+import heapq
+import threading
+import time
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.common.metrics import LatencyHistogram
+from src.common.tracing import PrintSink, tracer
+from src.creational.factory_method.notification_example import (
+    EmailNotificationCreator, NotificationCreator, PushNotification, PushNotificationCreator,
+    SMSNotification, SMSNotificationCreator,
+)
+
+
+class TokenBucket:
+    """Allows `rate` operations per second on average and bursts of up to `capacity` operations"""
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1.0, rate if capacity is None else capacity)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def available(self, now: Optional[float] = None) -> float:
+        self._refill(self.clock() if now is None else now)
+        return self._tokens
+
+    def take(self, tokens: float = 1.0, now: Optional[float] = None) -> bool:
+        """Take the tokens if they are available"""
+        self._refill(self.clock() if now is None else now)
+        if self._tokens < tokens:
+            return False
+        self._tokens -= tokens
+        return True
+
+    def delay(self, tokens: float = 1.0, now: Optional[float] = None) -> float:
+        """Seconds until the tokens are available"""
+        self._refill(self.clock() if now is None else now)
+        return max(0.0, (tokens - self._tokens) / self.rate)
+
+
+class _Channel:
+    """Queue, rate limit and counters of one notification product class"""
+    __slots__ = ("name", "bucket", "queue", "wait", "sent", "failed", "throttled", "first_sent", "first_batch",
+                 "last_sent")
+
+    def __init__(self, name: str, bucket: Optional[TokenBucket]):
+        self.name = name
+        self.bucket = bucket
+        self.queue: List[Tuple[int, int, float, NotificationCreator, str]] = []
+        self.wait = LatencyHistogram()
+        self.sent = 0
+        self.failed = 0
+        self.throttled = 0
+        self.first_sent: Optional[float] = None
+        self.first_batch = 0
+        self.last_sent: Optional[float] = None
+
+    def ready(self, now: float) -> int:
+        """Number of messages the rate limit allows right now"""
+        if self.bucket is None:
+            return len(self.queue)
+        return min(len(self.queue), int(self.bucket.available(now)))
+
+
+class SendScheduler:
+    """
+    Sends the submitted messages as fast as the per-channel rate limits allow. `limits` maps a notification
+    product class to (rate per second, burst), channels without a limit use `default_limit` or are unlimited.
+    """
+    def __init__(self, limits: Optional[Dict[type, Tuple[float, Optional[float]]]] = None,
+                 default_limit: Optional[Tuple[float, Optional[float]]] = None, batch_size: int = 100,
+                 clock: Callable[[], float] = time.monotonic):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self.batch_size = batch_size
+        self.clock = clock
+        self._channels: Dict[type, _Channel] = {}
+        self._product_types: Dict[type, type] = {}
+        self._sequence = count()
+        self._pending = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def _channel_for(self, creator: NotificationCreator) -> _Channel:
+        # The channel is the product class. It is looked up once per creator class by building one product.
+        product_type = self._product_types.get(type(creator))
+        if product_type is None:
+            product_type = self._product_types[type(creator)] = type(creator.create_notification())
+        channel = self._channels.get(product_type)
+        if channel is None:
+            limit = self.limits.get(product_type, self.default_limit)
+            bucket = TokenBucket(limit[0], limit[1], self.clock) if limit is not None else None
+            channel = self._channels[product_type] = _Channel(product_type.__name__, bucket)
+        return channel
+
+    def submit(self, creator: NotificationCreator, message: str, priority: int = 0):
+        """Queue a message for the creator's channel, higher priorities are sent first"""
+        with self._condition:
+            channel = self._channel_for(creator)
+            heapq.heappush(channel.queue, (-priority, next(self._sequence), self.clock(), creator, message))
+            self._pending += 1
+            self._condition.notify()
+
+    def pending(self) -> int:
+        with self._condition:
+            return self._pending
+
+    def _next_batch(self) -> Tuple[Optional[_Channel], List[Tuple[Any, ...]], float]:
+        """Pick the ready channel with the most urgent head. Returns (channel, batch, 0) or (None, [], delay)"""
+        now = self.clock()
+        best: Optional[_Channel] = None
+        best_size = 0
+        delay = float("inf")
+        for channel in self._channels.values():
+            if not channel.queue:
+                continue
+            size = channel.ready(now)
+            if size == 0:
+                delay = min(delay, channel.bucket.delay(1.0, now))
+                continue
+            if best is None or channel.queue[0][:2] < best.queue[0][:2]:
+                best, best_size = channel, size
+        if best is None:
+            for channel in self._channels.values():
+                if channel.queue:
+                    channel.throttled += 1
+            return None, [], delay
+        batch = [heapq.heappop(best.queue) for _ in range(min(best_size, self.batch_size))]
+        if best.bucket is not None:
+            best.bucket.take(len(batch), now)
+        self._pending -= len(batch)
+        for _, _, enqueued, _, _ in batch:
+            best.wait.record(now - enqueued)
+        return best, batch, 0.0
+
+    def _send(self, channel: _Channel, batch: List[Tuple[Any, ...]]) -> int:
+        """Send a batch from _next_batch(), returns the number of messages sent. Failed messages are counted"""
+        # Consecutive messages of the same creator go out through one product checkout and one send_many().
+        sent = failed = 0
+        start = 0
+        while start < len(batch):
+            creator = batch[start][3]
+            stop = start + 1
+            while stop < len(batch) and batch[stop][3] is creator:
+                stop += 1
+            try:
+                with creator.checkout_product(creator.create_notification) as notification:
+                    notification.send_many(notification.format_many([entry[4] for entry in batch[start:stop]]))
+                sent += stop - start
+            except Exception as error:
+                failed += stop - start
+                if tracer.enabled:
+                    tracer.emit(f"Failed to send {stop - start} {channel.name} message(s): {error!r}")
+            start = stop
+        now = self.clock()
+        with self._condition:
+            channel.failed += failed
+            if sent:
+                channel.sent += sent
+                if channel.first_sent is None:
+                    channel.first_sent = now
+                    channel.first_batch = sent
+                channel.last_sent = now
+        return sent
+
+    def run(self) -> int:
+        """
+        Send everything that is queued, sleeping only while every non-empty channel is throttled.
+        Returns the number of messages sent, failed messages are not included.
+        """
+        sent = 0
+        while True:
+            with self._condition:
+                if not self._pending:
+                    return sent
+                channel, batch, delay = self._next_batch()
+            if channel is None:
+                time.sleep(delay)
+                continue
+            sent += self._send(channel, batch)
+
+    def start(self):
+        """Send in a background thread until stop() is called"""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="send-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, drain: bool = True):
+        """Stop the background thread, after sending the queued messages if `drain` is set"""
+        if self._thread is None:
+            return
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+        if drain:
+            self.run()
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                channel = None
+                while self._running and channel is None:
+                    if not self._pending:
+                        self._condition.wait()
+                        continue
+                    channel, batch, delay = self._next_batch()
+                    if channel is None:
+                        # A submit to an unthrottled channel wakes the worker before the delay is over.
+                        self._condition.wait(delay)
+                if channel is None:
+                    return
+            self._send(channel, batch)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-channel sent and failed counts, queue depth, queue wait percentiles and achieved send rate. The
+        rate counts the messages sent after the first batch over the time since that batch, the burst of the
+        token bucket can push it above the limit over short runs.
+        """
+        with self._condition:
+            stats = {}
+            for channel in self._channels.values():
+                p50, p99 = channel.wait.percentiles(0.50, 0.99)
+                elapsed = (channel.last_sent or 0.0) - (channel.first_sent or 0.0)
+                stats[channel.name] = {
+                    "sent": channel.sent,
+                    "failed": channel.failed,
+                    "queued": len(channel.queue),
+                    "throttled": channel.throttled,
+                    "limit_per_second": channel.bucket.rate if channel.bucket is not None else None,
+                    "wait_p50_seconds": p50,
+                    "wait_p99_seconds": p99,
+                    "wait_max_seconds": channel.wait.max,
+                    "sent_per_second": (channel.sent - channel.first_batch) / elapsed if elapsed > 0 else None,
+                }
+            return stats
+
+
+if __name__ == "__main__":
+    tracer.set_sink(PrintSink())
+    scheduler = SendScheduler({SMSNotification: (5, 2), PushNotification: (2000, 50)}, batch_size=50)
+    sms_creator, push_creator, email_creator = SMSNotificationCreator(), PushNotificationCreator(), EmailNotificationCreator()
+    for number in range(10):
+        scheduler.submit(sms_creator, f"Verification code #{number}", priority=10 if number % 2 else 0)
+    for number in range(1000):
+        scheduler.submit(push_creator, f"Campaign message #{number}")
+    scheduler.submit(email_creator, "Your weekly digest")
+
+    started = time.monotonic()
+    scheduler.run()
+    print(f"Sent everything in {time.monotonic() - started:.2f}s")
+    for name, channel_stats in scheduler.stats().items():
+        print(name, channel_stats)
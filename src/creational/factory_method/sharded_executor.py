@@ -0,0 +1,356 @@
+"""
+Hash-sharded, multi-process payment execution.
+
+execute_transaction() is pure Python, so one process runs it on one core. ShardedPaymentExecutor runs it
+in `shards` worker processes instead:
+    1. A transaction goes to shard crc32(account key) % shards, where the account key is the card number,
+       the PayPal email or the wallet address. Every shard executes its transactions one after another in
+       submission order, so the transactions of one account stay in order.
+    2. Transactions travel as (method code, details, amount) tuples, see PAYMENT_METHODS in payment_batch.py,
+       in batches of up to `batch_size` over a one-way pipe per shard. Results come back in one batch per
+       request batch over a second pipe. Partial batches are sent every `flush_interval` seconds.
+    3. A dead worker is restarted and every batch it had not answered yet is sent to the new worker, in the
+       original order. Delivery is at-least-once: a batch the old worker executed but could not answer is
+       executed again.
+    4. drain() waits until everything submitted so far is done, shutdown() drains and stops the workers.
+
+Creators are rebuilt from their details in the worker, their receipt_sink and creation_policy stay in this
+process. The workers are configured by the executor instead: with `receipt_directory` every shard stores its
+receipts in a ReceiptSink of its own under that directory, and `creation_policy` is a picklable factory
+(e.g. functools.partial(LRUPolicy, maxsize=1024)) called once per worker for a policy its creators share.
+
+submit() returns a concurrent.futures.Future with the TransactionResult. A transaction submitted with a
+`transaction_id` runs through an IdempotentPaymentExecutor in its worker: a retry with the same id, which
+lands on the same shard since it is for the same account, gets the stored result. The cache lives in the
+worker process, a restarted worker starts with an empty one.
+"""
+# Import libraries
+from __future__ import annotations
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from itertools import count
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from src.creational.factory_method.card_validation import with_luhn_check_digit
+from src.creational.factory_method.creation_policy import CreationPolicy
+from src.creational.factory_method.idempotency import IdempotentPaymentExecutor
+from src.creational.factory_method.payment_batch import PAYMENT_METHODS
+from src.creational.factory_method.payment_example import (
+    CreditCardPaymentCreator, CryptocurrencyPaymentCreator, PaymentCreator, PaypalPaymentCreator, TransactionResult,
+)
+from src.creational.factory_method.receipt_sink import ReceiptSink
+
+
+_METHOD_CODES = {creator_type: code for code, (creator_type, _) in enumerate(PAYMENT_METHODS)}
+Transaction = Tuple[int, tuple, float, Optional[Hashable]]
+
+
+class RemoteTransactionError(Exception):
+    """execute_transaction() raised in a worker process, the message names the original exception"""
+
+
+class _WorkerConfig(NamedTuple):
+    """What a worker process needs to set its creators up, it is pickled into the process"""
+    receipt_directory: Optional[str]
+    creation_policy: Optional[Callable[[], CreationPolicy]]
+    idempotency_ttl: float
+
+
+def _worker_main(requests: Connection, results: Connection, shard: int, config: _WorkerConfig):
+    """Entry point of a shard process: execute the request batches in order and answer each one"""
+    sink = None
+    if config.receipt_directory is not None:
+        sink = ReceiptSink(os.path.join(config.receipt_directory, f"shard-{shard:03d}"))
+    policy = config.creation_policy() if config.creation_policy is not None else None
+    idempotency = IdempotentPaymentExecutor(ttl=config.idempotency_ttl)
+    try:
+        while True:
+            try:
+                message = requests.recv()
+            except EOFError:
+                return  # The parent is gone
+            if message is None:
+                return
+            batch_id, transactions = message
+            outcomes = []
+            for code, details, amount, transaction_id in transactions:
+                try:
+                    creator = PAYMENT_METHODS[code][0](*details)
+                    creator.creation_policy = policy
+                    creator.receipt_sink = sink
+                    if transaction_id is None:
+                        result = creator.execute_transaction(amount)
+                    else:
+                        result = idempotency.execute_transaction(creator, amount, transaction_id)
+                    outcomes.append((result.status, result.receipt, None))
+                except Exception as error:
+                    outcomes.append((None, None, f"{type(error).__name__}: {error}"))
+            results.send((batch_id, outcomes))
+    finally:
+        if sink is not None:
+            sink.close()
+
+
+class _Shard:
+    """One worker process with its pipes, its unsent buffer and its unanswered batches"""
+    def __init__(self, index: int):
+        self.index = index
+        self.lock = threading.Condition()
+        self.buffer: List[Tuple[Transaction, Future]] = []
+        self.in_flight: OrderedDict[int, Tuple[List[Transaction], List[Future]]] = OrderedDict()
+        self.restarts = 0
+        self.failed: Optional[BaseException] = None
+        self.process = None
+        self.requests: Optional[Connection] = None
+        self.results: Optional[Connection] = None
+        self.outbound: Optional[queue.SimpleQueue] = None
+
+
+class ShardedPaymentExecutor:
+    """Executes transactions in `shards` worker processes, routed by account"""
+    def __init__(self, shards: Optional[int] = None, batch_size: int = 256, flush_interval: float = 0.005,
+                 max_in_flight: int = 64, max_restarts: int = 3, start_method: str = "spawn",
+                 receipt_directory: Optional[str] = None,
+                 creation_policy: Optional[Callable[[], CreationPolicy]] = None,
+                 idempotency_ttl: float = 24 * 3600):
+        if batch_size < 1 or max_in_flight < 1:
+            raise ValueError("batch_size and max_in_flight must be at least 1")
+        self._config = _WorkerConfig(receipt_directory, creation_policy, idempotency_ttl)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_in_flight = max_in_flight
+        self.max_restarts = max_restarts
+        self._context = multiprocessing.get_context(start_method)
+        self._batch_ids = count()
+        self._closed = False
+        self._shards = [_Shard(index) for index in range(shards or os.cpu_count() or 1)]
+        for shard in self._shards:
+            self._start_worker(shard)
+        self._collector = threading.Thread(target=self._collect, name="payment-shard-collector", daemon=True)
+        self._collector.start()
+
+    @property
+    def shards(self) -> int:
+        return len(self._shards)
+
+    def shard_for(self, creator: PaymentCreator) -> int:
+        return zlib.crc32(repr(creator.account_key()).encode()) % len(self._shards)
+
+    # Worker processes
+    def _start_worker(self, shard: _Shard):
+        """Start a worker and (re)send the unanswered batches to it, called with the shard lock held"""
+        requests_reader, requests_writer = self._context.Pipe(duplex=False)
+        results_reader, results_writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(target=_worker_main,
+                                        args=(requests_reader, results_writer, shard.index, self._config),
+                                        name=f"payment-shard-{shard.index}", daemon=True)
+        process.start()
+        requests_reader.close()
+        results_writer.close()
+        shard.process, shard.requests, shard.results = process, requests_writer, results_reader
+
+        # Pipe writes block once the pipe is full, a sender thread per worker keeps them off the callers.
+        shard.outbound = queue.SimpleQueue()
+        threading.Thread(target=self._send, args=(requests_writer, shard.outbound), daemon=True,
+                         name=f"payment-shard-{shard.index}-sender").start()
+        for batch_id, (transactions, _) in shard.in_flight.items():
+            shard.outbound.put((batch_id, transactions))
+
+    @staticmethod
+    def _send(connection: Connection, outbound: queue.SimpleQueue):
+        while True:
+            message = outbound.get()
+            try:
+                connection.send(message)
+            except (OSError, EOFError):
+                return  # The worker died, the collector restarts it with a new sender
+            if message is None:
+                return
+
+    def _restart(self, shard: _Shard):
+        with shard.lock:
+            if shard.failed is not None or self._closed and not shard.in_flight:
+                return
+            shard.process.join()
+            shard.outbound.put(None)
+            shard.requests.close()
+            shard.results.close()
+            shard.restarts += 1
+            if shard.restarts > self.max_restarts:
+                shard.failed = RuntimeError(f"Payment shard {shard.index} died {shard.restarts} times")
+                futures = [future for _, futures in shard.in_flight.values() for future in futures]
+                futures += [future for _, future in shard.buffer]
+                shard.in_flight.clear()
+                shard.buffer.clear()
+                shard.lock.notify_all()
+            else:
+                self._start_worker(shard)
+                futures = []
+        for future in futures:
+            future.set_exception(shard.failed)
+
+    # Submitting
+    def submit(self, creator: PaymentCreator, amount: float, transaction_id: Optional[Hashable] = None) -> Future:
+        """Queue a transaction, the future resolves to its TransactionResult. See the module for `transaction_id`"""
+        code = _METHOD_CODES.get(type(creator))
+        if code is None:
+            raise TypeError(f"{type(creator).__name__} cannot be executed by the sharded executor")
+        if self._closed:
+            raise RuntimeError("The executor was shut down")
+        future: Future = Future()
+        shard = self._shards[self.shard_for(creator)]
+        with shard.lock:
+            if shard.failed is not None:
+                raise shard.failed
+            shard.buffer.append(((code, tuple(creator.details), amount, transaction_id), future))
+            if len(shard.buffer) >= self.batch_size:
+                self._flush_shard(shard)
+        return future
+
+    def map(self, transactions: Iterable[Tuple[PaymentCreator, float]]) -> Iterator[TransactionResult]:
+        """Execute the (creator, amount) transactions and yield their results in submission order"""
+        futures = [self.submit(creator, amount) for creator, amount in transactions]
+        self.flush()
+        for future in futures:
+            yield future.result()
+
+    def _flush_shard(self, shard: _Shard, block: bool = True):
+        """
+        Hand the buffered transactions to the sender, called with the shard lock held. Once `max_in_flight`
+        batches are unanswered it waits for the worker, or returns right away when `block` is False.
+        """
+        while shard.buffer and shard.failed is None:
+            while len(shard.in_flight) >= self.max_in_flight and shard.failed is None:
+                if not block:
+                    return
+                shard.lock.wait()
+            batch, shard.buffer = shard.buffer[:self.batch_size], shard.buffer[self.batch_size:]
+            batch_id = next(self._batch_ids)
+            transactions = [transaction for transaction, _ in batch]
+            shard.in_flight[batch_id] = (transactions, [future for _, future in batch])
+            shard.outbound.put((batch_id, transactions))
+
+    def flush(self, block: bool = True):
+        """Send every partial batch now instead of waiting for the flush interval"""
+        for shard in self._shards:
+            with shard.lock:
+                self._flush_shard(shard, block)
+
+    # Results
+    def _collect(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            shards = {shard.results: shard for shard in self._shards if shard.failed is None}
+            sentinels = {shard.process.sentinel: shard for shard in self._shards if shard.failed is None}
+            if not shards or (self._closed and all(not shard.in_flight for shard in self._shards)):
+                return
+            ready = wait(list(shards) + list(sentinels), timeout=max(0.0, next_flush - time.monotonic()))
+            dead = []
+            for handle in ready:
+                if handle in shards:
+                    shard = shards[handle]
+                    try:
+                        batch_id, outcomes = handle.recv()
+                    except (EOFError, OSError):
+                        dead.append(shard)
+                        continue
+                    self._resolve(shard, batch_id, outcomes)
+                else:
+                    dead.append(sentinels[handle])
+            for shard in dict.fromkeys(dead):
+                if not shard.process.is_alive():
+                    self._restart(shard)
+            # Busy shards keep wait() returning, the deadline still flushes the partial batches of quiet ones.
+            now = time.monotonic()
+            if now >= next_flush:
+                next_flush = now + self.flush_interval
+                if not self._closed:
+                    self.flush(block=False)  # The collector must never wait for itself
+
+    def _resolve(self, shard: _Shard, batch_id: int, outcomes: List[Tuple[Any, ...]]):
+        with shard.lock:
+            entry = shard.in_flight.pop(batch_id, None)
+            shard.lock.notify_all()
+        if entry is None:
+            return  # Answer of a batch that was already resent and answered
+        for future, (status, receipt, error) in zip(entry[1], outcomes):
+            if error is None:
+                future.set_result(TransactionResult(status, receipt))
+            else:
+                future.set_exception(RemoteTransactionError(error))
+
+    # Lifecycle
+    def drain(self):
+        """Wait until every transaction submitted so far was executed"""
+        self.flush()
+        for shard in self._shards:
+            with shard.lock:
+                while shard.in_flight and shard.failed is None:
+                    shard.lock.wait()
+
+    def shutdown(self, drain: bool = True):
+        """Stop the workers, after draining if `drain` is set. Without draining, queued transactions fail"""
+        if drain:
+            self.drain()
+        self._closed = True
+        cancelled = RuntimeError("The executor was shut down before the transaction ran")
+        for shard in self._shards:
+            with shard.lock:
+                futures = [future for _, future in shard.buffer]
+                futures += [future for _, futures in shard.in_flight.values() for future in futures]
+                shard.buffer.clear()
+                shard.in_flight.clear()
+                shard.lock.notify_all()
+                if shard.failed is None:
+                    shard.outbound.put(None)
+            for future in futures:
+                future.set_exception(cancelled)
+        for shard in self._shards:
+            shard.process.join()
+        self._collector.join()
+        for shard in self._shards:
+            shard.requests.close()
+            shard.results.close()
+
+    def __enter__(self) -> ShardedPaymentExecutor:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown(drain=exc_info[0] is None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "shards": len(self._shards),
+            "restarts": sum(shard.restarts for shard in self._shards),
+            "in_flight_batches": sum(len(shard.in_flight) for shard in self._shards),
+            "failed_shards": [shard.index for shard in self._shards if shard.failed is not None],
+        }
+
+    def worker_pids(self) -> List[Optional[int]]:
+        return [shard.process.pid for shard in self._shards]
+
+
+if __name__ == "__main__":
+    creators = [CreditCardPaymentCreator(card_number=with_luhn_check_digit(f"4{number:014d}"), cvv="123", expiry="12/30")
+                for number in range(500)]
+    creators += [PaypalPaymentCreator(email=f"buyer{number}@example.com", auth_token="token") for number in range(300)]
+    creators += [CryptocurrencyPaymentCreator(wallet_address=f"wallet{number:016x}", blockchain_network="Tron")
+                 for number in range(200)]
+
+    with ShardedPaymentExecutor(shards=4) as executor:
+        started = time.perf_counter()
+        futures = [executor.submit(creators[number % len(creators)], 10.0 + number % 90) for number in range(100_000)]
+        os.kill(executor.worker_pids()[0], signal.SIGKILL)  # Shard 0 crashes, its unanswered batches are resent
+        executor.drain()
+        elapsed = time.perf_counter() - started
+        statuses = [future.result().status for future in futures]
+        print(f"{len(statuses):,} transactions in {elapsed:.2f}s ({len(statuses) / elapsed:,.0f}/s), "
+              f"{statuses.count('Successful'):,} successful, {executor.stats()}")
@@ -2,11 +2,15 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 
+from src.creational.factory_method.creation_policy import PolicyCreatorMixin, SingletonPolicy
 
-class Creator(ABC):
+
+class Creator(PolicyCreatorMixin, ABC):
     """
     The creator class declares the factory method that is supposed to return an object of a Product class.
     The Creator's subclasses usually provide the implementation of this method.
+
+    An optional creation policy may reuse products instead of calling the factory method every time.
     """
 
     @abstractmethod
@@ -23,11 +27,10 @@ class Creator(ABC):
         factory method and returning a different type of product from it.
         """
 
-        # Call the factory method to create a Product object.
-        product = self.factory_method()
-
-        # Now, use the product.
-        result = f"Creator: The same creator's code has just worked with {product.operation()}"
+        # Call the factory method (through the creation policy, if any) to get a Product object.
+        with self.checkout_product(self.factory_method) as product:
+            # Now, use the product.
+            result = f"Creator: The same creator's code has just worked with {product.operation()}"
 
         return result
 
@@ -98,3 +101,11 @@ if __name__ == "__main__":
 
     print("App: Launched with the ConcreteCreator2.")
     client_code(ConcreteCreator2())
+    print("\n")
+
+    print("App: Launched with a ConcreteCreator1 that reuses its product.")
+    creator = ConcreteCreator1()
+    creator.creation_policy = SingletonPolicy()
+    for _ in range(3):
+        creator.business_logic()
+    print(f"Creation policy: {creator.creation_policy.stats()}")
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from src.creational.factory_method.async_notification_example import (
+    AsyncEmailNotification, AsyncEmailNotificationCreator, AsyncNotificationCreator, AsyncNotificationInterface,
+    AsyncPushNotification, AsyncSMSNotification, ConnectionPool, LocalSinkServer,
+)
+from src.creational.factory_method.notification_example import EmailNotification, PushNotification, SMSNotification
+
+
+class FakePool:
+    max_size = 3
+
+
+class RecordingNotification(AsyncNotificationInterface):
+    channel = "test"
+
+    def __init__(self, pool, fail_on=None):
+        super().__init__(pool)
+        self.fail_on = fail_on
+        self.sent = []
+        self.cancelled = 0
+
+    def format_message(self, message):
+        return message
+
+    async def send_many(self, messages):
+        try:
+            if messages[0] == self.fail_on:
+                await asyncio.sleep(0.01)
+                raise ConnectionError("provider went away")
+            await asyncio.sleep(0.05)
+            self.sent.extend(messages)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+class RecordingCreator(AsyncNotificationCreator):
+    def __init__(self, pool, fail_on=None):
+        super().__init__(pool)
+        self.notification = RecordingNotification(pool, fail_on)
+
+    def create_notification(self):
+        return self.notification
+
+
+def test_notify_many_sends_every_message_in_chunks():
+    creator = RecordingCreator(FakePool())
+    sent = asyncio.run(creator.notify_many((str(number) for number in range(10)), chunk_size=3))
+    assert sent == 10
+    assert sorted(creator.notification.sent, key=int) == [str(number) for number in range(10)]
+
+
+@pytest.mark.parametrize("chunk_size", [0, -1])
+def test_notify_many_rejects_empty_chunks(chunk_size):
+    with pytest.raises(ValueError):
+        asyncio.run(RecordingCreator(FakePool()).notify_many(["message"], chunk_size=chunk_size))
+
+
+def test_a_failed_chunk_cancels_the_chunks_in_flight():
+    creator = RecordingCreator(FakePool(), fail_on="0")
+
+    async def run():
+        with pytest.raises(ConnectionError):
+            await creator.notify_many((str(number) for number in range(6)), chunk_size=2)
+        # Nothing may be left running once notify_many raised.
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    asyncio.run(run())
+    assert creator.notification.cancelled == 2
+    assert creator.notification.sent == []
+
+
+def test_pooled_sends_reach_the_server():
+    async def run():
+        async with LocalSinkServer() as server:
+            pool = ConnectionPool(*server.address, max_size=2, pipeline_depth=8)
+            creator = AsyncEmailNotificationCreator(pool)
+            await creator.notify_user("hello")
+            sent = await creator.notify_many((f"message {number}" for number in range(100)), chunk_size=25)
+            await pool.close()
+            return sent, server.received, pool.stats()
+
+    sent, received, stats = asyncio.run(run())
+    assert sent == 100
+    assert received == {"email": 101}
+    assert stats["opened"] <= 2
+
+
+@pytest.mark.parametrize("async_channel, channel", [
+    (AsyncEmailNotification, EmailNotification), (AsyncPushNotification, PushNotification),
+    (AsyncSMSNotification, SMSNotification),
+])
+def test_async_channels_format_like_the_sync_channels(async_channel, channel):
+    notification = async_channel(FakePool())
+    assert notification.template is channel.template
+    assert notification.format_message("hi") == channel().format_message("hi")
+    assert notification.format_many(["a", "b"]) == channel().format_many(["a", "b"])
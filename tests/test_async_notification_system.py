@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from src.behavioral.observer.async_notification_system import AsyncSubscriber, ConcreteAsyncNotificationManager
+
+
+class Probe(AsyncSubscriber):
+    running = 0
+    peak = 0
+
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def update(self, subject):
+        self.calls += 1
+        Probe.running += 1
+        Probe.peak = max(Probe.peak, Probe.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+        finally:
+            Probe.running -= 1
+
+
+@pytest.fixture(autouse=True)
+def reset_probe():
+    Probe.running = Probe.peak = 0
+
+
+def test_every_subscriber_is_awaited_once_within_the_concurrency_limit():
+    manager = ConcreteAsyncNotificationManager(max_concurrency=4)
+    subscribers = [Probe(0.01) for _ in range(20)]
+    for subscriber in subscribers:
+        manager.attach(subscriber)
+    manager.attach(subscribers[0])
+
+    assert asyncio.run(manager.notify()) == {}
+    assert [subscriber.calls for subscriber in subscribers] == [1] * 20
+    assert Probe.peak == 4
+
+
+def test_slow_and_failing_subscribers_are_reported_without_blocking_the_rest():
+    manager = ConcreteAsyncNotificationManager(timeout=0.05)
+    fast, slow, broken = Probe(), Probe(5.0), Probe(error=RuntimeError("mailbox full"))
+    for subscriber in (fast, slow, broken):
+        manager.attach(subscriber)
+
+    async def notify():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        failures = await manager.notify()
+        return failures, loop.time() - started
+
+    failures, elapsed = asyncio.run(notify())
+    assert elapsed < 1.0
+    assert set(failures) == {slow, broken}
+    assert isinstance(failures[slow], asyncio.TimeoutError) and isinstance(failures[broken], RuntimeError)
+    assert fast.calls == 1
+
+
+def test_detach_and_invalid_concurrency():
+    manager = ConcreteAsyncNotificationManager()
+    subscriber = Probe()
+    manager.attach(subscriber)
+    manager.detach(subscriber)
+    assert asyncio.run(manager.notify()) == {} and subscriber.calls == 0
+    with pytest.raises(ValueError):
+        ConcreteAsyncNotificationManager(max_concurrency=0)
@@ -0,0 +1,56 @@
+from datetime import date
+
+import pytest
+
+from src.creational.factory_method.card_validation import CardRejection, luhn_valid, validate_card, validate_cards
+from src.creational.factory_method.payment_example import REJECTED, CreditCardPaymentCreator
+from src.creational.factory_method.payment_pipeline import PaymentPipeline
+
+TODAY = date(2026, 6, 15)
+
+CASES = [
+    ("4111111111111111", "123", "12/30", CardRejection.NONE),
+    ("378282246310005", "1234", "06/26", CardRejection.NONE),
+    ("5555555555554444", "123", "05/26", CardRejection.EXPIRED),
+    ("4111111111111112", "123", "12/30", CardRejection.CHECKSUM),
+    ("41111111111111", "123", "12/30", CardRejection.LENGTH | CardRejection.CHECKSUM),
+    ("9111111111111111", "123", "12/30", CardRejection.UNKNOWN_BIN | CardRejection.CHECKSUM),
+    ("378282246310005", "123", "12/30", CardRejection.CVV),
+    ("4111 1111 1111 1111", "12a", "1230", CardRejection.FORMAT),
+    ("4111111111111111", "12", "13/30", CardRejection.CVV | CardRejection.FORMAT),
+    ("４１１１111111111111", "123", "12/30", CardRejection.FORMAT),
+    ("", "", "", CardRejection.FORMAT),
+]
+
+
+def test_luhn():
+    assert luhn_valid("4111111111111111") and luhn_valid("0") and not luhn_valid("4111111111111112")
+
+
+@pytest.mark.parametrize("card_number, cvv, expiry, expected", CASES)
+def test_validate_card(card_number, cvv, expiry, expected):
+    assert validate_card(card_number, cvv, expiry, today=TODAY) == expected
+
+
+def test_vectorized_validation_matches_the_scalar_one():
+    np = pytest.importorskip("numpy")
+    numbers, cvvs, expiries, _ = zip(*CASES)
+    rng = np.random.default_rng(7)
+    numbers += tuple(rng.integers(10 ** 15, 10 ** 16, 500).astype(str))
+    cvvs += tuple(rng.integers(1, 10_000, 500).astype(str))
+    expiries += tuple(f"{month:02d}/{year:02d}" for month, year in zip(rng.integers(0, 14, 500), rng.integers(20, 35, 500)))
+    result = validate_cards(numbers, cvvs, expiries, today=TODAY)
+
+    assert result.reasons.dtype == np.uint8
+    expected = [validate_card(*row, today=TODAY) for row in zip(numbers, cvvs, expiries)]
+    assert [CardRejection(int(reasons)) for reasons in result.reasons] == expected
+    assert result.valid.tolist() == [not reasons for reasons in expected]
+
+
+def test_invalid_cards_are_not_charged():
+    card = CreditCardPaymentCreator(card_number="4111111111111112", cvv="123", expiry="12/30")
+    result = card.execute_transaction(10.0)
+    assert result.status == REJECTED and result.receipt.endswith("was Rejected")
+
+    [piped] = PaymentPipeline(workers=1).run([(card, 10.0)])
+    assert piped.error is None and piped.result == result
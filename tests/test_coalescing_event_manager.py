@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from src.behavioral.observer.coalescing_event_manager import AuditObserver, CoalescingEventManager
+from src.behavioral.observer.template import Subscriber
+
+
+class Latest(Subscriber):
+    def __init__(self):
+        self.deliveries = []
+        self.delivered = threading.Event()
+
+    def update(self, subject):
+        self.deliveries.append((subject._state, subject.change_count))
+        self.delivered.set()
+
+
+def test_count_window_merges_the_changes():
+    manager = CoalescingEventManager(max_changes=4)
+    latest, audit = Latest(), AuditObserver()
+    manager.attach(latest)
+    manager.attach(audit)
+    for state in range(10):
+        manager.change_state(state)
+    assert latest.deliveries == [(3, 4), (7, 4)]
+    assert audit.transitions == 10
+    manager.flush()
+    assert latest.deliveries[-1] == (9, 2)
+
+
+def test_time_window_delivers_once_from_the_timer():
+    manager = CoalescingEventManager(window=0.02)
+    latest = Latest()
+    manager.attach(latest)
+    for state in range(5):
+        manager.change_state(state)
+    assert latest.delivered.wait(2)
+    assert latest.deliveries == [(4, 5)]
+
+
+def test_without_a_window_only_flush_delivers():
+    manager = CoalescingEventManager()
+    latest, audit = Latest(), AuditObserver()
+    manager.attach(latest)
+    manager.attach(audit)
+    manager.change_state(1)
+    manager.change_state(2)
+    assert latest.deliveries == []
+    manager.flush()
+    manager.flush()
+    assert latest.deliveries == [(2, 2)]
+    manager.detach(audit)
+    manager.change_state(3)
+    assert audit.transitions == 2
+
+
+def test_invalid_windows():
+    with pytest.raises(ValueError):
+        CoalescingEventManager(window=0)
+    with pytest.raises(ValueError):
+        CoalescingEventManager(max_changes=0)
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from src.creational.factory_method.creation_policy import (
+    LRUPolicy, NewInstancePolicy, PolicyCreatorMixin, PoolPolicy, SingletonPolicy,
+)
+from src.creational.factory_method.notification_example import SMSNotification, SMSNotificationCreator
+
+
+class Product:
+    def __init__(self):
+        self.dirty = False
+
+
+class KeyedCreator(PolicyCreatorMixin):
+    def __init__(self, region):
+        self.region = region
+
+    def product_key(self):
+        return (type(self), self.region)
+
+    def use(self):
+        with self.checkout_product(Product) as product:
+            return product
+
+
+def test_without_a_policy_every_call_builds_a_product():
+    creator = KeyedCreator("eu")
+    assert creator.use() is not creator.use()
+    policy = NewInstancePolicy()
+    creator.creation_policy = policy
+    assert creator.use() is not creator.use()
+    assert policy.stats() == {"hits": 0, "misses": 2, "hit_rate": 0.0}
+
+
+def test_singleton_shares_one_product_per_key():
+    policy = SingletonPolicy()
+    eu, us = KeyedCreator("eu"), KeyedCreator("us")
+    eu.creation_policy = us.creation_policy = policy
+    other_eu = KeyedCreator("eu")
+    other_eu.creation_policy = policy
+    assert eu.use() is eu.use() is other_eu.use()
+    assert eu.use() is not us.use()
+    assert policy.stats()["misses"] == 2
+
+
+def test_notification_creators_reuse_their_singleton_product():
+    creator = SMSNotificationCreator()
+    creator.creation_policy = SingletonPolicy()
+    for _ in range(3):
+        creator.notify_user("hello")
+    assert creator.creation_policy.stats() == {"hits": 2, "misses": 1, "hit_rate": 2 / 3}
+    assert isinstance(creator.creation_policy._products[SMSNotificationCreator], SMSNotification)
+
+
+def test_lru_evicts_the_least_recently_used_key():
+    policy = LRUPolicy(maxsize=2)
+    creators = {region: KeyedCreator(region) for region in ("eu", "us", "ap")}
+    for creator in creators.values():
+        creator.creation_policy = policy
+    eu = creators["eu"].use()
+    creators["us"].use()
+    assert creators["eu"].use() is eu  # eu is now the most recently used
+    creators["ap"].use()  # Evicts us
+    assert creators["eu"].use() is eu
+    creators["us"].use()
+    assert policy.stats()["hits"] == 2 and policy.stats()["misses"] == 4
+    with pytest.raises(ValueError):
+        LRUPolicy(maxsize=0)
+
+
+def test_pool_never_hands_one_product_to_two_callers():
+    policy = PoolPolicy(max_idle=2, reset=lambda product: setattr(product, "dirty", False))
+    key = "channel"
+    first = policy.acquire(Product, key)
+    second = policy.acquire(Product, key)
+    assert first is not second
+    first.dirty = True
+    policy.release(first, key)
+    assert policy.acquire(Product, key) is first and not first.dirty
+    for product in (first, second, Product()):
+        policy.release(product, key)
+    assert policy.stats() == {"hits": 1, "misses": 2, "hit_rate": 1 / 3, "idle": 2}
+    with pytest.raises(ValueError):
+        PoolPolicy(max_idle=-1)
+
+
+def test_pool_checkouts_are_exclusive_across_threads():
+    policy = PoolPolicy(max_idle=4)
+    in_use, overlaps, lock = set(), [], threading.Lock()
+    start = threading.Barrier(8)
+
+    def worker():
+        start.wait()
+        for _ in range(200):
+            with policy.checkout(Product, "key") as product:
+                with lock:
+                    if id(product) in in_use:
+                        overlaps.append(product)
+                    in_use.add(id(product))
+                with lock:
+                    in_use.discard(id(product))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == []
+    stats = policy.stats()
+    assert stats["hits"] + stats["misses"] == 1600 and stats["idle"] <= 4
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from src.creational.abstract_factory.cloud_provider_example import AWSCloudServiceCreator
+from src.creational.abstract_factory.deployment_engine import DeploymentCycleError, DeploymentEngine, DeploymentPlan
+
+lock = threading.Lock()
+
+
+def recorder(log, name, seconds=0.0, error=None):
+    def step():
+        time.sleep(seconds)
+        with lock:
+            log.append(name)
+        if error is not None:
+            raise error
+    return step
+
+
+def test_topological_order_and_plan_errors():
+    plan = DeploymentPlan().add("release", lambda: None, ["migrate", "compute"])
+    plan.add("migrate", lambda: None, ["database"]).add("database", lambda: None).add("compute", lambda: None)
+    order = plan.topological_order()
+    assert order.index("database") < order.index("migrate") < order.index("release")
+    assert order.index("compute") < order.index("release")
+
+    with pytest.raises(ValueError):
+        plan.add("compute", lambda: None)
+    with pytest.raises(ValueError, match="unknown step 'missing'"):
+        DeploymentPlan().add("a", lambda: None, ["missing"]).topological_order()
+    cyclic = DeploymentPlan().add("a", lambda: None, ["b"]).add("b", lambda: None, ["c"]).add("c", lambda: None, ["a"])
+    with pytest.raises(DeploymentCycleError, match="a -> b -> c -> a"):
+        cyclic.topological_order()
+
+
+def test_steps_run_after_their_dependencies_and_in_parallel():
+    log = []
+    plan = DeploymentPlan()
+    plan.add("compute", recorder(log, "compute", 0.05)).add("storage", recorder(log, "storage", 0.05))
+    plan.add("database", recorder(log, "database", 0.1)).add("migrate", recorder(log, "migrate", 0.02), ["database"])
+    plan.add("release", recorder(log, "release"), ["compute", "storage", "migrate"])
+    report = DeploymentEngine().deploy(plan)
+
+    assert report.succeeded and log[-1] == "release" and log.index("database") < log.index("migrate")
+    assert report.elapsed < 0.17 + 0.1  # The longest chain, not the 0.22s sum of the steps
+    assert report.critical_path == ["database", "migrate", "release"]
+    assert all(report.timings["release"].started >= report.timings[name].finished
+               for name in ("compute", "storage", "migrate"))
+
+
+def test_a_failed_step_skips_its_dependents_only():
+    log = []
+    plan = DeploymentPlan()
+    plan.add("database", recorder(log, "database", error=RuntimeError("no capacity")))
+    plan.add("migrate", recorder(log, "migrate"), ["database"]).add("release", recorder(log, "release"), ["migrate"])
+    plan.add("compute", recorder(log, "compute"))
+    report = DeploymentEngine(max_workers=2).deploy(plan)
+
+    assert not report.succeeded
+    assert isinstance(report.failed["database"], RuntimeError)
+    assert sorted(report.skipped) == ["migrate", "release"]
+    assert sorted(log) == ["compute", "database"]
+    assert report.critical_path == ["compute"]
+
+
+def test_plan_from_provider():
+    plan = DeploymentPlan.from_provider(AWSCloudServiceCreator(), {"compute": ["database"]})
+    assert plan.steps["compute"].depends_on == ("database",)
+    assert DeploymentEngine().deploy(plan).succeeded
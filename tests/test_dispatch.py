@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.behavioral.observer.dispatch import InlineExecutor
+from src.behavioral.observer.notification_system import ConcreteNotificationManager, Subscriber
+
+
+class Recorder(Subscriber):
+    def __init__(self):
+        self.calls = 0
+
+    def update(self, subject):
+        self.calls += 1
+
+
+class Failing(Subscriber):
+    def update(self, subject):
+        raise RuntimeError("boom")
+
+
+def test_inline_executor_runs_in_the_calling_thread():
+    future = InlineExecutor().submit(lambda value: value * 2, 21)
+    assert future.done()
+    assert future.result() == 42
+
+
+def test_inline_executor_captures_exceptions():
+    future = InlineExecutor().submit(lambda: 1 / 0)
+    assert isinstance(future.exception(), ZeroDivisionError)
+
+
+@pytest.mark.parametrize("error", [KeyboardInterrupt, SystemExit])
+def test_inline_executor_propagates_base_exceptions(error):
+    def interrupted():
+        raise error
+
+    with pytest.raises(error):
+        InlineExecutor().submit(interrupted)
+
+
+@pytest.mark.parametrize("pool", [None, 4])
+def test_notify_reports_failures_per_subscriber(pool):
+    executor = ThreadPoolExecutor(max_workers=pool) if pool else None
+    try:
+        manager = ConcreteNotificationManager(executor=executor)
+        recorder, failing = Recorder(), Failing()
+        manager.attach(recorder)
+        manager.attach(failing)
+        result = manager.notify()
+        failures = result.failures()
+    finally:
+        if executor:
+            executor.shutdown()
+    assert recorder.calls == 1
+    assert list(failures) == [failing]
+    assert isinstance(failures[failing], RuntimeError)
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from src.behavioral.observer.event_bus import OverflowPolicy, QueuedEventManager
+from src.behavioral.observer.template import Subscriber
+
+
+class Collector(Subscriber):
+    def __init__(self, on_update=None):
+        self.states = []
+        self.on_update = on_update
+
+    def update(self, subject):
+        self.states.append(subject._state)
+        if self.on_update is not None:
+            self.on_update()
+
+
+def counters(bus):
+    (entry,) = bus.stats()["subscribers"].values()
+    return entry
+
+
+def test_events_are_delivered_in_order():
+    bus = QueuedEventManager(capacity=8)
+    collector = Collector()
+    bus.attach(collector)
+    for value in range(5):
+        bus.publish(value)
+    bus.notify()
+    assert collector.states == [0, 1, 2, 3, 4]
+    assert counters(bus) == {"lag": 0, "delivered": 5, "missed": 0}
+
+
+def test_drop_newest_rejects_when_full():
+    bus = QueuedEventManager(capacity=2, policy=OverflowPolicy.DROP_NEWEST)
+    bus.attach(Collector())
+    assert [bus.publish(value) for value in range(3)] == [True, True, False]
+    assert bus.stats()["dropped"] == 1
+
+
+def test_drop_oldest_skips_evicted_events():
+    bus = QueuedEventManager(capacity=2, policy=OverflowPolicy.DROP_OLDEST)
+    collector = Collector()
+    bus.attach(collector)
+    for value in range(5):
+        bus.publish(value)
+    bus.notify()
+    assert collector.states == [3, 4]
+    assert counters(bus) == {"lag": 0, "delivered": 2, "missed": 3}
+
+
+def test_events_evicted_after_they_were_copied_are_not_missed():
+    bus = QueuedEventManager(capacity=2, policy=OverflowPolicy.DROP_OLDEST)
+    published = []
+
+    def publish_more():
+        # Runs outside the bus lock while a batch is being delivered, evicting events of that batch.
+        if len(published) < 3:
+            published.append(bus.publish(10 + len(published)))
+
+    collector = Collector(publish_more)
+    bus.attach(collector)
+    bus.publish(0)
+    bus.publish(1)
+    bus.notify()
+    bus.notify()
+    assert bus.published == 5 and bus.stats()["dropped"] == 3
+    assert collector.states == [0, 1, 10, 11]
+    assert counters(bus) == {"lag": 1, "delivered": 4, "missed": 0}
+    bus.notify()
+    assert collector.states[-1] == 12 and counters(bus) == {"lag": 0, "delivered": 5, "missed": 0}
+
+
+def test_events_evicted_before_they_were_copied_are_missed():
+    bus = QueuedEventManager(capacity=2, policy=OverflowPolicy.DROP_OLDEST)
+
+    def publish_two():
+        if collector.states == [0]:
+            bus.publish(100)  # Evicts event 0, which is being delivered
+            bus.publish(101)  # Evicts event 1, which was never copied
+
+    collector = Collector(publish_two)
+    bus.attach(collector)
+    bus.publish(0)
+    bus.publish(1)
+    bus.consume(collector, max_events=1)
+    bus.notify()
+    assert collector.states == [0, 100, 101]
+    assert counters(bus) == {"lag": 0, "delivered": 3, "missed": 1}
+
+
+def test_block_policy_times_out():
+    bus = QueuedEventManager(capacity=1, policy=OverflowPolicy.BLOCK)
+    bus.attach(Collector())
+    assert bus.publish(0)
+    assert not bus.publish(1, timeout=0.01)
+
+
+@pytest.mark.parametrize("policy", list(OverflowPolicy))
+def test_consumer_threads_account_for_every_event(policy):
+    bus = QueuedEventManager(capacity=4, policy=policy, sample_every=2)
+    slow = threading.Event()
+    bus.attach(Collector(lambda: slow.wait(0.0005)))
+    bus.start()
+    accepted = sum(bus.publish(value, timeout=1) for value in range(200))
+    bus.stop()
+    stats = counters(bus)
+    assert accepted == bus.published
+    assert stats["lag"] == 0
+    assert stats["delivered"] + stats["missed"] == bus.published
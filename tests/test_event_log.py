@@ -0,0 +1,83 @@
+import pytest
+
+from src.behavioral.observer.event_log import EventLog, LoggedEventManager, StructCodec
+from src.behavioral.observer.template import Subscriber
+
+
+class Recorder(Subscriber):
+    def __init__(self):
+        self.events = []
+        self.next_offset = 0
+
+    def update(self, subject):
+        self.events.append((subject._state, subject.sequence))
+        self.next_offset = subject.next_offset
+
+
+def test_records_round_trip_and_survive_a_reopen(tmp_path):
+    path = str(tmp_path / "events.log")
+    log = EventLog(path, initial_size=64)  # Small enough to grow several times
+    offsets = [log.append({"state": number}) for number in range(100)]
+    assert [offset for offset, _, _ in log.read()] == offsets
+    log.close()
+
+    log = EventLog(path)
+    assert [state["state"] for _, _, state in log.read(offsets[50])] == list(range(50, 100))
+    with pytest.raises(ValueError):
+        list(log.read(offsets[50] + 1))
+    log.close()
+
+
+def test_struct_codec_reads_the_mapped_memory(tmp_path):
+    log = EventLog(str(tmp_path / "events.log"), codec=StructCodec("<qd"))
+    log.append((1, 0.5))
+    log.append((2, 1.5))
+    assert [log.codec.decode(payload) for _, _, payload in log.records()] == [(1, 0.5), (2, 1.5)]
+    log.close()
+
+
+def test_a_lagging_header_and_a_torn_record_are_recovered(tmp_path):
+    path = tmp_path / "events.log"
+    log = EventLog(str(path))
+    log.append(1)
+    header_end = log.end
+    log.append(2)
+    torn = log.end
+    log.append(3)
+    log.close()
+    data = bytearray(path.read_bytes())
+    data[8:24] = (0).to_bytes(8, "little") + header_end.to_bytes(8, "little")  # Header written before the crash
+    data[32 + torn + 8] ^= 0xFF  # The last record is torn
+    path.write_bytes(bytes(data))
+
+    log = EventLog(str(path))
+    assert [state for _, _, state in log.read()] == [1, 2] and log.end == torn
+    log.close()
+
+
+def test_subscribers_resume_and_replay_from_a_snapshot(tmp_path):
+    path = str(tmp_path / "events.log")
+    manager = LoggedEventManager(EventLog(path))
+    worker = Recorder()
+    manager.attach(worker)
+    for state in (1, 2):
+        manager.change_state(state)
+    manager.detach(worker)
+    for state in (3, 4):
+        manager.change_state(state)
+    resumed = Recorder()
+    manager.attach(resumed, from_offset=worker.next_offset)
+    assert [state for state, _ in resumed.events] == [3, 4]
+
+    manager.snapshot()
+    manager.change_state(5)
+    late = Recorder()
+    manager.attach(late, from_offset=0)
+    assert late.events[0] == (4, None) and [state for state, _ in late.events[1:]] == [5]
+    manager.log.close()
+
+    restarted = LoggedEventManager(EventLog(path))
+    assert restarted._state == 5 and restarted.next_offset == manager.next_offset
+    with pytest.raises(ValueError):
+        list(restarted.log.read(0))
+    restarted.log.close()
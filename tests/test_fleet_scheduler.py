@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from src.creational.abstract_factory.cloud_provider_example import (
+    AWSCloudServiceCreator, AzureCloudServiceCreator, ComputingInstance, DatabaseService, StorageService,
+)
+from src.creational.abstract_factory.fleet_scheduler import Deployment, FleetScheduler, ProviderLimit
+
+
+class RecordingProvider(AWSCloudServiceCreator):
+    """Records every bulk call as (step, application names), optionally failing one application"""
+    calls = []
+    lock = threading.Lock()
+
+    def __init__(self, name, fail_on=None):
+        self.name = name
+        self.fail_on = fail_on
+
+    def _product(self, base, step):
+        provider = self
+
+        class Product(base):
+            def __init__(self):
+                self.provider = provider
+
+            @classmethod
+            def _record(cls, products):
+                with RecordingProvider.lock:
+                    RecordingProvider.calls.append((step, [product.provider.name for product in products]))
+                if any(product.provider.fail_on == step for product in products):
+                    raise RuntimeError(f"{step} failed")
+
+        for method, bulk in (("launch", "launch_many"), ("create_bucket", "create_buckets"),
+                             ("provision", "provision_many")):
+            setattr(Product, method, lambda self: None)
+            setattr(Product, bulk, classmethod(lambda cls, products: cls._record(products)))
+        Product.__abstractmethods__ = frozenset()
+        return Product()
+
+    def create_compute_instance(self):
+        if self.fail_on == "create":
+            raise ValueError("quota exceeded")
+        return self._product(ComputingInstance, "compute")
+
+    def create_storage_service(self):
+        return self._product(StorageService, "storage")
+
+    def create_database_service(self):
+        return self._product(DatabaseService, "database")
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    RecordingProvider.calls = []
+
+
+def test_steps_run_in_client_order_within_a_batch():
+    fleet = [Deployment(f"app-{number}", RecordingProvider(f"app-{number}")) for number in range(6)]
+    scheduler = FleetScheduler({RecordingProvider: ProviderLimit(concurrency=3, batch_size=2)})
+    results = scheduler.deploy(fleet)
+
+    assert sorted(result.name for result in results) == [deployment.name for deployment in fleet]
+    assert all(result.succeeded and result.provider == "RecordingProvider" for result in results)
+    for batch in (["app-0", "app-1"], ["app-2", "app-3"], ["app-4", "app-5"]):
+        assert [step for step, names in RecordingProvider.calls if names == batch] == ["compute", "storage", "database"]
+
+
+def test_errors_fail_only_their_applications():
+    fleet = [
+        Deployment("ok", RecordingProvider("ok")),
+        Deployment("no-quota", RecordingProvider("no-quota", fail_on="create")),
+        Deployment("ok-too", RecordingProvider("ok-too")),
+        Deployment("bad-bucket", RecordingProvider("bad-bucket", fail_on="storage")),
+    ]
+    scheduler = FleetScheduler({RecordingProvider: ProviderLimit(concurrency=2, batch_size=2)})
+    results = {result.name: result for result in scheduler.run(fleet)}
+
+    assert results["ok"].succeeded
+    assert isinstance(results["no-quota"].error, ValueError)
+    # A failed bulk call fails its whole batch, and their databases are never provisioned.
+    assert isinstance(results["ok-too"].error, RuntimeError) and isinstance(results["bad-bucket"].error, RuntimeError)
+    assert ("compute", ["ok"]) in RecordingProvider.calls and ("database", ["ok"]) in RecordingProvider.calls
+    assert not any(step == "database" and "ok-too" in names for step, names in RecordingProvider.calls)
+
+
+def test_real_providers_and_invalid_limits():
+    fleet = [Deployment(f"app-{number}", provider) for number, provider in
+             enumerate([AWSCloudServiceCreator(), AzureCloudServiceCreator()] * 5)]
+    results = FleetScheduler(default_limit=ProviderLimit(concurrency=2, batch_size=3)).deploy(fleet)
+    assert len(results) == 10 and all(result.succeeded for result in results)
+    assert {result.provider for result in results} == {"AWSCloudServiceCreator", "AzureCloudServiceCreator"}
+    with pytest.raises(ValueError):
+        FleetScheduler(default_limit=ProviderLimit(concurrency=0)).deploy(fleet)
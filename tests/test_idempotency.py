@@ -0,0 +1,110 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.creational.factory_method.idempotency import IdempotentPaymentExecutor
+from src.creational.factory_method.payment_example import CreditCardPaymentCreator, TransactionResult
+
+
+class CountingCard(CreditCardPaymentCreator):
+    __slots__ = ("calls", "gate", "error")
+
+    def __init__(self, card_number="4111111111111111"):
+        super().__init__(card_number=card_number, cvv="123", expiry="12/30")
+        self.calls = 0
+        self.gate = None
+        self.error = None
+
+    def execute_transaction(self, amount):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return TransactionResult("Successful", f"{amount} #{self.calls}")
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_repeated_id_returns_the_stored_result():
+    executor = IdempotentPaymentExecutor()
+    card = CountingCard()
+    first = executor.execute_transaction(card, 10.0, "order-1")
+    assert executor.execute_transaction(card, 10.0, "order-1") is first
+    assert card.calls == 1
+    assert executor.stats()["hits"] == 1 and executor.stats()["misses"] == 1
+
+
+def test_reusing_an_id_for_another_payment_raises():
+    executor = IdempotentPaymentExecutor()
+    executor.execute_transaction(CountingCard(), 10.0, "order-1")
+    with pytest.raises(ValueError):
+        executor.execute_transaction(CountingCard(), 11.0, "order-1")
+    with pytest.raises(ValueError):
+        executor.execute_transaction(CountingCard("4000056655665556"), 10.0, "order-1")
+
+
+def test_entries_expire_and_are_evicted_oldest_first():
+    clock = Clock()
+    executor = IdempotentPaymentExecutor(ttl=10, max_size=2, clock=clock)
+    card = CountingCard()
+    executor.execute_transaction(card, 1.0, "a")
+    clock.now = 5
+    executor.execute_transaction(card, 2.0, "b")
+    executor.execute_transaction(card, 3.0, "c")
+    assert len(executor) == 2 and executor.stats()["evictions"] == 1
+    clock.now = 12
+    executor.execute_transaction(card, 2.0, "b")
+    assert card.calls == 3
+    clock.now = 15
+    executor.execute_transaction(card, 2.0, "b")
+    assert card.calls == 4
+    executor.forget("b")
+    executor.execute_transaction(card, 2.0, "b")
+    assert card.calls == 5
+
+
+def test_exceptions_are_not_cached():
+    executor = IdempotentPaymentExecutor()
+    card = CountingCard()
+    card.error = ConnectionError("gateway timeout")
+    with pytest.raises(ConnectionError):
+        executor.execute_transaction(card, 10.0, "order-1")
+    card.error = None
+    assert executor.execute_transaction(card, 10.0, "order-1").status == "Successful"
+    assert card.calls == 2
+
+
+def test_concurrent_duplicates_wait_for_the_running_call():
+    executor = IdempotentPaymentExecutor()
+    card = CountingCard()
+    card.gate = threading.Event()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(executor.execute_transaction, card, 10.0, "order-1") for _ in range(8)]
+        while executor.stats()["waits"] < 7:
+            threading.Event().wait(0.001)
+        card.gate.set()
+        results = [future.result() for future in futures]
+    assert card.calls == 1
+    assert len(set(results)) == 1
+    assert executor.stats()["in_flight"] == 0
+
+
+def test_concurrent_duplicates_share_the_exception():
+    executor = IdempotentPaymentExecutor()
+    card = CountingCard()
+    card.gate, card.error = threading.Event(), ConnectionError("gateway timeout")
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(executor.execute_transaction, card, 10.0, "order-1") for _ in range(4)]
+        while executor.stats()["waits"] < 3:
+            threading.Event().wait(0.001)
+        card.gate.set()
+        errors = [future.exception() for future in futures]
+    assert all(isinstance(error, ConnectionError) for error in errors)
+    assert card.calls == 1 and len(executor) == 0
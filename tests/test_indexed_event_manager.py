@@ -0,0 +1,90 @@
+import gc
+import random
+
+import pytest
+
+from src.behavioral.observer.indexed_event_manager import (
+    EvenStateObserver, IndexedEventManager, IntervalTree, RangeObserverA, RangeObserverB, RangeSubscriber,
+)
+from src.behavioral.observer.template import Subscriber
+
+
+class Ranges(RangeSubscriber):
+    def __init__(self, *ranges):
+        self.ranges = ranges
+        self.states = []
+
+    def interest(self):
+        return self.ranges
+
+    def update(self, subject):
+        self.states.append(subject._state)
+
+
+class Everything(Subscriber):
+    def __init__(self):
+        self.states = []
+
+    def update(self, subject):
+        self.states.append(subject._state)
+
+
+def test_interval_tree_matches_a_linear_scan():
+    rng = random.Random(7)
+    entries = []
+    for number in range(300):
+        low = rng.randint(0, 1000)
+        entries.append((low, low + rng.randint(0, 100), number))
+    tree = IntervalTree(entries)
+    for point in range(-5, 1110, 7):
+        assert sorted(tree.stab(point)) == [value for low, high, value in entries if low <= point <= high]
+    assert IntervalTree([]).stab(3) == []
+
+
+def test_only_interested_subscribers_are_called_once_in_attach_order():
+    manager = IndexedEventManager()
+    overlapping = Ranges((0, 5), (3, 8))
+    narrow, everything = Ranges((4, 4)), Everything()
+    for subscriber in (everything, overlapping, narrow):
+        manager.attach(subscriber)
+    even = EvenStateObserver()
+    manager.attach(even)
+
+    assert manager.matching_subscribers(4) == [everything, overlapping, narrow, even]
+    assert manager.matching_subscribers(7) == [everything, overlapping]
+    for state in (4, 9, 3):
+        manager._state = state
+        manager.notify()
+    assert overlapping.states == [4, 3] and narrow.states == [4] and everything.states == [4, 9, 3]
+
+
+def test_the_index_follows_attach_and_detach():
+    manager = IndexedEventManager()
+    observer_a, observer_b = RangeObserverA(), RangeObserverB()
+    manager.attach(observer_a)
+    assert manager.matching_subscribers(1) == [observer_a]
+    manager.attach(observer_b)
+    assert manager.matching_subscribers(0) == [observer_a, observer_b]
+    manager.detach(observer_a)
+    assert manager.matching_subscribers(0) == [observer_b] and manager.matching_subscribers(1) == []
+
+
+def test_inverted_ranges_are_rejected():
+    manager = IndexedEventManager()
+    manager.attach(Ranges((5, 1)))
+    with pytest.raises(ValueError):
+        manager.matching_subscribers(3)
+
+
+def test_weak_subscribers_are_not_kept_alive_by_the_index():
+    manager = IndexedEventManager(weak_subscribers=True)
+    kept, dropped, everything = Ranges((0, 9)), Ranges((0, 9)), Everything()
+    for subscriber in (kept, dropped, everything):
+        manager.attach(subscriber)
+    assert manager.matching_subscribers(1) == [kept, dropped, everything]
+    del dropped
+    gc.collect()
+    manager._state = 1
+    manager.notify()
+    assert manager.matching_subscribers(1) == [kept, everything] and len(manager._subscribers) == 2
+    assert kept.states == everything.states == [1]
@@ -0,0 +1,88 @@
+import pytest
+
+from src.creational.factory_method.message_template import MessageTemplate
+from src.creational.factory_method.notification_example import (
+    EmailNotification, EmailNotificationCreator, NotificationCreator, NotificationInterface,
+)
+
+
+def test_render_matches_str_format():
+    source = "Hi {name}, order {order_id:05d} costs {amount:.2f} {name!r} {{literal}} 'quoted' \\ done"
+    record = {"name": "Ada", "order_id": 42, "amount": 3.14159}
+    assert MessageTemplate(source).render(record) == source.format(**record)
+
+
+def test_render_many_and_stream():
+    template = MessageTemplate("{a}-{b}")
+    records = [{"a": number, "b": number * 2} for number in range(5)]
+    assert template.render_many(records) == [f"{number}-{number * 2}" for number in range(5)]
+    chunks = list(template.stream(iter(records), chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert sum(chunks, []) == template.render_many(records)
+    with pytest.raises(ValueError):
+        next(template.stream(records, chunk_size=0))
+
+
+def test_constant_template():
+    assert MessageTemplate("static").render_many([{}, {}]) == ["static", "static"]
+
+
+def test_single_field_helpers():
+    template = MessageTemplate("Email: {message}")
+    assert template.render_value("hi") == "Email: hi"
+    assert template.render_column(["a", "b"]) == ["Email: a", "Email: b"]
+    with pytest.raises(ValueError):
+        MessageTemplate("{a}{b}").render_value("x")
+    with pytest.raises(ValueError):
+        MessageTemplate("{a}{b}").render_column(["x"])
+
+
+@pytest.mark.parametrize("source", ["{user.name}", "{items[0]}", "{amount:{width}}", "{name!z}", "{name!}"])
+def test_unsupported_fields_are_rejected(source):
+    with pytest.raises(ValueError):
+        MessageTemplate(source)
+
+
+def test_an_unknown_conversion_names_its_field():
+    with pytest.raises(ValueError, match=r"\{name!z\}"):
+        MessageTemplate("Hi {name!z}")
+
+
+def test_embed_renders_in_one_pass():
+    embedded = EmailNotification.template.embed("message", MessageTemplate("Hi {name}"))
+    assert embedded.render({"name": "Ada"}) == "Email notification: Hi Ada"
+
+
+class Outbox(NotificationInterface):
+    """Custom channel that only implements the abstract methods, without a template"""
+    def __init__(self):
+        self.sent = []
+
+    def format_message(self, message):
+        return f"Custom: {message}"
+
+    def send(self, message):
+        self.sent.append(message)
+
+
+class OutboxCreator(NotificationCreator):
+    def __init__(self):
+        self.outbox = Outbox()
+
+    def create_notification(self):
+        return self.outbox
+
+
+def test_channels_without_template_format_message_by_message():
+    creator = OutboxCreator()
+    assert creator.notify_many(["a", "b", "c"], chunk_size=2) == 3
+    assert creator.outbox.sent == ["Custom: a", "Custom: b", "Custom: c"]
+    assert creator.notify_records(MessageTemplate("Hi {name}"), [{"name": "Ada"}]) == 1
+    assert creator.outbox.sent[-1] == "Custom: Hi Ada"
+
+
+def test_builtin_channels_format_through_their_template():
+    notification = EmailNotification()
+    assert notification.format_message("hi") == "Email notification: hi"
+    assert notification.format_many(["a", "b"]) == ["Email notification: a", "Email notification: b"]
+    assert EmailNotificationCreator().notify_records(MessageTemplate("Hi {name}"), [{"name": "A"}] * 3) == 3
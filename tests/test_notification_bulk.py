@@ -0,0 +1,60 @@
+import pytest
+
+from src.creational.factory_method.notification_example import NotificationCreator, PushNotification
+
+
+class BatchingPush(PushNotification):
+    def __init__(self, produced):
+        self.produced = produced
+        self.batches = []
+
+    def send(self, message):
+        raise AssertionError("bulk sends must go through send_many")
+
+    def send_many(self, messages):
+        self.batches.append((list(messages), self.produced[0]))
+
+
+class BatchingCreator(NotificationCreator):
+    def __init__(self):
+        self.produced = [0]
+        self.created = []
+
+    def create_notification(self):
+        notification = BatchingPush(self.produced)
+        self.created.append(notification)
+        return notification
+
+    def messages(self, count):
+        for number in range(count):
+            self.produced[0] += 1
+            yield str(number)
+
+
+def test_the_product_is_created_once_and_the_messages_go_out_in_chunks():
+    creator = BatchingCreator()
+    assert creator.notify_many(creator.messages(7), chunk_size=3) == 7
+    [notification] = creator.created
+    assert [len(batch) for batch, _ in notification.batches] == [3, 3, 1]
+    assert notification.batches[0][0] == ["Push notification: 0", "Push notification: 1", "Push notification: 2"]
+
+
+def test_a_generator_is_consumed_one_chunk_at_a_time():
+    creator = BatchingCreator()
+    creator.notify_many(creator.messages(10), chunk_size=4)
+    # Messages produced by the time each chunk was sent
+    assert [produced for _, produced in creator.created[0].batches] == [4, 8, 10]
+
+
+def test_empty_input_sends_nothing():
+    creator = BatchingCreator()
+    assert creator.notify_many([]) == 0
+    assert creator.created[0].batches == []
+
+
+@pytest.mark.parametrize("chunk_size", [0, -1])
+def test_chunks_must_hold_a_message(chunk_size):
+    creator = BatchingCreator()
+    with pytest.raises(ValueError):
+        creator.notify_many(["message"], chunk_size=chunk_size)
+    assert creator.created == []
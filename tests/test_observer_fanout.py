@@ -0,0 +1,36 @@
+import json
+
+from benchmarks import observer_fanout
+
+
+def run(tmp_path, *extra):
+    output = tmp_path / "rows.jsonl"
+    observer_fanout.main(["--sizes", "50", "--costs", "noop", "--churn", "0", "0.1", "--rounds", "2",
+                          "--no-memory", "--output", str(output), *extra])
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert "environment" in rows[0]
+    return rows[1:]
+
+
+def test_one_row_per_case(tmp_path):
+    rows = run(tmp_path)
+    assert {(row["manager"], row["churn"]) for row in rows} == {
+        (manager, churn) for manager in ("event", "notification") for churn in (0.0, 0.1)
+    }
+    for row in rows:
+        assert row["rounds"] == 2
+        assert row["updates_per_second"] > 0
+
+
+def test_executor_label_only_applies_to_the_notification_manager(tmp_path):
+    rows = run(tmp_path, "--executor", "thread:4")
+    labels = {row["manager"]: row["executor"] for row in rows}
+    assert labels == {"event": "inline", "notification": "thread:4"}
+
+
+def test_compare_matches_cases(tmp_path):
+    rows = run(tmp_path)
+    baseline = tmp_path / "rows.jsonl"
+    lines = observer_fanout.compare(rows, str(baseline))
+    assert len(lines) == len(rows)
+    assert all("throughput x" in line for line in lines)
@@ -0,0 +1,61 @@
+import pytest
+
+from src.creational.factory_method.creation_policy import SingletonPolicy
+from src.creational.factory_method.payment_batch import PaymentBatch
+from src.creational.factory_method.payment_example import (
+    CardDetails, CreditCardPayment, CreditCardPaymentCreator, CryptocurrencyPaymentCreator, PaymentCreator,
+    PayPalDetails, PaypalPaymentCreator, TransactionResult,
+)
+
+
+class LegacyCreator(PaymentCreator):
+    """A creator that does not call super().__init__()"""
+    def __init__(self, card_number):
+        self.card_number = card_number
+
+    def create_payment_service(self):
+        return CreditCardPayment(self.card_number, "123", "12/30")
+
+
+def test_batch_round_trips_the_transactions():
+    batch = PaymentBatch()
+    batch.extend((CreditCardPaymentCreator(card_number="4111111111111111", cvv="123", expiry="12/30"), 10.0 + number)
+                 for number in range(100))
+    batch.append(PaypalPaymentCreator(email="buyer@example.com", auth_token="token"), 25.0)
+    batch.append(CryptocurrencyPaymentCreator(wallet_address="abcdefghigklmnop", blockchain_network="Tron"), 1.5)
+
+    assert len(batch) == 102 and batch.total_amount() == pytest.approx(sum(10.0 + n for n in range(100)) + 26.5)
+    assert batch[0].details == CardDetails("4111111111111111", "123", "12/30")
+    assert batch[-2].details == PayPalDetails("buyer@example.com", "token")
+    assert batch[-1].creator().account_key() == ("Tron", "abcdefghigklmnop")
+    assert [view.amount for view in batch][:2] == [10.0, 11.0]
+    assert len(batch._strings) == 7  # The card's details are stored once for its 100 transactions
+    assert batch.nbytes() == 102 * (1 + 8 + 3 * 4)
+    assert batch[5].execute_transaction().status == "Successful"
+    with pytest.raises(IndexError):
+        batch[102]
+
+
+def test_batch_rejects_creators_without_details():
+    with pytest.raises(TypeError):
+        PaymentBatch().append(LegacyCreator("4111111111111111"), 1.0)
+
+
+def test_creators_and_products_have_no_instance_dict():
+    card = CreditCardPaymentCreator(card_number="4111111111111111", cvv="123", expiry="12/30")
+    for value in (card, card.create_payment_service()):
+        assert not hasattr(value, "__dict__")
+    with pytest.raises(AttributeError):
+        card.nickname = "work card"
+
+
+def test_policy_and_receipt_sink_default_to_none_without_init():
+    legacy = LegacyCreator("4111111111111111")
+    assert legacy.creation_policy is None and legacy.receipt_sink is None
+    assert legacy.execute_transaction(5.0) == TransactionResult(
+        "Successful", "Payment of $5.0 with card ending with 1111 was Successful")
+
+    legacy.creation_policy = SingletonPolicy()
+    legacy.execute_transaction(5.0)
+    legacy.execute_transaction(6.0)
+    assert legacy.creation_policy.stats()["misses"] == 1
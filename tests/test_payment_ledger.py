@@ -0,0 +1,179 @@
+import os
+import threading
+
+import pytest
+
+from src.creational.factory_method.payment_example import (
+    REJECTED, CreditCardPaymentCreator, PaypalPaymentCreator,
+)
+from src.creational.factory_method.payment_ledger import (
+    LedgerPaymentExecutor, PaymentLedger, TransactionState,
+)
+from src.creational.factory_method.receipt_sink import ReceiptReader, ReceiptSink
+
+CARD = "4111111111111111"
+
+
+def card():
+    return CreditCardPaymentCreator(card_number=CARD, cvv="987", expiry="12/30")
+
+
+def paypal():
+    return PaypalPaymentCreator(email="buyer@example.com", auth_token="secret-token")
+
+
+def test_recovery_finishes_the_pending_transactions(tmp_path):
+    path = str(tmp_path / "payments.wal")
+    ledger = PaymentLedger(path, initial_size=1 << 16)
+    charged = ledger.begin(card(), 99.0, reference="order-1")
+    ledger.append(charged, TransactionState.VALIDATED)
+    ledger.commit(ledger.append(charged, TransactionState.PROCESSED, "Declined"))
+    ledger.begin(paypal(), 15.0, reference="order-2")
+    LedgerPaymentExecutor(ledger).execute_transaction(card(), 1.0, reference="order-3")
+    ledger.close()
+
+    ledger = PaymentLedger(path)
+    pending = ledger.pending()
+    assert [(entry.transaction_id, entry.state, entry.method, entry.account, entry.amount, entry.reference)
+            for entry in pending] == [
+        (1, TransactionState.PROCESSED, CreditCardPaymentCreator, "card ending with 1111", 99.0, "order-1"),
+        (2, TransactionState.BEGIN, PaypalPaymentCreator, "PayPal account b***@example.com", 15.0, "order-2"),
+    ]
+
+    orders = {"order-1": card(), "order-2": paypal()}
+    with ReceiptSink(str(tmp_path / "receipts"), flush_interval=None) as sink:
+        results = LedgerPaymentExecutor(ledger).recover(lambda entry: orders[entry.reference], receipt_sink=sink)
+    # The processed status is kept, the card is not charged a second time.
+    assert [(transaction_id, result.status) for transaction_id, result in results] == [(1, "Declined"), (2, "Failed")]
+    assert [receipt["amount"] for receipt in ReceiptReader(str(tmp_path / "receipts")).stream()] == [99.0, 15.0]
+    assert ledger.pending() == [] and ledger.begin(card(), 1.0) == 4
+    ledger.close()
+
+
+def test_the_ledger_does_not_store_payment_details(tmp_path):
+    path = tmp_path / "payments.wal"
+    ledger = PaymentLedger(str(path), initial_size=1 << 16)
+    executor = LedgerPaymentExecutor(ledger)
+    executor.execute_transaction(card(), 10.0)
+    executor.execute_transaction(paypal(), 10.0)
+    ledger.begin(card(), 10.0)
+    ledger.close()
+    stored = path.read_bytes()
+    for secret in (CARD.encode(), b"987", b"secret-token", b"12/30"):
+        assert secret not in stored
+
+
+def test_a_torn_record_ends_the_log(tmp_path):
+    path = tmp_path / "payments.wal"
+    ledger = PaymentLedger(str(path), initial_size=1 << 16)
+    first = ledger.begin(card(), 1.0)
+    intact = ledger.end
+    ledger.begin(card(), 2.0)
+    ledger.close()
+    with open(path, "r+b") as log:
+        log.seek(intact + 20)
+        log.write(b"\xff")
+
+    ledger = PaymentLedger(str(path))
+    assert ledger.end == intact
+    assert [entry.transaction_id for entry in ledger.pending()] == [first]
+    ledger.close()
+
+
+def test_rejected_cards_are_processed_without_a_charge(tmp_path):
+    ledger = PaymentLedger(str(tmp_path / "payments.wal"), initial_size=1 << 16)
+    invalid = CreditCardPaymentCreator(card_number="4111111111111112", cvv="987", expiry="12/30")
+    assert LedgerPaymentExecutor(ledger).execute_transaction(invalid, 5.0).status == REJECTED
+    assert ledger.pending() == []
+    ledger.close()
+
+
+def test_files_that_are_not_ledgers_are_refused(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        PaymentLedger(str(path))
+
+
+def test_commits_after_a_checkpoint_are_synced(tmp_path):
+    ledger = PaymentLedger(str(tmp_path / "payments.wal"), initial_size=1 << 16)
+    executor = LedgerPaymentExecutor(ledger)
+    stop = threading.Event()
+    errors = []
+
+    def work():
+        try:
+            while not stop.wait(0.0002):
+                executor.execute_transaction(card(), 1.0)
+        except BaseException as error:
+            errors.append(error)
+
+    workers = [threading.Thread(target=work) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for _ in range(500):
+        ledger.checkpoint()
+        stop.wait(0.0001)
+        assert ledger.durable <= ledger.end
+    stop.set()
+    for worker in workers:
+        worker.join(10)
+    assert not errors and not any(worker.is_alive() for worker in workers)
+
+    lsn = ledger.append(ledger.begin(card(), 1.0), TransactionState.ABORTED)
+    ledger.commit(lsn)
+    assert ledger.durable == ledger.end == lsn
+    ledger.close()
+
+
+def test_a_checkpoint_keeps_the_pending_transactions(tmp_path):
+    path = str(tmp_path / "payments.wal")
+    ledger = PaymentLedger(path, initial_size=1 << 16)
+    executor = LedgerPaymentExecutor(ledger)
+    charged = ledger.begin(card(), 99.0, reference="order-1")
+    ledger.append(charged, TransactionState.VALIDATED)
+    ledger.commit(ledger.append(charged, TransactionState.PROCESSED, "Successful"))
+    started = ledger.begin(paypal(), 15.0, reference="order-2")
+    for number in range(1000):
+        executor.execute_transaction(card(), float(number))
+    before = ledger.pending()
+    assert ledger.checkpoint() == 2
+    assert ledger.pending() == before and ledger.end < 1 << 10
+    ledger.close()
+
+    ledger = PaymentLedger(path)
+    assert ledger.pending() == before
+    assert [(entry.transaction_id, entry.status) for entry in before] == [(charged, "Successful"), (started, None)]
+    ledger.close()
+    assert not os.path.exists(path + ".compact")
+
+
+def test_the_file_stays_bounded_under_sustained_load(tmp_path):
+    path = str(tmp_path / "payments.wal")
+    ledger = PaymentLedger(path, initial_size=1 << 16)
+    executor = LedgerPaymentExecutor(ledger)
+    stop = threading.Event()
+    completed = []
+
+    def work():
+        while not stop.is_set():
+            executor.execute_transaction(card(), 1.0)
+            completed.append(1)
+
+    workers = [threading.Thread(target=work) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    largest = 0
+    try:
+        # Transactions are pending at every checkpoint, the log must still shrink back.
+        while len(completed) < 5000:
+            stop.wait(0.01)
+            ledger.checkpoint()
+            largest = max(largest, os.path.getsize(path))
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join(10)
+    # Without compaction 5000 transactions write about 900 KB of records and grow the file to 1 MiB.
+    assert largest <= 1 << 17
+    ledger.close()
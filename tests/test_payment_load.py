@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from benchmarks import payment_load
+from src.creational.factory_method.card_validation import luhn_valid
+
+
+def run(capsys, *extra):
+    payment_load.main(["--duration", "0.2", "--latency-scale", "0.01", "--accounts", "5", "--seed", "1", *extra])
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    return {row["method"]: row for row in rows}
+
+
+def test_closed_mode_reports_every_method_and_the_total(capsys):
+    rows = run(capsys, "--mode", "closed", "--concurrency", "4", "--decline-rate", "0", "--error-rate", "0")
+    assert set(rows) == {"card", "paypal", "crypto", "total"}
+    assert rows["total"]["transactions"] == sum(rows[method]["transactions"] for method in ("card", "paypal", "crypto"))
+    for row in rows.values():
+        assert row["mode"] == "closed" and row["transactions"] > 0
+        # Generated accounts are valid, nothing is declined before reaching the gateway
+        assert row["decline_rate"] == 0.0 and row["error_rate"] == 0.0
+        assert 0 < row["p50_ms"] <= row["p99_ms"] <= row["p999_ms"] <= row["max_ms"]
+
+
+def test_open_mode_counts_gateway_declines_and_errors(capsys):
+    declined = run(capsys, "--mode", "open", "--rate", "200", "--mix", "card=1", "--decline-rate", "1", "--error-rate", "0")
+    assert declined["card"]["decline_rate"] == 1.0 and declined["card"]["transactions"] > 0
+    errors = run(capsys, "--mode", "open", "--rate", "200", "--mix", "card=1", "--error-rate", "1")
+    assert errors["card"]["error_rate"] == 1.0
+
+
+def test_generated_cards_pass_the_checksum():
+    assert all(luhn_valid(payment_load.ACCOUNT_FACTORIES["card"](number).card_number) for number in range(100))
+
+
+@pytest.mark.parametrize("entry", ["wire=1", "card"])
+def test_invalid_mix_entries_are_rejected(entry):
+    with pytest.raises(SystemExit):
+        payment_load.parse_mix([entry])
@@ -0,0 +1,104 @@
+import random
+import threading
+import time
+
+import pytest
+
+from src.creational.factory_method.payment_batch import PaymentBatch
+from src.creational.factory_method.payment_example import (
+    CreditCardPaymentCreator, PaymentCreator, PaymentInterface, TransactionResult,
+)
+from src.creational.factory_method.payment_pipeline import PaymentPipeline
+
+
+class RecordingPayment(PaymentInterface):
+    def __init__(self, creator):
+        self.creator = creator
+
+    def validate_payment_details(self):
+        if self.creator.fail_validation:
+            raise ValueError("invalid account")
+
+    def process_payment(self, amount):
+        time.sleep(random.random() / 1000)
+        with self.creator.lock:
+            self.creator.processed.append((self.creator.account, amount))
+        return "Successful"
+
+    def generate_receipt(self, amount, status):
+        return f"{self.creator.account}: {amount} {status}"
+
+
+class RecordingPaymentCreator(PaymentCreator):
+    """A creator written before account_key() and details existed"""
+    def __init__(self, account, processed, lock, fail_validation=False):
+        super().__init__()
+        self.account = account
+        self.processed = processed
+        self.lock = lock
+        self.fail_validation = fail_validation
+
+    def create_payment_service(self):
+        return RecordingPayment(self)
+
+    def product_key(self):
+        return type(self), self.account
+
+
+def test_account_key_and_details_have_defaults():
+    creator = RecordingPaymentCreator("a", [], threading.Lock())
+    assert creator.account_key() == (RecordingPaymentCreator, "a")
+    assert creator.details == ()
+    assert creator.execute_transaction(5.0) == TransactionResult("Successful", "a: 5.0 Successful")
+    with pytest.raises(TypeError):
+        PaymentBatch().append(creator, 5.0)
+
+
+def test_pipeline_keeps_the_order_of_every_account():
+    processed, lock = [], threading.Lock()
+    accounts = [RecordingPaymentCreator(name, processed, lock) for name in "abcdefg"]
+    transactions = [(accounts[number % 7], float(number)) for number in range(700)]
+    results = PaymentPipeline(workers=(2, 4, 2), queue_size=4).run(transactions)
+
+    assert [result.index for result in results] == list(range(700))
+    assert all(result.error is None and result.result.status == "Successful" for result in results)
+    for account in "abcdefg":
+        amounts = [amount for name, amount in processed if name == account]
+        assert amounts == sorted(amounts) and len(amounts) == 100
+
+
+def test_pipeline_reports_failed_stages_and_skips_the_rest():
+    processed, lock = [], threading.Lock()
+    good = RecordingPaymentCreator("good", processed, lock)
+    bad = RecordingPaymentCreator("bad", processed, lock, fail_validation=True)
+    card = CreditCardPaymentCreator(card_number="4111111111111111", cvv="123", expiry="12/30")
+    pipeline = PaymentPipeline(workers=1)
+    results = pipeline.run([(good, 1.0), (bad, 2.0), (card, 3.0)])
+
+    assert isinstance(results[1].error, ValueError) and results[1].result is None
+    assert results[2].account == "4111111111111111" and results[2].result.status == "Successful"
+    assert processed == [("good", 1.0)]
+    stages = pipeline.stats()["stages"]
+    assert stages["validate"]["failed"] == 1 and stages["process"]["completed"] == 2
+
+
+def test_closing_the_stream_early_stops_the_remaining_transactions():
+    processed, lock = [], threading.Lock()
+    accounts = [RecordingPaymentCreator(name, processed, lock) for name in "abcd"]
+    stream = PaymentPipeline(workers=(1, 2, 1), queue_size=2).stream(
+        (accounts[number % 4], float(number)) for number in range(10_000)
+    )
+    next(stream)
+    stream.close()
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("payment-")]
+    charged = len(processed)
+    time.sleep(0.05)
+    # Only the transactions already queued in the bounded stages may have run
+    assert len(processed) == charged < 50
+
+
+def test_pipeline_rejects_invalid_worker_counts():
+    with pytest.raises(ValueError):
+        PaymentPipeline(workers=(1, 2))
+    with pytest.raises(ValueError):
+        list(PaymentPipeline(workers=(1, 0, 1)).stream([]))
@@ -0,0 +1,63 @@
+import threading
+
+from src.creational.factory_method.payment_example import (
+    CreditCardPaymentCreator, CryptocurrencyPaymentCreator, PaypalPaymentCreator,
+)
+from src.creational.factory_method.receipt_sink import ReceiptReader, ReceiptSink
+
+
+def test_receipts_round_trip_through_rotated_segments(tmp_path):
+    with ReceiptSink(str(tmp_path), buffer_size=10, max_segment_bytes=200, flush_interval=None) as sink:
+        for number in range(50):
+            sink.append({"number": number})
+        assert sink.stats()["buffered"] == 0
+    reader = ReceiptReader(str(tmp_path))
+    assert len(reader.segments()) > 1
+    assert [receipt["number"] for receipt in reader.stream()] == list(range(50))
+
+
+def test_a_restarted_sink_starts_a_new_segment_and_torn_lines_are_skipped(tmp_path):
+    with ReceiptSink(str(tmp_path), flush_interval=None) as sink:
+        sink.append({"number": 0})
+        first = sink.segment_path
+    with open(first, "ab") as segment:
+        segment.write(b'{"number": 1')  # Crash in the middle of a write
+    with ReceiptSink(str(tmp_path), flush_interval=None) as sink:
+        assert sink.segment_path != first
+        sink.append({"number": 2})
+    assert [receipt["number"] for receipt in ReceiptReader(str(tmp_path)).stream()] == [0, 2]
+    assert [receipt["number"] for receipt in ReceiptReader(str(tmp_path)).stream(from_segment=2)] == [2]
+
+
+def test_concurrent_appends_keep_each_threads_order(tmp_path):
+    threads, appended = 4, 2000
+    with ReceiptSink(str(tmp_path), buffer_size=7, flush_interval=0.001) as sink:
+        def append(thread):
+            for number in range(appended):
+                sink.append({"thread": thread, "number": number})
+        workers = [threading.Thread(target=append, args=(thread,)) for thread in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    receipts = list(ReceiptReader(str(tmp_path)).stream())
+    assert len(receipts) == threads * appended
+    for thread in range(threads):
+        assert [receipt["number"] for receipt in receipts if receipt["thread"] == thread] == list(range(appended))
+
+
+def test_stored_receipts_do_not_contain_the_account_secrets(tmp_path):
+    creators = [
+        CreditCardPaymentCreator(card_number="4111111111111111", cvv="123", expiry="12/30"),
+        PaypalPaymentCreator(email="buyer@example.com", auth_token="secret-token"),
+        CryptocurrencyPaymentCreator(wallet_address="abcdefghigklmnop", blockchain_network="Tron"),
+    ]
+    with ReceiptSink(str(tmp_path), flush_interval=None) as sink:
+        for creator in creators:
+            creator.receipt_sink = sink
+            creator.execute_transaction(25.0)
+    accounts = [receipt["account"] for receipt in ReceiptReader(str(tmp_path)).stream()]
+    assert accounts == ["card ending with 1111", "PayPal account b***@example.com", "Tron wallet ending with igklmnop"]
+    stored = b"".join(open(path, "rb").read() for path in ReceiptReader(str(tmp_path)).segments())
+    for secret in (b"4111111111111111", b"secret-token"):
+        assert secret not in stored
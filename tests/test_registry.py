@@ -0,0 +1,61 @@
+import gc
+
+from src.behavioral.observer.template import ConcreteEventManager, Subscriber
+from src.common.registry import SubscriberRegistry
+
+
+class Counter(Subscriber):
+    def __init__(self):
+        self.calls = 0
+
+    def update(self, subject):
+        self.calls += 1
+
+
+def test_registry_is_an_insertion_ordered_set():
+    registry = SubscriberRegistry()
+    first, second = object(), object()
+    assert registry.add(first) and registry.add(second) and not registry.add(first)
+    assert list(registry) == [first, second] and first in registry and len(registry) == 2
+    assert registry.discard(first) and not registry.discard(first)
+    assert list(registry) == [second]
+    registry.clear()
+    assert len(registry) == 0 and list(registry) == []
+
+
+def test_iteration_is_a_snapshot():
+    registry = SubscriberRegistry()
+    subscribers = [object() for _ in range(3)]
+    for subscriber in subscribers:
+        registry.add(subscriber)
+    seen = []
+    for subscriber in registry:
+        seen.append(subscriber)
+        registry.discard(subscriber)
+        registry.add(object())
+    assert seen == subscribers
+    assert len(registry) == 3
+
+
+def test_weak_registry_drops_collected_subscribers():
+    manager = ConcreteEventManager(weak_subscribers=True)
+    kept, dropped = Counter(), Counter()
+    manager.attach(kept)
+    manager.attach(dropped)
+    del dropped
+    gc.collect()
+    assert len(manager._subscribers) == 1
+    manager.notify()
+    assert kept.calls == 1 and list(manager._subscribers) == [kept]
+
+
+def test_a_dead_reference_does_not_remove_a_new_subscriber_with_the_same_id():
+    registry = SubscriberRegistry(weak=True)
+    subscriber = Counter()
+    registry.add(subscriber)
+    registry.discard(subscriber)
+    replacement = Counter()
+    registry.add(replacement)
+    del subscriber
+    gc.collect()
+    assert replacement in registry and list(registry) == [replacement]
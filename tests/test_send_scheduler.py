@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from src.creational.factory_method import send_scheduler
+from src.creational.factory_method.notification_example import (
+    EmailNotificationCreator, PushNotification, PushNotificationCreator, SMSNotification, SMSNotificationCreator,
+)
+from src.creational.factory_method.send_scheduler import SendScheduler, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds + 1e-9  # Like a real sleep, some time always passes
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(send_scheduler.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_token_bucket_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate=10, capacity=2, clock=clock)
+    assert bucket.take() and bucket.take()
+    assert not bucket.take()
+    assert bucket.delay() == pytest.approx(0.1)
+    clock.now = 0.1
+    assert bucket.take()
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_priorities_within_a_channel(clock):
+    sent = []
+    creator = SMSNotificationCreator()
+    scheduler = SendScheduler(batch_size=1, clock=clock)
+    for number, priority in enumerate([0, 5, 0, 9]):
+        scheduler.submit(creator, str(number), priority)
+    original = SMSNotification.send_many
+    SMSNotification.send_many = lambda self, messages: sent.extend(messages)
+    try:
+        assert scheduler.run() == 4
+    finally:
+        SMSNotification.send_many = original
+    assert sent == [f"SMS notification: {number}" for number in (3, 1, 0, 2)]
+
+
+def test_rate_limit_and_reported_rate(clock):
+    scheduler = SendScheduler({PushNotification: (100, 10), SMSNotification: (5, 1)}, batch_size=10, clock=clock)
+    for number in range(210):
+        scheduler.submit(PushNotificationCreator(), f"push {number}")
+    for number in range(6):
+        scheduler.submit(SMSNotificationCreator(), f"sms {number}")
+    scheduler.submit(EmailNotificationCreator(), "digest")
+    assert scheduler.run() == 217
+    stats = scheduler.stats()
+    # 200 pushes after the burst at 100/s and 5 SMS after the first one at 5/s, batching must not inflate it.
+    assert clock.now == pytest.approx(2.0)
+    assert stats["PushNotification"]["sent_per_second"] == pytest.approx(100)
+    assert stats["SMSNotification"]["sent_per_second"] == pytest.approx(5)
+    assert stats["EmailNotification"]["sent_per_second"] is None
+    assert all(channel["queued"] == 0 for channel in stats.values())
+
+
+def test_background_thread_drains_on_stop():
+    scheduler = SendScheduler(batch_size=7)
+    scheduler.start()
+    for number in range(100):
+        scheduler.submit(EmailNotificationCreator(), str(number))
+    scheduler.stop(drain=True)
+    assert scheduler.pending() == 0
+    assert scheduler.stats()["EmailNotification"]["sent"] == 100
+
+
+class BrokenChannel(PushNotification):
+    def send_many(self, messages):
+        if any("broken" in message for message in messages):
+            raise ConnectionError("provider unavailable")
+
+
+class BrokenCreator(PushNotificationCreator):
+    def create_notification(self):
+        return BrokenChannel()
+
+
+def test_a_failed_send_is_counted_and_the_worker_keeps_sending():
+    scheduler = SendScheduler(batch_size=1)
+    scheduler.start()
+    try:
+        for message in ("broken", "first", "second"):
+            scheduler.submit(BrokenCreator(), message)
+        deadline = time.monotonic() + 5
+        while scheduler.stats()["BrokenChannel"]["sent"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+    finally:
+        scheduler.stop(drain=False)
+    assert scheduler.pending() == 0
+    assert {key: scheduler.stats()["BrokenChannel"][key] for key in ("sent", "failed")} == {"sent": 2, "failed": 1}
+
+
+def test_run_only_counts_the_sent_messages(clock):
+    scheduler = SendScheduler(clock=clock)
+    creator, other = BrokenCreator(), BrokenCreator()
+    scheduler.submit(creator, "ok")
+    scheduler.submit(other, "broken")
+    scheduler.submit(creator, "ok again")
+    assert scheduler.run() == 2
+    assert scheduler.stats()["BrokenChannel"]["failed"] == 1
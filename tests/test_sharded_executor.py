@@ -0,0 +1,108 @@
+import functools
+import os
+import signal
+import threading
+from collections import defaultdict
+
+import pytest
+
+from src.creational.factory_method.creation_policy import LRUPolicy
+from src.creational.factory_method.payment_example import (
+    CreditCardPaymentCreator, PaymentCreator, PaypalPaymentCreator,
+)
+from src.creational.factory_method.receipt_sink import ReceiptReader
+from src.creational.factory_method.sharded_executor import RemoteTransactionError, ShardedPaymentExecutor
+
+
+class UnknownCreator(PaymentCreator):
+    def create_payment_service(self):
+        raise NotImplementedError
+
+
+def cards(count):
+    return [CreditCardPaymentCreator(card_number=f"4{number:014d}", cvv="123", expiry="12/30") for number in range(count)]
+
+
+def stored_receipts(directory):
+    receipts = []
+    for shard in sorted(os.listdir(directory)):
+        receipts.extend(ReceiptReader(os.path.join(directory, shard)).stream())
+    return receipts
+
+
+def test_transactions_of_an_account_run_in_order(tmp_path):
+    # 15 digit Visa numbers fail validation, the receipts still record every transaction.
+    accounts = cards(10)
+    with ShardedPaymentExecutor(shards=2, batch_size=16, receipt_directory=str(tmp_path),
+                                creation_policy=functools.partial(LRUPolicy, maxsize=16)) as executor:
+        futures = [executor.submit(accounts[number % 10], float(number)) for number in range(400)]
+        assert {executor.shard_for(account) for account in accounts} == {0, 1}
+    assert [future.result().status for future in futures] == ["Rejected"] * 400
+
+    amounts = defaultdict(list)
+    for receipt in stored_receipts(tmp_path):
+        amounts[receipt["account"]].append(receipt["amount"])
+    assert sum(map(len, amounts.values())) == 400
+    assert all(values == sorted(values) for values in amounts.values())
+    assert sorted(amounts) == [f"card ending with {number:04d}" for number in range(10)]
+
+
+def test_a_transaction_id_runs_once(tmp_path):
+    card = CreditCardPaymentCreator(card_number="4111111111111111", cvv="123", expiry="12/30")
+    with ShardedPaymentExecutor(shards=2, receipt_directory=str(tmp_path)) as executor:
+        first = [executor.submit(card, 10.0, transaction_id="order-1") for _ in range(3)]
+        executor.submit(card, 10.0)
+        executor.drain()
+        retry = executor.submit(card, 10.0, transaction_id="order-1")
+        mismatch = executor.submit(card, 99.0, transaction_id="order-1")
+    assert {future.result() for future in first + [retry]} == {first[0].result()}
+    with pytest.raises(RemoteTransactionError, match="ValueError"):
+        mismatch.result()
+    assert len(stored_receipts(tmp_path)) == 2
+
+
+def test_a_crashed_worker_is_restarted_and_its_batches_resent():
+    accounts = cards(8) + [PaypalPaymentCreator(email=f"buyer{number}@example.com", auth_token="token")
+                           for number in range(8)]
+    with ShardedPaymentExecutor(shards=2, batch_size=8, flush_interval=0.001) as executor:
+        futures = [executor.submit(accounts[number % 16], 1.0) for number in range(2000)]
+        os.kill(executor.worker_pids()[0], signal.SIGKILL)
+        executor.drain()
+        assert executor.stats()["restarts"] >= 1
+    assert len([future.result() for future in futures]) == 2000
+
+
+def test_a_quiet_shard_is_flushed_while_another_one_is_saturated():
+    accounts = cards(20)
+    with ShardedPaymentExecutor(shards=2, batch_size=4, flush_interval=0.2) as executor:
+        busy = [account for account in accounts if executor.shard_for(account) == 0]
+        quiet = next(account for account in accounts if executor.shard_for(account) == 1)
+        stop = threading.Event()
+        submitted = []
+
+        def saturate():
+            number = 0
+            while not stop.is_set():
+                submitted.append(executor.submit(busy[number % len(busy)], 1.0))  # Full batches go out right away
+                number += 1
+
+        feeder = threading.Thread(target=saturate)
+        feeder.start()
+        try:
+            while len(submitted) < 200:
+                stop.wait(0.001)
+            submitted[199].result(timeout=5)  # Results are streaming back from the busy shard
+            trickle = executor.submit(quiet, 1.0)  # A partial batch, only the flush interval sends it
+            assert trickle.result(timeout=5).status == "Rejected"
+            assert feeder.is_alive()
+        finally:
+            stop.set()
+            feeder.join()
+
+
+def test_creators_without_a_method_code_are_refused():
+    with ShardedPaymentExecutor(shards=1) as executor:
+        with pytest.raises(TypeError):
+            executor.submit(UnknownCreator(), 1.0)
+    with pytest.raises(RuntimeError):
+        executor.submit(cards(1)[0], 1.0)
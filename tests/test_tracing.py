@@ -0,0 +1,116 @@
+import asyncio
+import io
+import threading
+
+import pytest
+
+from src.behavioral.observer.async_notification_system import (
+    AsyncInstructorSubscriber, ConcreteAsyncNotificationManager,
+)
+from src.behavioral.observer.template import ConcreteEventManager
+from src.common.tracing import AsyncSink, BufferedSink, NullSink, PrintSink, SampledSink, TraceSink, tracer
+
+
+class ListSink(TraceSink):
+    def __init__(self, delay=0.0):
+        self.messages = []
+        self.flushes = 0
+        self.delay = delay
+
+    def emit(self, message):
+        if self.delay:
+            threading.Event().wait(self.delay)
+        self.messages.append(message)
+
+    def flush(self):
+        self.flushes += 1
+
+
+@pytest.fixture
+def installed():
+    def install(sink):
+        tracer.set_sink(sink)
+        return sink
+    yield install
+    tracer.set_sink(None)
+
+
+def test_tracer_is_disabled_by_default():
+    assert isinstance(tracer.sink, NullSink)
+    assert not tracer.enabled
+
+
+def test_set_sink_returns_the_previous_sink(installed):
+    sink = installed(ListSink())
+    assert tracer.enabled
+    assert tracer.set_sink(None) is sink
+    assert not tracer.enabled
+
+
+def test_print_sink_writes_one_line_per_message():
+    stream = io.StringIO()
+    sink = PrintSink(stream)
+    sink.emit("first")
+    sink.emit("second")
+    assert stream.getvalue() == "first\nsecond\n"
+
+
+def test_buffered_sink_writes_complete_lines_in_chunks():
+    stream = io.StringIO()
+    sink = BufferedSink(stream, capacity=2)
+    sink.emit("a")
+    assert stream.getvalue() == ""
+    sink.emit("b")
+    sink.emit("c")
+    sink.flush()
+    assert stream.getvalue() == "a\nb\nc\n"
+
+
+def test_sampled_sink_forwards_one_in_every():
+    inner = ListSink()
+    sink = SampledSink(inner, every=3)
+    for number in range(7):
+        sink.emit(str(number))
+    assert inner.messages == ["0", "3", "6"]
+
+
+def test_async_sink_flush_waits_for_the_queue():
+    inner = ListSink(delay=0.001)
+    sink = AsyncSink(inner)
+    for number in range(50):
+        sink.emit(str(number))
+    sink.flush()
+    assert inner.messages == [str(number) for number in range(50)]
+    assert inner.flushes == 1
+    sink.close()
+
+
+def test_async_sink_flush_after_close():
+    inner = ListSink()
+    sink = AsyncSink(inner)
+    sink.emit("message")
+    sink.close()
+    sink.flush()
+    assert inner.messages == ["message"]
+
+
+def test_state_change_keeps_its_leading_blank_line(installed):
+    stream = io.StringIO()
+    installed(PrintSink(stream))
+    ConcreteEventManager().business_logic()
+    assert stream.getvalue().startswith("\nEvent Manager: I'm changing my state.\n")
+
+
+def test_async_notification_manager_is_traced(installed):
+    sink = installed(ListSink())
+    manager = ConcreteAsyncNotificationManager(timeout=0.01)
+    slow = AsyncInstructorSubscriber(delay=1.0)
+    manager.attach(slow)
+    asyncio.run(manager.notify())
+    manager.detach(slow)
+    assert sink.messages == [
+        "Async Notification Manager: Attached a subscriber.",
+        "Async Notification Manager: Notifying observers...",
+        "Async Notification Manager: 1 subscriber(s) failed or timed out.",
+        "Async Notification Manager: Detached a subscriber.",
+    ]